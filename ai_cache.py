@@ -0,0 +1,229 @@
+"""
+Cache de respostas da IA do PluginForge Studio
+Respostas de geração endereçadas pelo hash do prompt normalizado, do modelo e
+dos parâmetros da requisição. Ficam em disco (comprimidas) com validade (TTL)
+e limites de tamanho e quantidade (LRU); quem chama decide o que guardar,
+depois de validar a resposta.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from storage import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Configurações
+AI_CACHE_ENABLED = os.getenv('AI_CACHE_ENABLED', 'true').lower() == 'true'
+AI_CACHE_TTL_SECONDS = int(os.getenv('AI_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+AI_CACHE_MAX_BYTES = int(os.getenv('AI_CACHE_MAX_MB', '64')) * 1024 * 1024
+AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', '2000'))
+
+AI_CACHE_DIR = CACHE_DIR / "ai_responses"
+STATS_FILE = AI_CACHE_DIR / "stats.json"
+
+# Incrementar quando o formato das respostas esperado pelos pipelines mudar
+CACHE_FORMAT_VERSION = '1'
+
+_stats_lock = threading.Lock()
+
+
+def enabled_for(user):
+    """O cache vale para o usuário (desativado globalmente ou por opção do usuário)"""
+    return AI_CACHE_ENABLED and user is not None and not user.ai_cache_opt_out
+
+
+def _normalize(text):
+    """Ignora espaços extras e diferenças de quebra de linha"""
+    return ' '.join(text.split())
+
+
+def compute_key(payload):
+    """
+    Chave de uma requisição à IA.
+
+    Args:
+        payload (dict): Corpo da requisição de chat completion
+
+    Returns:
+        str: SHA-256 do modelo, parâmetros e mensagens normalizadas
+    """
+    normalized = {
+        'format': CACHE_FORMAT_VERSION,
+        'model': payload.get('model'),
+        'temperature': payload.get('temperature'),
+        'max_tokens': payload.get('max_tokens'),
+        'messages': [
+            {'role': message.get('role'), 'content': _normalize(message.get('content') or '')}
+            for message in payload.get('messages', [])
+        ],
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _entry_path(key):
+    return AI_CACHE_DIR / f"{key}.json.gz"
+
+
+def _bump(counter, amount=1):
+    """Incrementa um contador das estatísticas (compartilhadas entre workers)"""
+    try:
+        AI_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with _stats_lock, open(AI_CACHE_DIR / "stats.lock", 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    stats = json.loads(STATS_FILE.read_text(encoding='utf-8'))
+                except (OSError, ValueError):
+                    stats = {}
+                stats[counter] = stats.get(counter, 0) + amount
+                tmp_file = STATS_FILE.with_suffix(f'.{os.getpid()}.tmp')
+                tmp_file.write_text(json.dumps(stats), encoding='utf-8')
+                os.replace(tmp_file, STATS_FILE)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+    except OSError as e:
+        print(f"⚠️ Não foi possível atualizar as estatísticas do cache da IA: {str(e)}")
+
+
+def _read(key):
+    """Entrada do cache (None se não existir, estiver corrompida ou vencida)"""
+    path = _entry_path(key)
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError, EOFError):
+        return None
+    if time.time() - entry.get('created_at', 0) > AI_CACHE_TTL_SECONDS:
+        path.unlink(missing_ok=True)
+        return None
+    return entry
+
+
+def lookup(key):
+    """
+    Resposta guardada para a chave.
+
+    Args:
+        key (str): Chave calculada por compute_key
+
+    Returns:
+        str: Conteúdo da resposta, ou None se não houver entrada válida
+    """
+    if not AI_CACHE_ENABLED:
+        return None
+
+    entry = _read(key)
+    if entry is None:
+        _bump('misses')
+        return None
+
+    # mtime marca o último uso (política LRU)
+    now = time.time()
+    try:
+        os.utime(_entry_path(key), (now, now))
+    except OSError:
+        pass
+    _bump('hits')
+    print(f"♻️ Resposta da IA em cache: {key[:12]}")
+    return entry['content']
+
+
+def store(key, content, model=None):
+    """
+    Guarda uma resposta validada (não sobrescreve uma entrada válida, mantendo o TTL original).
+
+    Args:
+        key (str): Chave calculada por compute_key
+        content (str): Resposta da IA
+        model (str): Modelo que gerou a resposta
+    """
+    if not AI_CACHE_ENABLED or not content or _read(key) is not None:
+        return
+
+    path = _entry_path(key)
+    try:
+        AI_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump({'content': content, 'model': model, 'created_at': time.time()}, f)
+        os.replace(tmp_path, path)
+        _bump('stores')
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar a resposta da IA em cache: {str(e)}")
+        return
+
+    evict()
+
+
+def _entries():
+    """Lista as entradas do cache com último uso, tamanho e caminho"""
+    entries = []
+    if not AI_CACHE_DIR.exists():
+        return entries
+    for path in AI_CACHE_DIR.glob('*.json.gz'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def evict():
+    """
+    Remove entradas vencidas e, depois, as usadas há mais tempo até respeitar os limites.
+
+    Returns:
+        int: Número de entradas removidas
+    """
+    entries = sorted(_entries(), key=lambda entry: entry[0])
+    total_size = sum(entry[1] for entry in entries)
+    removed = 0
+
+    # O último uso é sempre posterior à criação: sem uso há mais que o TTL, está vencida
+    cutoff = time.time() - AI_CACHE_TTL_SECONDS
+    while entries and (entries[0][0] < cutoff or total_size > AI_CACHE_MAX_BYTES
+                       or len(entries) > AI_CACHE_MAX_ENTRIES):
+        _, size, path = entries.pop(0)
+        path.unlink(missing_ok=True)
+        total_size -= size
+        removed += 1
+
+    if removed:
+        _bump('evictions', removed)
+        print(f"🧹 Cache de respostas da IA: {removed} entradas removidas")
+    return removed
+
+
+def get_stats():
+    """Estatísticas do cache (acertos, falhas, taxa de acerto, tamanho)"""
+    try:
+        stats = json.loads(STATS_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        stats = {}
+
+    entries = _entries()
+    hits, misses = stats.get('hits', 0), stats.get('misses', 0)
+    return {
+        'enabled': AI_CACHE_ENABLED,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        'stores': stats.get('stores', 0),
+        'evictions': stats.get('evictions', 0),
+        'entries': len(entries),
+        'size_bytes': sum(entry[1] for entry in entries),
+        'ttl_seconds': AI_CACHE_TTL_SECONDS,
+        'max_bytes': AI_CACHE_MAX_BYTES,
+        'max_entries': AI_CACHE_MAX_ENTRIES,
+    }
@@ -0,0 +1,651 @@
+"""
+Cliente HTTP da API de IA do PluginForge Studio
+Uma sessão requests por processo (keep-alive e pool de conexões) aquecida na
+inicialização do worker. Respostas 429/5xx e falhas de rede são repetidas com
+backoff exponencial com jitter, respeitando o Retry-After, dentro de um prazo
+por chamada. Cada tentativa passa antes pelo limitador compartilhado entre os
+workers (ai_limiter). Com modelos alternativos configurados, uma chamada lenta
+recebe uma requisição paralela (hedge) e um modelo que falha passa a vez ao
+próximo (failover). Respostas podem ser transmitidas token a token (stream_chat).
+Latência, tempo até o primeiro token e retries vão para métricas
+compartilhadas entre os workers.
+"""
+
+import json
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from datetime import datetime, UTC
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import ai_limiter
+from storage import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# API Configuration (use environment variable in production)
+API_KEY = os.getenv('OPENROUTER_API_KEY', "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")
+API_ENDPOINT = "https://openrouter.ai/api/v1/chat/completions"
+API_MODEL = "kwaipilot/kat-coder-pro:free"  # Modelo válido da OpenRouter
+
+# Conexões mantidas abertas com a API por processo
+AI_POOL_SIZE = int(os.getenv('AI_POOL_SIZE', '10'))
+# Tentativas extras para 429/5xx, timeouts e erros de conexão
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '3'))
+# Backoff exponencial: base e teto da espera entre tentativas (segundos)
+AI_BACKOFF_BASE = float(os.getenv('AI_BACKOFF_BASE', '1.0'))
+AI_BACKOFF_MAX = float(os.getenv('AI_BACKOFF_MAX', '20'))
+# Prazo total de uma chamada, somando tentativas e esperas (segundos)
+AI_REQUEST_DEADLINE = float(os.getenv('AI_REQUEST_DEADLINE', '120'))
+# Prazo de uma resposta transmitida (stream_chat); abaixo do timeout do gunicorn (120s)
+AI_STREAM_DEADLINE = float(os.getenv('AI_STREAM_DEADLINE', '90'))
+# Timeouts de cada tentativa (conexão, leitura) em segundos
+AI_CONNECT_TIMEOUT = float(os.getenv('AI_CONNECT_TIMEOUT', '5'))
+AI_READ_TIMEOUT = float(os.getenv('AI_READ_TIMEOUT', '60'))
+# Abre a conexão com a API quando o worker inicia
+AI_WARMUP = os.getenv('AI_WARMUP', 'true').lower() == 'true'
+# Modelos alternativos em ordem de preferência, separados por vírgula:
+# "modelo" (mesmo endpoint) ou "modelo@https://endpoint/chat/completions"
+AI_FALLBACK_MODELS = os.getenv('AI_FALLBACK_MODELS', '')
+# Requisição paralela quando a primeira passa do percentil de latência (padrão:
+# só com modelos alternativos, para não duplicar chamadas ao mesmo modelo limitado)
+AI_HEDGE_ENABLED = os.getenv('AI_HEDGE_ENABLED', 'true' if AI_FALLBACK_MODELS.strip() else 'false').lower() == 'true'
+AI_HEDGE_PERCENTILE = float(os.getenv('AI_HEDGE_PERCENTILE', '0.95'))
+# Espera antes do hedge enquanto não há chamadas suficientes para o percentil (segundos)
+AI_HEDGE_DELAY = float(os.getenv('AI_HEDGE_DELAY', '20'))
+AI_HEDGE_MIN_DELAY = float(os.getenv('AI_HEDGE_MIN_DELAY', '2'))
+AI_HEDGE_MIN_SAMPLES = int(os.getenv('AI_HEDGE_MIN_SAMPLES', '20'))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Limites (ms) dos intervalos do histograma de latência
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000, 20000, 30000, 60000, 120000)
+
+STATS_FILE = CACHE_DIR / "ai_client.json"
+STATS_LOCK_FILE = CACHE_DIR / "ai_client.lock"
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+
+
+class AIStreamInterrupted(Exception):
+    """A transmissão da resposta falhou depois de começar (não pode ser repetida)"""
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=AI_POOL_SIZE, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {API_KEY}',
+        'HTTP-Referer': 'https://pluginforge.studio',
+        'X-Title': 'PluginForge Studio'
+    })
+    return session
+
+
+def get_session():
+    """Sessão do processo (recriada após o fork do gunicorn)"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = _build_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def warm_up():
+    """Abre (e deixa no pool) uma conexão TLS com a API"""
+    start = time.monotonic()
+    try:
+        get_session().head(API_ENDPOINT, timeout=(AI_CONNECT_TIMEOUT, AI_CONNECT_TIMEOUT))
+        print(f"🔌 Conexão com a API de IA aquecida em {int((time.monotonic() - start) * 1000)} ms")
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ Não foi possível aquecer a conexão com a API de IA: {str(e)}")
+        return False
+
+
+def start_warmup():
+    """Aquece a conexão em segundo plano (não atrasa a inicialização do worker)"""
+    if not AI_WARMUP:
+        return None
+    thread = threading.Thread(target=warm_up, daemon=True, name='ai-warmup')
+    thread.start()
+    return thread
+
+
+def parse_retry_after(value):
+    """Segundos indicados pelo header Retry-After (número ou data HTTP), ou None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(retry):
+    """Espera antes da tentativa extra número retry (1, 2, ...): full jitter"""
+    return random.uniform(0, min(AI_BACKOFF_MAX, AI_BACKOFF_BASE * (2 ** (retry - 1))))
+
+
+def backends():
+    """Endpoints e modelos em ordem de preferência: (endpoint, modelo), o principal primeiro"""
+    result = [(API_ENDPOINT, API_MODEL)]
+    for entry in AI_FALLBACK_MODELS.split(','):
+        model, _, endpoint = entry.strip().partition('@')
+        if model and (endpoint or API_ENDPOINT, model) not in result:
+            result.append((endpoint or API_ENDPOINT, model))
+    return result
+
+
+def hedge_delay():
+    """
+    Segundos até o hedge: percentil da latência das chamadas sem streaming
+    (ou AI_HEDGE_DELAY sem histórico suficiente)
+    """
+    stats = _load_stats()
+    calls = stats.get('unstreamed_calls', 0)
+    threshold_ms = None
+    if calls >= AI_HEDGE_MIN_SAMPLES:
+        threshold_ms = _percentile(stats.get('unstreamed_latency_buckets', {}), calls, AI_HEDGE_PERCENTILE)
+    if threshold_ms is None:
+        return AI_HEDGE_DELAY
+    return max(AI_HEDGE_MIN_DELAY, threshold_ms / 1000)
+
+
+class _Cancellation:
+    """
+    Cancelamento de uma tentativa (perdedor do hedge): interrompe as esperas,
+    devolve o slot do limitador e fecha a resposta em andamento na hora.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._permit = None
+        self._response = None
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout):
+        return self._event.wait(timeout)
+
+    def track(self, permit=None, response=None):
+        """Registra o slot/resposta em uso; False se já cancelado (quem chamou libera)"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            if permit is not None:
+                self._permit = permit
+            if response is not None:
+                self._response = response
+            return True
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            permit, response = self._permit, self._response
+        # Antes dos cabeçalhos a requisição não pode ser interrompida, mas o
+        # slot volta ao limitador agora; com a resposta, a conexão é fechada
+        if permit is not None:
+            permit.release()
+        if response is not None:
+            _abort(response)
+
+
+def _abort(response):
+    """Fecha a conexão de uma resposta, mesmo com outra thread lendo o corpo"""
+    # close() sozinho espera a leitura em andamento; o shutdown a interrompe
+    sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+def _send(payload, expires_at, stream=False, endpoint=None, cancelled=None):
+    """
+    Envia a requisição, repetindo 429/5xx e falhas de rede até expires_at.
+
+    Cada tentativa espera a autorização do limitador; o slot só fica com
+    quem chamou quando a resposta é 200 (liberar com permit.release()).
+    Quando cancelled (_Cancellation) é sinalizado, não há novas tentativas;
+    ele guarda o slot e a resposta de cada tentativa para poder encerrá-los.
+
+    Returns:
+        tuple: (resposta 200 ou None, retries feitos, resultado da última tentativa,
+            permit do limitador ou None)
+    """
+    session = get_session()
+    endpoint = endpoint or API_ENDPOINT
+    tokens = ai_limiter.estimate_tokens(payload)
+    retries = 0
+    outcome = 'error'
+
+    while True:
+        if cancelled is not None and cancelled.is_set():
+            return None, retries, 'cancelled', None
+        if expires_at - time.monotonic() <= 0:
+            print(f"❌ Prazo da API de IA esgotado após {retries} retry(s)")
+            return None, retries, 'deadline_exceeded', None
+
+        try:
+            permit = ai_limiter.acquire(expires_at, tokens, cancelled=cancelled)
+        except ai_limiter.AILimiterTimeout as e:
+            print(f"❌ {str(e)}")
+            return None, retries, 'rate_limited', None
+        except ai_limiter.AILimiterCancelled:
+            return None, retries, 'cancelled', None
+        if cancelled is not None and not cancelled.track(permit=permit):
+            # Outra tentativa respondeu enquanto esta esperava o limitador
+            permit.release()
+            return None, retries, 'cancelled', None
+
+        retry_after = None
+        try:
+            remaining = max(0.01, expires_at - time.monotonic())
+            response = session.post(
+                endpoint, json=payload, stream=stream,
+                timeout=(min(AI_CONNECT_TIMEOUT, remaining), min(AI_READ_TIMEOUT, remaining))
+            )
+            if response.status_code == 200:
+                if cancelled is not None and not cancelled.track(response=response):
+                    response.close()
+                    return None, retries, 'cancelled', None
+                held, permit = permit, None
+                return response, retries, 'success', held
+
+            outcome = f'http_{response.status_code}'
+            print(f"❌ Erro da API - Status: {response.status_code}")
+            print(f"❌ Resposta da API: {response.text[:500]}")
+            if response.status_code not in RETRYABLE_STATUS:
+                return None, retries, outcome, None
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if response.status_code == 429:
+                # Os outros workers também param até o provedor liberar
+                ai_limiter.pause(retry_after)
+        except requests.exceptions.Timeout:
+            outcome = 'timeout'
+            print("❌ Timeout: a API de IA não respondeu a tempo")
+        except requests.exceptions.ConnectionError:
+            outcome = 'connection_error'
+            print("❌ Erro de conexão: Não foi possível conectar com a API")
+        finally:
+            if permit is not None:
+                permit.release()
+
+        if retries >= AI_MAX_RETRIES:
+            return None, retries, outcome, None
+        delay = retry_after if retry_after is not None else backoff_delay(retries + 1)
+        if time.monotonic() + delay >= expires_at:
+            print(f"❌ Sem tempo para esperar {delay:.1f}s antes de repetir a chamada à API de IA")
+            return None, retries, 'deadline_exceeded', None
+        retries += 1
+        print(f"🔁 Repetindo chamada à API de IA em {delay:.1f}s (tentativa {retries + 1})")
+        if cancelled is not None:
+            cancelled.wait(delay)
+        else:
+            time.sleep(delay)
+
+
+def _candidates(payload):
+    """Backends de uma requisição (um modelo diferente do padrão no payload vem primeiro)"""
+    candidates = backends()
+    if payload.get('model') and (API_ENDPOINT, payload['model']) not in candidates:
+        candidates.insert(0, (API_ENDPOINT, payload['model']))
+    return candidates
+
+
+def _attempt(payload, expires_at, endpoint, model, cancelled):
+    """Uma chamada completa (com retries) a um backend: (JSON da resposta ou None, retries, resultado)"""
+    # stream=True: o corpo só é lido aqui, e o cancelamento pode fechar a conexão antes
+    response, retries, outcome, permit = _send(
+        dict(payload, model=model), expires_at, stream=True, endpoint=endpoint, cancelled=cancelled
+    )
+    if response is None:
+        return None, retries, outcome
+    result = None
+    used_tokens = None
+    try:
+        result = response.json()
+        used_tokens = (result.get('usage') or {}).get('total_tokens')
+    except Exception as e:
+        result = None
+        if cancelled.is_set():
+            # A conexão foi fechada pelo cancelamento no meio da leitura
+            outcome = 'cancelled'
+        elif isinstance(e, ValueError):
+            print(f"❌ Resposta da API de IA não é JSON ({model})")
+            outcome = 'invalid_response'
+        elif isinstance(e, requests.exceptions.RequestException):
+            print(f"❌ Falha ao ler a resposta da API de IA ({model}): {str(e)}")
+            outcome = 'connection_error'
+        else:
+            raise
+    finally:
+        response.close()
+        permit.release(used_tokens=used_tokens)
+    return result, retries, outcome
+
+
+def post_chat(payload, deadline=None, validate=None):
+    """
+    Envia uma requisição de chat completion com retries, hedge e failover.
+
+    O principal é o modelo de payload; se a resposta demora mais que
+    hedge_delay(), uma segunda requisição vai para o próximo modelo
+    e vale a primeira resposta válida (sem alternativos, não há hedge).
+    Se um modelo falha ou responde algo inválido, o próximo é chamado.
+    O perdedor é cancelado: sem novas tentativas, com o slot do limitador
+    devolvido e a conexão fechada na hora.
+
+    Args:
+        payload (dict): Corpo da requisição (model, messages, ...)
+        deadline (float): Prazo total em segundos (padrão: AI_REQUEST_DEADLINE)
+        validate (callable): Recebe o JSON da resposta; False conta como falha do modelo
+
+    Returns:
+        dict: JSON da resposta ('model' é o modelo que respondeu), ou None se
+            todas as tentativas falharam
+    """
+    start = time.monotonic()
+    expires_at = start + (AI_REQUEST_DEADLINE if deadline is None else deadline)
+    candidates = _candidates(payload)
+
+    results = queue.Queue()
+    cancellations = []
+    attempts = []
+
+    def launch(index):
+        endpoint, model = candidates[index]
+        attempt = len(attempts)
+        attempts.append(index)
+        cancelled = _Cancellation()
+        cancellations.append(cancelled)
+        thread = threading.Thread(
+            target=lambda: results.put((attempt, *_attempt(payload, expires_at, endpoint, model, cancelled))),
+            daemon=True, name=f'ai-call-{attempt}'
+        )
+        thread.start()
+        return attempt
+
+    launch(0)
+    next_index = 1
+    pending = 1
+    # O hedge vai sempre para outro modelo: repetir o mesmo só dobraria o custo
+    hedge_at = start + hedge_delay() if AI_HEDGE_ENABLED and len(candidates) > 1 else None
+    hedge_attempt = None
+    retries = 0
+    failovers = 0
+    outcome = 'error'
+    winner = None
+    try:
+        while pending:
+            now = time.monotonic()
+            timeout = expires_at - now
+            if hedge_at is not None:
+                timeout = min(timeout, hedge_at - now)
+            try:
+                attempt, result, attempt_retries, attempt_outcome = results.get(timeout=max(0.0, timeout))
+            except queue.Empty:
+                if time.monotonic() >= expires_at:
+                    outcome = 'deadline_exceeded'
+                    break
+                # Hedge: o próximo modelo (se o failover já usou todos, não há hedge)
+                hedge_at = None
+                if next_index < len(candidates):
+                    print(f"🪁 Resposta da IA lenta: requisição paralela para {candidates[next_index][1]}")
+                    hedge_attempt = launch(next_index)
+                    next_index += 1
+                    pending += 1
+                continue
+
+            pending -= 1
+            retries += attempt_retries
+            model = candidates[attempts[attempt]][1]
+            if result is not None and validate is not None and not validate(result):
+                print(f"❌ Resposta inválida do modelo {model}")
+                result, attempt_outcome = None, 'invalid_response'
+            if result is not None:
+                winner = (attempt, model, result)
+                outcome = 'success'
+                break
+
+            outcome = attempt_outcome
+            if next_index < len(candidates) and time.monotonic() < expires_at:
+                print(f"🔀 Failover da API de IA: {model} -> {candidates[next_index][1]}")
+                launch(next_index)
+                next_index += 1
+                pending += 1
+                failovers += 1
+    finally:
+        # Perdedores do hedge: sem novas tentativas, slot devolvido e conexão fechada
+        for attempt, cancelled in enumerate(cancellations):
+            if winner is None or attempt != winner[0]:
+                cancelled.cancel()
+
+    if winner is None:
+        _record(outcome, start, retries, hedged=hedge_attempt is not None, failovers=failovers)
+        return None
+    attempt, model, result = winner
+    # Modelo que respondeu (pode ser um alternativo, por hedge ou failover)
+    result['model'] = model
+    _record(outcome, start, retries, hedged=hedge_attempt is not None, failovers=failovers,
+            model=model, hedge_won=attempt == hedge_attempt)
+    return result
+
+
+def _stream_deltas(response):
+    """Textos dos eventos SSE ('data: {...}') de uma resposta em streaming"""
+    response.encoding = 'utf-8'
+    # chunk_size=None entrega cada chunk HTTP assim que chega (sem esperar encher um buffer)
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue  # Linhas vazias e comentários (": processing")
+        data = line[5:].strip()
+        if data == '[DONE]':
+            return
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            continue
+        if chunk.get('error'):
+            raise AIStreamInterrupted(f"Erro da API durante a transmissão: {chunk['error']}")
+        choices = chunk.get('choices') or [{}]
+        delta = (choices[0].get('delta') or {}).get('content')
+        if delta:
+            yield delta
+
+
+def stream_chat(payload, deadline=None):
+    """
+    Envia uma requisição de chat completion com 'stream': true.
+
+    Os retries e o failover para os modelos alternativos só acontecem antes
+    do primeiro byte da resposta; uma falha depois disso interrompe a
+    transmissão. Não há hedge (o texto já entregue não pode ser trocado).
+
+    Args:
+        payload (dict): Corpo da requisição (model, messages, ...)
+        deadline (float): Prazo total em segundos (padrão: AI_STREAM_DEADLINE)
+
+    Yields:
+        str: Trechos do texto da resposta, na ordem em que chegam
+
+    Raises:
+        AIStreamInterrupted: A conexão ou a API falhou no meio da resposta
+    """
+    start = time.monotonic()
+    expires_at = start + (AI_STREAM_DEADLINE if deadline is None else deadline)
+    response = None
+    retries = 0
+    failovers = 0
+    for index, (endpoint, model) in enumerate(_candidates(payload)):
+        if index:
+            if time.monotonic() >= expires_at:
+                break
+            print(f"🔀 Failover da API de IA: {model}")
+            failovers += 1
+        response, attempt_retries, outcome, permit = _send(
+            dict(payload, model=model, stream=True), expires_at, stream=True, endpoint=endpoint
+        )
+        retries += attempt_retries
+        if response is not None:
+            break
+    if response is None:
+        _record(outcome, start, retries, streamed=True, failovers=failovers)
+        return
+
+    first_token_ms = None
+    streamed_characters = 0
+    outcome = 'cancelled'
+    try:
+        for delta in _stream_deltas(response):
+            if first_token_ms is None:
+                first_token_ms = int((time.monotonic() - start) * 1000)
+            streamed_characters += len(delta)
+            yield delta
+            if time.monotonic() > expires_at:
+                raise AIStreamInterrupted('Prazo da API de IA esgotado durante a transmissão')
+        outcome = 'success'
+    except requests.exceptions.RequestException as e:
+        outcome = 'stream_interrupted'
+        raise AIStreamInterrupted(f"Transmissão da API de IA interrompida: {str(e)}") from e
+    except AIStreamInterrupted:
+        outcome = 'stream_interrupted'
+        raise
+    finally:
+        response.close()
+        # Respostas em streaming não trazem 'usage': estima pelo texto recebido
+        permit.release(used_tokens=ai_limiter.estimate_tokens(payload) + streamed_characters // 4)
+        _record(outcome, start, retries, streamed=True, first_token_ms=first_token_ms,
+                failovers=failovers, model=model if outcome == 'success' else None)
+
+
+def _bucket(elapsed_ms):
+    return next((str(limit) for limit in LATENCY_BUCKETS_MS if elapsed_ms <= limit), 'inf')
+
+
+def _record(outcome, start, retries, streamed=False, first_token_ms=None,
+            hedged=False, hedge_won=False, failovers=0, model=None):
+    """Soma a chamada às métricas (compartilhadas entre workers)"""
+    elapsed_ms = int((time.monotonic() - start) * 1000)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with _stats_lock, open(STATS_LOCK_FILE, 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                stats = _load_stats()
+                stats['calls'] = stats.get('calls', 0) + 1
+                stats['retries'] = stats.get('retries', 0) + retries
+                stats['latency_ms_total'] = stats.get('latency_ms_total', 0) + elapsed_ms
+                outcomes = stats.setdefault('outcomes', {})
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                buckets = stats.setdefault('latency_buckets', {})
+                buckets[_bucket(elapsed_ms)] = buckets.get(_bucket(elapsed_ms), 0) + 1
+                if hedged:
+                    stats['hedges'] = stats.get('hedges', 0) + 1
+                if hedge_won:
+                    stats['hedge_wins'] = stats.get('hedge_wins', 0) + 1
+                stats['failovers'] = stats.get('failovers', 0) + failovers
+                if model:
+                    model_wins = stats.setdefault('model_wins', {})
+                    model_wins[model] = model_wins.get(model, 0) + 1
+                if streamed:
+                    stats['streamed_calls'] = stats.get('streamed_calls', 0) + 1
+                else:
+                    # Histograma só das chamadas sem streaming (base do hedge_delay)
+                    stats['unstreamed_calls'] = stats.get('unstreamed_calls', 0) + 1
+                    unstreamed_buckets = stats.setdefault('unstreamed_latency_buckets', {})
+                    unstreamed_buckets[_bucket(elapsed_ms)] = unstreamed_buckets.get(_bucket(elapsed_ms), 0) + 1
+                if first_token_ms is not None:
+                    stats['first_tokens'] = stats.get('first_tokens', 0) + 1
+                    stats['first_token_ms_total'] = stats.get('first_token_ms_total', 0) + first_token_ms
+                    first_token_buckets = stats.setdefault('first_token_buckets', {})
+                    first_token_buckets[_bucket(first_token_ms)] = first_token_buckets.get(_bucket(first_token_ms), 0) + 1
+                tmp_file = STATS_FILE.with_suffix(f'.{os.getpid()}.tmp')
+                tmp_file.write_text(json.dumps(stats), encoding='utf-8')
+                os.replace(tmp_file, STATS_FILE)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar as métricas da API de IA: {str(e)}")
+
+
+def _load_stats():
+    try:
+        return json.loads(STATS_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _percentile(buckets, calls, fraction):
+    """Limite superior (ms) do intervalo do histograma que contém o percentil (None acima do último)"""
+    if not calls:
+        return None
+    seen = 0
+    for limit in [str(limit) for limit in LATENCY_BUCKETS_MS] + ['inf']:
+        seen += buckets.get(limit, 0)
+        if seen >= calls * fraction:
+            return None if limit == 'inf' else int(limit)
+    return None
+
+
+def get_stats():
+    """Chamadas, retries, resultados, latência e tempo até o primeiro token (média e percentis aproximados)"""
+    stats = _load_stats()
+    calls = stats.get('calls', 0)
+    buckets = stats.get('latency_buckets', {})
+    first_tokens = stats.get('first_tokens', 0)
+    first_token_buckets = stats.get('first_token_buckets', {})
+    return {
+        'endpoint': API_ENDPOINT,
+        'model': API_MODEL,
+        'backends': [{'endpoint': endpoint, 'model': model} for endpoint, model in backends()],
+        'hedge_enabled': AI_HEDGE_ENABLED,
+        'hedge_delay_seconds': round(hedge_delay(), 2) if AI_HEDGE_ENABLED else None,
+        'pool_size': AI_POOL_SIZE,
+        'max_retries': AI_MAX_RETRIES,
+        'deadline_seconds': AI_REQUEST_DEADLINE,
+        'calls': calls,
+        'retries': stats.get('retries', 0),
+        'outcomes': stats.get('outcomes', {}),
+        'hedges': stats.get('hedges', 0),
+        'hedge_wins': stats.get('hedge_wins', 0),
+        'failovers': stats.get('failovers', 0),
+        'model_wins': stats.get('model_wins', {}),
+        'latency_ms_avg': int(stats.get('latency_ms_total', 0) / calls) if calls else None,
+        'latency_ms_p50': _percentile(buckets, calls, 0.50),
+        'latency_ms_p95': _percentile(buckets, calls, 0.95),
+        'latency_ms_p99': _percentile(buckets, calls, 0.99),
+        'latency_buckets': buckets,
+        'streamed_calls': stats.get('streamed_calls', 0),
+        'first_token_ms_avg': int(stats.get('first_token_ms_total', 0) / first_tokens) if first_tokens else None,
+        'first_token_ms_p50': _percentile(first_token_buckets, first_tokens, 0.50),
+        'first_token_ms_p95': _percentile(first_token_buckets, first_tokens, 0.95),
+        'limiter': ai_limiter.get_status(),
+    }
@@ -0,0 +1,343 @@
+"""
+Limitador de chamadas à API de IA do PluginForge Studio
+Coordena todos os workers antes de cada requisição ao provedor: requisições
+simultâneas (slots com file lock), requisições por segundo e, opcionalmente,
+tokens por minuto (token buckets em um arquivo de estado compartilhado).
+Quem excede os limites espera na fila (ordem de chegada) até o prazo da
+chamada. Um 429 do provedor pausa as chamadas de todos os workers.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from storage import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+AI_LIMITER_ENABLED = os.getenv('AI_LIMITER_ENABLED', 'true').lower() == 'true'
+# Requisições simultâneas à API somando todos os workers
+AI_LIMIT_CONCURRENCY = max(1, int(os.getenv('AI_LIMIT_CONCURRENCY', '4')))
+# Requisições por segundo (média) e rajada máxima
+AI_LIMIT_RPS = float(os.getenv('AI_LIMIT_RPS', '2'))
+AI_LIMIT_BURST = max(1.0, float(os.getenv('AI_LIMIT_BURST', '4')))
+# Tokens por minuto (prompt + resposta); 0 desativa o limite
+AI_LIMIT_TPM = int(os.getenv('AI_LIMIT_TPM', '0'))
+# Pausa usada quando o provedor responde 429 sem Retry-After (segundos)
+AI_LIMIT_429_PAUSE = float(os.getenv('AI_LIMIT_429_PAUSE', '2'))
+
+LIMITER_DIR = CACHE_DIR / "ai_limiter"
+QUEUE_DIR = LIMITER_DIR / "queue"
+STATE_FILE = LIMITER_DIR / "state.json"
+POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.25
+
+_state_thread_lock = threading.Lock()
+_local_semaphore = threading.BoundedSemaphore(AI_LIMIT_CONCURRENCY)
+
+
+class AILimiterTimeout(Exception):
+    """Prazo da chamada esgotado esperando o limitador"""
+
+
+class AILimiterCancelled(Exception):
+    """A chamada foi cancelada enquanto esperava o limitador (outra tentativa já respondeu)"""
+
+
+def estimate_tokens(payload):
+    """Estimativa dos tokens do prompt (~4 caracteres por token)"""
+    characters = sum(len(message.get('content') or '') for message in payload.get('messages', []))
+    return max(1, characters // 4)
+
+
+def _pid_alive(pid):
+    """Verifica se o processo dono de um ticket ainda existe"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+@contextmanager
+def _state_lock():
+    """Lock exclusivo para ler/alterar o estado e a fila"""
+    LIMITER_DIR.mkdir(parents=True, exist_ok=True)
+    with _state_thread_lock, open(LIMITER_DIR / "state.lock", 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _load_state():
+    try:
+        return json.loads(STATE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state):
+    tmp_file = STATE_FILE.with_suffix(f'.{os.getpid()}.tmp')
+    tmp_file.write_text(json.dumps(state), encoding='utf-8')
+    os.replace(tmp_file, STATE_FILE)
+
+
+def _refill(state, now):
+    """Reabastece os buckets pelo tempo decorrido desde a última atualização"""
+    elapsed = max(0.0, now - state.get('updated', now))
+    state['rps_tokens'] = min(AI_LIMIT_BURST, state.get('rps_tokens', AI_LIMIT_BURST) + elapsed * AI_LIMIT_RPS)
+    if AI_LIMIT_TPM:
+        state['tpm_tokens'] = min(AI_LIMIT_TPM, state.get('tpm_tokens', AI_LIMIT_TPM) + elapsed * AI_LIMIT_TPM / 60)
+    state['updated'] = now
+
+
+def _try_take(state, now, tokens):
+    """
+    Consome uma requisição (e os tokens estimados) dos buckets.
+
+    Returns:
+        float: 0 se conseguiu, ou segundos estimados até haver capacidade
+    """
+    paused_for = state.get('paused_until', 0) - now
+    if paused_for > 0:
+        return paused_for
+
+    wait = 0.0
+    if state['rps_tokens'] < 1:
+        wait = (1 - state['rps_tokens']) / AI_LIMIT_RPS if AI_LIMIT_RPS > 0 else MAX_POLL_INTERVAL
+    if AI_LIMIT_TPM:
+        # Um prompt maior que o limite inteiro espera o bucket encher
+        needed = min(tokens, AI_LIMIT_TPM)
+        if state['tpm_tokens'] < needed:
+            wait = max(wait, (needed - state['tpm_tokens']) * 60 / AI_LIMIT_TPM)
+    if wait > 0:
+        return wait
+
+    state['rps_tokens'] -= 1
+    if AI_LIMIT_TPM:
+        state['tpm_tokens'] -= tokens
+    return 0.0
+
+
+def _bump(state, counter, amount=1):
+    state[counter] = state.get(counter, 0) + amount
+
+
+def _tickets():
+    """Tickets na fila em ordem de chegada (remove os de processos mortos)"""
+    tickets = []
+    for ticket in sorted(QUEUE_DIR.glob('*.ticket')):
+        try:
+            pid = int(ticket.stem.split('-')[1])
+        except (IndexError, ValueError):
+            pid = None
+        if pid is not None and not _pid_alive(pid):
+            ticket.unlink(missing_ok=True)
+            continue
+        tickets.append(ticket)
+    return tickets
+
+
+def _try_acquire_slot():
+    """Tenta ocupar um slot de requisição livre; retorna o arquivo aberto (lock) ou None"""
+    if fcntl is None:
+        return _local_semaphore if _local_semaphore.acquire(blocking=False) else None
+    for index in range(AI_LIMIT_CONCURRENCY):
+        slot = open(LIMITER_DIR / f"slot-{index}.lock", 'w')
+        try:
+            fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return slot
+        except BlockingIOError:
+            slot.close()
+    return None
+
+
+def _release_slot(slot):
+    if slot is _local_semaphore:
+        _local_semaphore.release()
+    elif slot is not None:
+        fcntl.flock(slot, fcntl.LOCK_UN)
+        slot.close()
+
+
+def _busy_slots():
+    """Quantos slots estão ocupados neste momento"""
+    if fcntl is None:
+        return AI_LIMIT_CONCURRENCY - _local_semaphore._value
+    busy = 0
+    for index in range(AI_LIMIT_CONCURRENCY):
+        with open(LIMITER_DIR / f"slot-{index}.lock", 'w') as slot:
+            try:
+                fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(slot, fcntl.LOCK_UN)
+            except BlockingIOError:
+                busy += 1
+    return busy
+
+
+class Permit:
+    """Autorização para uma requisição: mantém o slot até release()"""
+
+    def __init__(self, slot=None, reserved_tokens=0):
+        self._slot = slot
+        self._reserved_tokens = reserved_tokens
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self, used_tokens=None):
+        """
+        Libera o slot (pode ser chamado de outra thread; só a primeira chamada vale).
+
+        Args:
+            used_tokens (int): Tokens realmente consumidos (prompt + resposta),
+                para corrigir a estimativa reservada no limite de tokens por minuto
+        """
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        try:
+            if used_tokens is not None and self._slot is not None:
+                with _state_lock():
+                    state = _load_state()
+                    _refill(state, time.time())
+                    if AI_LIMIT_TPM:
+                        state['tpm_tokens'] -= used_tokens - self._reserved_tokens
+                    _bump(state, 'tokens_used', used_tokens)
+                    _save_state(state)
+        except OSError as e:
+            print(f"⚠️ Não foi possível atualizar o limitador da API de IA: {str(e)}")
+        finally:
+            _release_slot(self._slot)
+
+
+def acquire(expires_at, tokens=0, cancelled=None):
+    """
+    Espera (na fila, em ordem de chegada) um slot e capacidade nos buckets.
+
+    Args:
+        expires_at (float): Prazo da chamada (time.monotonic())
+        tokens (int): Tokens estimados do prompt (limite por minuto)
+        cancelled (threading.Event): Interrompe a espera quando sinalizado
+
+    Returns:
+        Permit: Liberar com release() quando a resposta terminar
+
+    Raises:
+        AILimiterTimeout: se o prazo acabar antes de a requisição ser autorizada
+        AILimiterCancelled: se cancelled for sinalizado durante a espera
+    """
+    if not AI_LIMITER_ENABLED:
+        return Permit()
+
+    QUEUE_DIR.mkdir(parents=True, exist_ok=True)
+    ticket = QUEUE_DIR / f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}.ticket"
+    ticket.touch()
+
+    start = time.monotonic()
+    slot = None
+    waited = False
+    try:
+        while True:
+            wait = POLL_INTERVAL
+            with _state_lock():
+                if slot is None:
+                    tickets = _tickets()
+                    position = tickets.index(ticket) if ticket in tickets else 0
+                    # Só os primeiros da fila disputam os slots (ordem de chegada)
+                    if position < AI_LIMIT_CONCURRENCY:
+                        slot = _try_acquire_slot()
+                        if slot is not None:
+                            ticket.unlink(missing_ok=True)
+                if slot is not None:
+                    state = _load_state()
+                    now = time.time()
+                    _refill(state, now)
+                    wait = _try_take(state, now, tokens)
+                    if wait == 0:
+                        _bump(state, 'granted')
+                        if waited:
+                            _bump(state, 'queued')
+                            _bump(state, 'wait_ms_total', int((time.monotonic() - start) * 1000))
+                        _save_state(state)
+                        permit, slot = Permit(slot, tokens), None
+                        return permit
+
+            if time.monotonic() + min(wait, POLL_INTERVAL) >= expires_at:
+                with _state_lock():
+                    state = _load_state()
+                    _bump(state, 'timeouts')
+                    _save_state(state)
+                raise AILimiterTimeout('Prazo da chamada à API de IA esgotado na fila do limitador')
+            if not waited:
+                waited = True
+                print("⏳ Aguardando o limitador da API de IA")
+            delay = max(POLL_INTERVAL, min(wait, MAX_POLL_INTERVAL))
+            if cancelled is None:
+                time.sleep(delay)
+            elif cancelled.wait(delay):
+                raise AILimiterCancelled('Chamada à API de IA cancelada na fila do limitador')
+    finally:
+        ticket.unlink(missing_ok=True)
+        _release_slot(slot)
+
+
+def pause(seconds=None):
+    """Suspende as chamadas de todos os workers (o provedor respondeu 429)"""
+    if not AI_LIMITER_ENABLED:
+        return
+    seconds = AI_LIMIT_429_PAUSE if seconds is None else seconds
+    try:
+        with _state_lock():
+            state = _load_state()
+            state['paused_until'] = max(state.get('paused_until', 0), time.time() + seconds)
+            _bump(state, 'provider_429')
+            _save_state(state)
+    except OSError as e:
+        print(f"⚠️ Não foi possível atualizar o limitador da API de IA: {str(e)}")
+
+
+def get_status():
+    """Limites, uso atual (slots, fila, buckets) e contadores do limitador"""
+    if not AI_LIMITER_ENABLED:
+        return {'enabled': False}
+
+    QUEUE_DIR.mkdir(parents=True, exist_ok=True)
+    with _state_lock():
+        state = _load_state()
+        now = time.time()
+        _refill(state, now)
+        waiting = len(_tickets())
+        busy = _busy_slots()
+
+    queued = state.get('queued', 0)
+    return {
+        'enabled': True,
+        'concurrency': AI_LIMIT_CONCURRENCY,
+        'busy': busy,
+        'waiting': waiting,
+        'rps': AI_LIMIT_RPS,
+        'burst': AI_LIMIT_BURST,
+        'rps_tokens': round(state['rps_tokens'], 2),
+        'tpm': AI_LIMIT_TPM or None,
+        'tpm_tokens': int(state['tpm_tokens']) if AI_LIMIT_TPM else None,
+        'paused_seconds': round(max(0.0, state.get('paused_until', 0) - now), 2),
+        'granted': state.get('granted', 0),
+        'queued': queued,
+        'wait_ms_avg': int(state.get('wait_ms_total', 0) / queued) if queued else None,
+        'timeouts': state.get('timeouts', 0),
+        'provider_429': state.get('provider_429', 0),
+        'tokens_used': state.get('tokens_used', 0),
+    }
@@ -9,25 +9,48 @@
 # - Sistema de upgrades
 # ========================================
 
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, session, flash, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
+from functools import wraps
 import os
 import shutil
 import subprocess
-import uuid
 import json
+import time
+import unicodedata
+from urllib.parse import quote as url_quote
 
 # Carregar variáveis de ambiente
 load_dotenv()
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, UTC
 from pathlib import Path
 
 # Importa os modelos
-from models import db, User, Plugin, Chat, Message, PluginVersion, init_db
+from models import db, User, Plugin, Chat, Message, PluginVersion, Job, BuildLog, init_db
+
+# Sistema de build
+import ai_cache
+import ai_client
+import artifact_store
+import build_cache
+import build_logs
+import build_metrics
+import compile_scheduler
+import compile_server
+import exports
+import fast_build
+import jobs
+import maven_repo
+import symbol_index
+import workspace
+import workspace_gc
+from storage import ARTIFACTS_DIR, ensure_dirs, plugin_workspace_dir
+import toolchain
+from toolchain import find_maven_executable, get_api_classpath, resolve_api_classpath
 
 # Inicializa a aplicação Flask
 app = Flask(__name__)
@@ -64,14 +87,38 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Faça login para acessar esta página.'
 
-# API Configuration (use environment variable in production)
-API_KEY = os.getenv('OPENROUTER_API_KEY', "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")
-API_ENDPOINT = "https://openrouter.ai/api/v1/chat/completions"
-API_MODEL = "kwaipilot/kat-coder-pro:free"  # Modelo válido da OpenRouter
-
-# Diretório base para projetos temporários
-WORKSPACE_DIR = Path(__file__).parent / "workspace"
-WORKSPACE_DIR.mkdir(exist_ok=True)
+# Usuários com acesso às rotas de administração (vazio: rotas /api/admin desativadas)
+ADMIN_USERNAMES = {name.strip() for name in os.getenv('ADMIN_USERNAMES', '').split(',') if name.strip()}
+
+# Entrega dos JARs: '' (pelo Flask), 'x-accel' (nginx) ou 'x-sendfile' (Apache/lighttpd)
+DOWNLOAD_OFFLOAD = os.getenv('DOWNLOAD_OFFLOAD', '').strip().lower()
+# Location interna do nginx apontando para o diretório de artefatos
+DOWNLOAD_ACCEL_PREFIX = os.getenv('DOWNLOAD_ACCEL_PREFIX', '/protected-artifacts/')
+
+# Diretório base para projetos temporários (definido em storage.py)
+ensure_dirs()
+
+# Lista de possíveis caminhos para o Maven (ordenado por preferência)
+MAVEN_COMMANDS = [
+    # Windows - comandos que funcionam na prática
+    'mvn.cmd',                                # CMD extension (Windows)
+    'mvn',                                    # PATH padrão
+    'C:\\apache-maven-3.9.11\\bin\\mvn.cmd', # Apache Maven 3.9.11 (Windows)
+    # macOS paths
+    '/usr/local/bin/mvn',                     # Homebrew (macOS)
+    '/opt/homebrew/bin/mvn',                  # Homebrew ARM (macOS)
+    # Linux paths
+    '/usr/bin/mvn',                           # APT (Linux)
+    '/opt/maven/bin/mvn',                     # Maven manual (Linux)
+    '/snap/bin/mvn',                          # Snap (Linux)
+    str(Path.home() / 'maven/bin/mvn'),       # Maven instalado em home
+    # Windows Program Files (menos comum)
+    'C:\\Program Files\\Apache\\Maven\\bin\\mvn.cmd',
+    'C:\\Program Files\\Maven\\bin\\mvn.cmd',
+    # Alternative Windows paths
+    str(Path('C:/Program Files/Apache/Maven/bin/mvn.cmd')),
+    str(Path('C:/Program Files/Maven/bin/mvn.cmd')),
+]
 
 # ========================================
 # CUSTOM JINJA2 FILTERS
@@ -100,6 +147,19 @@ def load_user(user_id):
         # Fallback para método antigo (SQLAlchemy 1.x)
         return User.query.get(user_id)
 
+def admin_required(f):
+    """Restringe a rota aos usuários administradores (ADMIN_USERNAMES)"""
+    @wraps(f)
+    @login_required
+    def decorated(*args, **kwargs):
+        if current_user.username not in ADMIN_USERNAMES:
+            return jsonify({
+                'success': False,
+                'error': 'Acesso restrito a administradores.'
+            }), 403
+        return f(*args, **kwargs)
+    return decorated
+
 # ========================================
 # ROTAS DE AUTENTICAÇÃO
 # ========================================
@@ -232,7 +292,11 @@ def plugin_detail(plugin_id):
     
     messages = Message.query.filter_by(chat_id=chat.id).order_by(Message.created_at.asc()).all()
     
-    return render_template('plugin_chat.html', plugin=plugin, chat=chat, messages=messages, current_plugin_id=plugin_id)
+    # Diagnósticos do último build para mostrar os erros sem carregar o log
+    last_build = build_logs.latest_build(plugin.id) if plugin.status == 'error' else None
+    
+    return render_template('plugin_chat.html', plugin=plugin, chat=chat, messages=messages,
+                           last_build=last_build, current_plugin_id=plugin_id)
 
 # ========================================
 # FUNÇÕES DE VALIDAÇÃO
@@ -313,6 +377,32 @@ def validate_java_syntax(java_code):
     
     return errors
 
+def compile_queue_full_response(error):
+    """Resposta rápida quando a fila de compilação está cheia (503 + Retry-After)"""
+    response = jsonify({
+        'success': False,
+        'error': str(error),
+        'retry_after': error.retry_after
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def job_accepted_response(job, coalesced=False):
+    """
+    Resposta de um job aceito (202): o cliente acompanha em status_url.
+    
+    coalesced indica um pedido repetido que foi agrupado em um job já
+    existente (200 se esse job já terminou).
+    """
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': f'/api/jobs/{job.id}',
+        'coalesced': coalesced,
+        'job': jobs.serialize(job)
+    }), 202 if job.status in ('queued', 'running') else 200
+
 # ========================================
 # ROTAS DE API
 # ========================================
@@ -320,7 +410,7 @@ def validate_java_syntax(java_code):
 @app.route('/api/generate', methods=['POST'])
 @login_required
 def generate_plugin():
-    """Gerar novo plugin com IA"""
+    """Gerar novo plugin com IA (assíncrono: retorna o ID do job)"""
     try:
         print("🔄 Iniciando geração de plugin...")
         data = request.get_json()
@@ -351,11 +441,67 @@ def generate_plugin():
                 'success': False,
                 'error': 'Descrição do plugin não pode estar vazia.'
             }), 400
-
-        # Construir prompt para IA
-        full_description = f"{description}\n\nFuncionalidades: {features}" if features else description
         
-        prompt = f"""Você é o PluginCraft AI, especialista em desenvolvimento de plugins para Minecraft Spigot.
+        params = {
+            'plugin_name': plugin_name,
+            'mc_version': mc_version,
+            'description': description,
+            'plugin_version': plugin_version,
+            'features': features
+        }
+        
+        # Duplo clique/reenvio: o pedido igual em andamento (ou com o mesmo Idempotency-Key) é reaproveitado
+        dedup_key = jobs.request_key(current_user.id, 'generate', params)
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()[:100] or None
+        try:
+            job = jobs.find_job(current_user.id, 'generate', dedup_key, idempotency_key)
+        except jobs.IdempotencyKeyConflict as e:
+            return jsonify({'success': False, 'error': str(e)}), 422
+        if job is not None:
+            print(f"🔁 Pedido agrupado no job de geração {job.id}")
+            return job_accepted_response(job, coalesced=True)
+        
+        # Recusa rápido se a fila de compilação estiver cheia (antes de chamar a IA)
+        try:
+            compile_scheduler.check_admission()
+        except compile_scheduler.CompileQueueFull as e:
+            print(f"❌ {str(e)}")
+            return compile_queue_full_response(e)
+        
+        # O pipeline (IA + arquivos + compilação) roda em segundo plano
+        try:
+            job, created = jobs.create_or_join_job(current_user.id, 'generate', dedup_key, idempotency_key)
+        except jobs.IdempotencyKeyConflict as e:
+            return jsonify({'success': False, 'error': str(e)}), 422
+        if not created:
+            print(f"🔁 Pedido agrupado no job de geração {job.id}")
+            return job_accepted_response(job, coalesced=True)
+        jobs.submit(app, job.id, run_generate_pipeline, current_user.id, current_user.username, params)
+        print(f"📨 Job de geração criado: {job.id}")
+        
+        return job_accepted_response(job)
+
+    except Exception as e:
+        print(f"❌ Erro crítico: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Erro interno: {str(e)}'
+        }), 500
+
+def run_generate_pipeline(job, user_id, username, params):
+    """Pipeline de geração de plugin (executado em segundo plano pelo job)"""
+    plugin_name = params['plugin_name']
+    mc_version = params['mc_version']
+    description = params['description']
+    plugin_version = params['plugin_version']
+    features = params['features']
+    
+    # Construir prompt para IA
+    full_description = f"{description}\n\nFuncionalidades: {features}" if features else description
+    
+    prompt = f"""Você é o PluginCraft AI, especialista em desenvolvimento de plugins para Minecraft Spigot.
 
 Tarefa: Gere um plugin completo para Minecraft {mc_version} com base na seguinte descrição:
 
@@ -398,39 +544,42 @@ FORMATO OBRIGATÓRIO (retorne APENAS isto, nada mais):
 
 IMPORTANTE: Retorne apenas o JSON acima, sem texto adicional, sem formatação markdown."""
 
-        print(f"📡 Gerando plugin '{plugin_name}' para usuário {current_user.username}...")
-        
-        # Chamar API
-        print("🤖 Chamando AI API...")
-        ai_response = call_ai_api(prompt)
-        
-        if not ai_response:
-            print("❌ API não retornou resposta")
-            return jsonify({
-                'success': False,
-                'error': 'Falha ao gerar código com a IA. Verifique sua API key.'
-            }), 500
-        
-        print("✅ Resposta da IA recebida")
+    print(f"📡 Gerando plugin '{plugin_name}' para usuário {username}...")
+    
+    # Chamar API
+    print("🤖 Chamando AI API...")
+    job.update('calling_ai', 10)
+    cache_key = ai_cache_key(prompt, user_id)
+    ai_response, ai_model = call_ai_api(prompt, cache_key=cache_key, expect_json=True)
+    
+    if not ai_response:
+        print("❌ API não retornou resposta")
+        return {
+            'success': False,
+            'error': 'Falha ao gerar código com a IA. Verifique sua API key.'
+        }
+    
+    print("✅ Resposta da IA recebida")
 
-        # Parse do JSON
-        try:
-            print("📋 Fazendo parse do JSON...")
-            code_data = json.loads(ai_response)
-            main_class_code = code_data.get('main_class', '')
-            plugin_yml_code = code_data.get('plugin_yml', '')
-            config_yml_code = code_data.get('config_yml', '')
-            package_name = code_data.get('package_name', f'com.pluginforge.{plugin_name.lower()}')
-            
-            print(f"📄 Código principal: {len(main_class_code)} caracteres")
-            print(f"📄 plugin.yml: {len(plugin_yml_code)} caracteres")
-            print(f"📄 config.yml: {len(config_yml_code)} caracteres")
-            print(f"📄 Package: {package_name}")
-            
-            # Se a IA não gerou config.yml, criar um padrão básico
-            if not config_yml_code:
-                print("📝 Gerando config.yml padrão...")
-                config_yml_code = f"""# Configuração do plugin {plugin_name}
+    # Parse do JSON
+    try:
+        print("📋 Fazendo parse do JSON...")
+        job.update('parsing', 40)
+        code_data = json.loads(ai_response)
+        main_class_code = code_data.get('main_class', '')
+        plugin_yml_code = code_data.get('plugin_yml', '')
+        config_yml_code = code_data.get('config_yml', '')
+        package_name = code_data.get('package_name', f'com.pluginforge.{plugin_name.lower()}')
+        
+        print(f"📄 Código principal: {len(main_class_code)} caracteres")
+        print(f"📄 plugin.yml: {len(plugin_yml_code)} caracteres")
+        print(f"📄 config.yml: {len(config_yml_code)} caracteres")
+        print(f"📄 Package: {package_name}")
+        
+        # Se a IA não gerou config.yml, criar um padrão básico
+        if not config_yml_code:
+            print("📝 Gerando config.yml padrão...")
+            config_yml_code = f"""# Configuração do plugin {plugin_name}
 # Gerado automaticamente pelo PluginForge Studio
 
 # Mensagens do plugin
@@ -443,194 +592,150 @@ settings:
   debug: false
   language: 'pt_BR'
 """
-        except json.JSONDecodeError as e:
-            print(f"❌ Erro no parse JSON: {e}")
-            return jsonify({
-                'success': False,
-                'error': f'A IA não retornou um formato válido. Detalhes: {str(e)}'
-            }), 500
-
-        # Criar plugin no banco
-        print("💾 Criando plugin no banco de dados...")
-        plugin = Plugin(
-            user_id=current_user.id,
-            name=plugin_name,
-            version=plugin_version,
-            minecraft_version=mc_version,
-            description=description,
-            plugin_author=current_user.username,
-            features=features,
-            status='generating'
-        )
-        db.session.add(plugin)
-        db.session.commit()
-        print(f"✅ Plugin criado com ID: {plugin.id}")
-
-        # Criar chat para o plugin
-        print("💬 Criando chat para o plugin...")
-        chat = Chat(
-            plugin_id=plugin.id,
-            title=f'Geração de {plugin_name}'
-        )
-        db.session.add(chat)
-        db.session.commit()
-        print(f"✅ Chat criado com ID: {chat.id}")
-
-        # Adicionar mensagem do usuário no chat
-        print("👤 Adicionando mensagem do usuário...")
-        user_message = Message(
-            chat_id=chat.id,
-            role='user',
-            content=f"Gerar plugin: {plugin_name}\n\nDescrição: {full_description}"
-        )
-        db.session.add(user_message)
-        db.session.commit()
+    except json.JSONDecodeError as e:
+        print(f"❌ Erro no parse JSON: {e}")
+        return {
+            'success': False,
+            'error': f'A IA não retornou um formato válido. Detalhes: {str(e)}'
+        }
 
-        # Adicionar resposta da IA no chat
-        print("🤖 Adicionando resposta da IA...")
-        ai_message = Message(
-            chat_id=chat.id,
-            role='assistant',
-            content=f'Plugin gerado com sucesso!\n\nArquivos criados:\n- {plugin_name}.java\n- plugin.yml\n- config.yml',
-            content_type='plugin_generation',
-            generated_code=main_class_code,
-            plugin_yml=plugin_yml_code,
-            package_name=package_name
-        )
-        db.session.add(ai_message)
+    # Criar plugin no banco
+    print("💾 Criando plugin no banco de dados...")
+    plugin = Plugin(
+        user_id=user_id,
+        name=plugin_name,
+        version=plugin_version,
+        minecraft_version=mc_version,
+        description=description,
+        plugin_author=username,
+        features=features,
+        status='generating'
+    )
+    db.session.add(plugin)
+    db.session.commit()
+    print(f"✅ Plugin criado com ID: {plugin.id}")
+    job.set_plugin(plugin.id)
+
+    # Criar chat para o plugin
+    print("💬 Criando chat para o plugin...")
+    chat = Chat(
+        plugin_id=plugin.id,
+        title=f'Geração de {plugin_name}'
+    )
+    db.session.add(chat)
+    db.session.commit()
+    print(f"✅ Chat criado com ID: {chat.id}")
+
+    # Adicionar mensagem do usuário no chat
+    print("👤 Adicionando mensagem do usuário...")
+    user_message = Message(
+        chat_id=chat.id,
+        role='user',
+        content=f"Gerar plugin: {plugin_name}\n\nDescrição: {full_description}"
+    )
+    db.session.add(user_message)
+    db.session.commit()
+
+    # Adicionar resposta da IA no chat
+    print("🤖 Adicionando resposta da IA...")
+    ai_message = Message(
+        chat_id=chat.id,
+        role='assistant',
+        content=f'Plugin gerado com sucesso!\n\nArquivos criados:\n- {plugin_name}.java\n- plugin.yml\n- config.yml',
+        content_type='plugin_generation',
+        generated_code=main_class_code,
+        plugin_yml=plugin_yml_code,
+        package_name=package_name
+    )
+    db.session.add(ai_message)
+    db.session.commit()
+
+    # Validação de sintaxe Java básica
+    print("🔍 Validando sintaxe Java...")
+    syntax_errors = validate_java_syntax(main_class_code)
+    if syntax_errors:
+        print(f"❌ Erros de sintaxe detectados:")
+        for error in syntax_errors:
+            print(f"   - {error}")
+        
+        # Atualizar plugin com erro de sintaxe
+        plugin.status = 'error'
+        plugin.error_message = f"Erros de sintaxe Java: {'; '.join(syntax_errors)}"
         db.session.commit()
-
-        # Criar estrutura do projeto
-        print("📁 Criando estrutura do projeto...")
-        project_id = str(uuid.uuid4())[:8]
-        project_dir = WORKSPACE_DIR / f"{plugin_name}_{project_id}"
         
+        return {
+            'success': False,
+            'error': f"Erros de sintaxe Java detectados: {'; '.join(syntax_errors)}"
+        }
+    
+    print("✅ Sintaxe Java validada com sucesso!")
+    
+    # Workspace persistente do plugin (reaproveitado nas modificações)
+    print("📁 Criando estrutura do projeto...")
+    job.update('writing_files', 50)
+    with workspace.workspace_lock(plugin.id) as project_dir:
         print(f"📂 Diretório do projeto: {project_dir}")
         
-        # Estrutura Maven
-        src_dir = project_dir / "src" / "main" / "java"
-        resources_dir = project_dir / "src" / "main" / "resources"
-        src_dir.mkdir(parents=True, exist_ok=True)
-        resources_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Package path
-        package_path = src_dir / package_name.replace('.', '/')
-        package_path.mkdir(parents=True, exist_ok=True)
-        
-        # Salvar arquivos Java
-        print("💾 Salvando arquivo Java principal...")
-        main_class_file = package_path / f"{plugin_name}.java"
-        with open(main_class_file, 'w', encoding='utf-8') as f:
-            f.write(main_class_code)
-        
-        # Validação de sintaxe Java básica
-        print("🔍 Validando sintaxe Java...")
-        syntax_errors = validate_java_syntax(main_class_code)
-        if syntax_errors:
-            print(f"❌ Erros de sintaxe detectados:")
-            for error in syntax_errors:
-                print(f"   - {error}")
-            
-            # Atualizar plugin com erro de sintaxe
-            plugin.status = 'error'
-            plugin.error_message = f"Erros de sintaxe Java: {'; '.join(syntax_errors)}"
-            db.session.commit()
-            
-            return jsonify({
-                'success': False,
-                'error': f"Erros de sintaxe Java detectados: {'; '.join(syntax_errors)}"
-            }), 400
-        
-        print("✅ Sintaxe Java validada com sucesso!")
-        
-        # Salvar arquivos de recursos (TODOS em src/main/resources/)
-        print("💾 Salvando plugin.yml...")
-        plugin_yml_file = resources_dir / "plugin.yml"
-        with open(plugin_yml_file, 'w', encoding='utf-8') as f:
-            f.write(plugin_yml_code)
-        
-        # IMPORTANTE: Salvar config.yml em src/main/resources/ para ser incluído no JAR
-        print("💾 Salvando config.yml...")
-        config_yml_file = resources_dir / "config.yml"
-        with open(config_yml_file, 'w', encoding='utf-8') as f:
-            f.write(config_yml_code)
-        
-        print(f"✅ Arquivos salvos em src/main/resources/: plugin.yml, config.yml")
-        
-        # Gerar pom.xml com placeholders substituídos
-        print("📋 Gerando pom.xml...")
-        pom_template = Path(__file__).parent / "pom.xml"
-        if pom_template.exists():
-            with open(pom_template, 'r', encoding='utf-8') as f:
-                pom_content = f.read()
-            
-            # Substituir placeholders com valores reais
-            pom_content = pom_content.replace('{PLUGIN_NAME}', plugin_name)
-            pom_content = pom_content.replace('{PLUGIN_VERSION}', plugin_version)
-            pom_content = pom_content.replace('{MC_VERSION}', mc_version)
-            
-            # Salvar pom.xml gerado
-            pom_file = project_dir / "pom.xml"
-            with open(pom_file, 'w', encoding='utf-8') as f:
-                f.write(pom_content)
-            
-            print(f"✅ pom.xml gerado com placeholders substituídos")
-            print(f"   - Plugin: {plugin_name}")
-            print(f"   - Versão: {plugin_version}")
-            print(f"   - Minecraft: {mc_version}")
-        else:
-            print("❌ pom.xml template não encontrado")
+        # Fontes, resources (plugin.yml e config.yml em src/main/resources/) e pom.xml
+        workspace.sync_project(
+            project_dir, plugin_name, plugin_version, mc_version, package_name,
+            main_class_code, plugin_yml_code, config_yml_code
+        )
         
         # Compilar
-        print("🔨 Iniciando compilação Maven...")
-        compile_result = compile_with_maven(project_dir)
-        
-        # Atualizar status do plugin
-        print("📊 Atualizando status do plugin...")
-        if compile_result['success']:
-            plugin.status = 'compiled'
-            plugin.compiled_file = str(project_dir / "target" / f"{plugin_name}-{plugin_version}.jar")
-            print("✅ Plugin compilado com sucesso!")
-        else:
-            plugin.status = 'error'
-            plugin.error_message = compile_result['error']
-            print(f"❌ Erro na compilação: {compile_result['error']}")
-        
-        plugin.last_compile_attempt = datetime.now(UTC)
-        db.session.commit()
-
-        # Criar versão inicial
-        print("📝 Criando versão inicial...")
-        version = PluginVersion(
-            plugin_id=plugin.id,
-            version_number=plugin_version,
-            changes='Versão inicial gerada',
-            main_code=main_class_code,
-            plugin_yml_content=plugin_yml_code,
-            package_name=package_name
-        )
-        db.session.add(version)
-        db.session.commit()
-
-        print("🎉 Plugin gerado com sucesso!")
-        return jsonify({
-            'success': True,
-            'message': 'Plugin gerado com sucesso!',
-            'plugin_id': plugin.id,
-            'chat_id': chat.id,
-            'download_url': f'/api/download/{project_id}/{plugin_name}-{plugin_version}.jar' if compile_result['success'] else None,
-            'compile_status': compile_result['success'],
-            'error': compile_result.get('error')
-        })
-
-    except Exception as e:
-        print(f"❌ Erro crítico: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({
-            'success': False,
-            'error': f'Erro interno: {str(e)}'
-        }), 500
+        print("🔨 Iniciando compilação...")
+        job.update('compiling', 60)
+        compile_result = build_project(project_dir, plugin_name, plugin_version, mc_version,
+                                       on_queue_position=job.queue_callback(60))
+        artifact_sha256 = store_build_artifact(compile_result, project_dir, plugin_name, plugin_version)
+    
+    # Atualizar status do plugin
+    print("📊 Atualizando status do plugin...")
+    job.update('saving', 90)
+    if compile_result['success']:
+        plugin.status = 'compiled'
+        plugin.compiled_file = f"{plugin_name}-{plugin_version}.jar"
+        artifact_store.set_plugin_artifact(plugin, artifact_sha256)
+        if cache_key and ai_model == ai_client.API_MODEL:
+            # Só respostas que passaram pelo parse, validação e compilação vão para o cache,
+            # e só do modelo principal (o da chave): respostas de failover/hedge não
+            ai_cache.store(cache_key, ai_response, ai_model)
+        print("✅ Plugin compilado com sucesso!")
+    else:
+        plugin.status = 'error'
+        plugin.error_message = compile_result['error']
+        print(f"❌ Erro na compilação: {compile_result['error']}")
+    
+    plugin.last_compile_attempt = datetime.now(UTC)
+    db.session.commit()
+
+    # Criar versão inicial
+    print("📝 Criando versão inicial...")
+    version = PluginVersion(
+        plugin_id=plugin.id,
+        version_number=plugin_version,
+        changes='Versão inicial gerada',
+        main_code=main_class_code,
+        plugin_yml_content=plugin_yml_code,
+        config_yml_content=config_yml_code,
+        package_name=package_name,
+        artifact_sha256=artifact_sha256
+    )
+    db.session.add(version)
+    artifact_store.retain(artifact_sha256)
+    db.session.commit()
+    record_build(plugin.id, mc_version, compile_result, version.id)
+
+    print("🎉 Plugin gerado com sucesso!")
+    return {
+        'success': True,
+        'message': 'Plugin gerado com sucesso!',
+        'plugin_id': plugin.id,
+        'chat_id': chat.id,
+        'download_url': f'/api/download/{plugin.id}/{plugin_name}-{plugin_version}.jar' if compile_result['success'] else None,
+        'compile_status': compile_result['success'],
+        'error': compile_result.get('error')
+    }
 
 @app.route('/api/chat/send', methods=['POST'])
 @login_required
@@ -647,6 +752,17 @@ def send_message():
             Plugin.user_id == current_user.id
         ).first_or_404()
         
+        # Check if this is a modification request
+        is_modification_request = chat_modification_requested(message_content)
+        
+        # Modificações recompilam o plugin: recusa rápido se a fila estiver cheia,
+        # antes de gravar a mensagem (um retry do cliente não a duplica)
+        if is_modification_request:
+            try:
+                compile_scheduler.check_admission()
+            except compile_scheduler.CompileQueueFull as e:
+                return compile_queue_full_response(e)
+        
         # Adicionar mensagem do usuário
         user_message = Message(
             chat_id=chat_id,
@@ -666,23 +782,133 @@ def send_message():
                 'content': msg.content
             })
         
-        # Check if this is a modification request
-        modification_keywords = ['modify', 'change', 'update', 'edit', 'alter', 'fix', 'improve', 'add feature', 'remove', 'refactor']
-        is_modification_request = any(keyword in message_content.lower() for keyword in modification_keywords)
-        
-        # Get current plugin code if this is a modification request
-        current_code = None
-        current_yml = None
+        # Modificações recompilam o plugin: rodam em segundo plano como job
         if is_modification_request:
-            # Get the latest version from database
-            latest_version = PluginVersion.query.filter_by(plugin_id=chat.plugin_id).order_by(PluginVersion.created_at.desc()).first()
-            if latest_version:
-                current_code = latest_version.main_code
-                current_yml = latest_version.plugin_yml_content
-        
-        # Prompt do sistema
-        if is_modification_request and current_code:
-            system_prompt = f"""Você é um assistente especializado em desenvolvimento e MODIFICAÇÃO de plugins Minecraft Spigot.
+            job = jobs.create_job(current_user.id, 'chat', plugin_id=chat.plugin_id)
+            jobs.submit(app, job.id, process_chat_message, chat_id, message_content, is_modification_request)
+            print(f"📨 Job de modificação criado: {job.id}")
+            return job_accepted_response(job)
+        
+        return jsonify(process_chat_message(jobs.NullJobContext(), chat_id, message_content, is_modification_request))
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao processar mensagem: {str(e)}'
+        }), 500
+
+@app.route('/api/chat/stream', methods=['POST'])
+@login_required
+def stream_message():
+    """
+    Enviar mensagem no chat com a resposta da IA transmitida token a token (Server-Sent Events).
+    
+    Eventos: 'start', 'token' ({'text'}) a cada trecho recebido da IA e, no
+    final, 'done' com o mesmo resultado de /api/chat/send ou, quando a
+    mensagem pede uma modificação, 'job' com o job que aplica e recompila.
+    """
+    data = request.get_json(silent=True) or {}
+    chat_id = data.get('chat_id')
+    message_content = (data.get('message') or '').strip()
+    if not message_content:
+        return jsonify({'success': False, 'error': 'Mensagem vazia'}), 400
+    
+    # Verificar se o chat pertence ao usuário
+    chat = Chat.query.join(Plugin).filter(
+        Chat.id == chat_id,
+        Plugin.user_id == current_user.id
+    ).first_or_404()
+    
+    is_modification_request = chat_modification_requested(message_content)
+    if is_modification_request:
+        try:
+            compile_scheduler.check_admission()
+        except compile_scheduler.CompileQueueFull as e:
+            return compile_queue_full_response(e)
+    
+    db.session.add(Message(chat_id=chat.id, role='user', content=message_content))
+    db.session.commit()
+    
+    full_prompt = build_chat_prompt(chat, message_content, is_modification_request)
+    response = app.response_class(
+        stream_with_context(stream_chat_reply(chat.id, chat.plugin_id, full_prompt, is_modification_request)),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    # nginx: entrega cada evento sem bufferizar
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def sse_event(event, data):
+    """Evento Server-Sent Events com dados JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_chat_reply(chat_id, plugin_id, full_prompt, is_modification_request):
+    """Repassa os tokens da IA ao navegador e grava a resposta completa no final"""
+    user_id = current_user.id
+    yield sse_event('start', {'chat_id': chat_id})
+    
+    stream = ai_client.stream_chat(ai_payload(full_prompt, stream=True))
+    parts = []
+    relayed = False
+    try:
+        try:
+            for text in stream:
+                parts.append(text)
+                yield sse_event('token', {'text': text})
+        except ai_client.AIStreamInterrupted as e:
+            print(f"❌ {str(e)}")
+            parts = []
+        relayed = True
+    finally:
+        if not relayed:
+            # Cliente desconectou (GeneratorExit no yield): o resto da resposta é lido e gravado em um job
+            job = jobs.create_job(user_id, 'chat', plugin_id=plugin_id)
+            jobs.submit(app, job.id, finish_streamed_chat_reply, chat_id, stream, parts)
+            print(f"🔌 Cliente desconectou durante a transmissão; resposta concluída no job {job.id}")
+    
+    ai_response = clean_ai_content(''.join(parts)) or None
+    if is_modification_request and ai_response:
+        # Aplicar o código e recompilar não prende a conexão: segue como job
+        job = jobs.create_job(user_id, 'chat', plugin_id=plugin_id)
+        jobs.submit(app, job.id, finish_chat_reply, chat_id, ai_response)
+        print(f"📨 Job de modificação criado: {job.id}")
+        yield sse_event('job', {'job_id': job.id, 'status_url': f'/api/jobs/{job.id}'})
+        return
+    
+    yield sse_event('done', finish_chat_reply(jobs.NullJobContext(), chat_id, ai_response))
+
+def finish_streamed_chat_reply(job, chat_id, stream, parts):
+    """Lê o restante de uma resposta em streaming (cliente desconectado) e grava no chat"""
+    job.update('calling_ai', 10)
+    try:
+        for text in stream:
+            parts.append(text)
+    except ai_client.AIStreamInterrupted as e:
+        print(f"❌ {str(e)}")
+        parts = []
+    return finish_chat_reply(job, chat_id, clean_ai_content(''.join(parts)) or None)
+
+def chat_modification_requested(message_content):
+    """Indica se a mensagem pede uma modificação do código (recompila o plugin)"""
+    modification_keywords = ['modify', 'change', 'update', 'edit', 'alter', 'fix', 'improve', 'add feature', 'remove', 'refactor']
+    return any(keyword in message_content.lower() for keyword in modification_keywords)
+
+def build_chat_prompt(chat, message_content, is_modification_request):
+    """Prompt da IA para uma mensagem do chat (com o código atual quando é uma modificação)"""
+    # Get current plugin code if this is a modification request
+    current_code = None
+    current_yml = None
+    if is_modification_request:
+        # Get the latest version from database
+        latest_version = PluginVersion.query.filter_by(plugin_id=chat.plugin_id).order_by(PluginVersion.created_at.desc()).first()
+        if latest_version:
+            current_code = latest_version.main_code
+            current_yml = latest_version.plugin_yml_content
+    
+    # Prompt do sistema
+    if is_modification_request and current_code:
+        system_prompt = f"""Você é um assistente especializado em desenvolvimento e MODIFICAÇÃO de plugins Minecraft Spigot.
 Você está trabalhando no plugin '{chat.plugin.name}' que já foi gerado anteriormente.
 
 CÓDIGO ATUAL DO PLUGIN:
@@ -724,8 +950,8 @@ FORMATO PARA DISCUSSÕES SIMPLES (sem alteração de código):
 }}
 
 Sempre forneça código Java funcional e completo quando houver modificação."""
-        else:
-            system_prompt = f"""Você é um assistente especializado em desenvolvimento de plugins Minecraft Spigot. 
+    else:
+        system_prompt = f"""Você é um assistente especializado em desenvolvimento de plugins Minecraft Spigot. 
 Você está trabalhando no plugin '{chat.plugin.name}' que já foi gerado anteriormente.
 
 Context: O plugin tem as seguintes características:
@@ -737,79 +963,31 @@ Context: O plugin tem as seguintes características:
 
 Sua tarefa é ajudar o usuário a melhorar, modificar ou adicionar funcionalidades ao plugin. 
 Sempre forneça código Java funcional e completo quando necessário."""
-        
-        # Construir prompt completo
-        full_prompt = f"{system_prompt}\n\nPedido do usuário: {message_content}"
-        
-        # Chamar API
-        ai_response = call_ai_api(full_prompt)
-        
-        if not ai_response:
-            ai_message_content = "Desculpe, não consegui gerar uma resposta. Tente novamente."
-            
-            # Adicionar resposta da IA
-            ai_message = Message(
-                chat_id=chat_id,
-                role='assistant',
-                content=ai_message_content
-            )
-            db.session.add(ai_message)
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message_id': ai_message.id,
-                'content': ai_message_content
-            })
-        
-        # Try to parse as JSON for code modifications
-        try:
-            ai_data = json.loads(ai_response)
-            
-            if ai_data.get('modification_type') == 'code_change':
-                # This is a code modification - apply it!
-                print(f"🔧 Applying code modifications to plugin {chat.plugin.name}...")
-                
-                modification_result = apply_plugin_modification(
-                    plugin=chat.plugin,
-                    new_code=ai_data.get('main_class'),
-                    new_plugin_yml=ai_data.get('plugin_yml'),
-                    new_config_yml=ai_data.get('config_yml'),
-                    changes_summary=ai_data.get('changes_summary', 'Code modified by AI')
-                )
-                
-                if modification_result['success']:
-                    ai_message_content = f"✅ Modificações aplicadas com sucesso!\n\n{ai_data.get('changes_summary', 'Código atualizado.')}\n\nO plugin foi recompilado e está pronto para download."
-                    
-                    # Add success message to chat
-                    ai_message = Message(
-                        chat_id=chat_id,
-                        role='assistant',
-                        content=ai_message_content,
-                        content_type='plugin_update',
-                        generated_code=ai_data.get('main_class'),
-                        plugin_yml=ai_data.get('plugin_yml')
-                    )
-                    db.session.add(ai_message)
-                    db.session.commit()
-                    
-                    return jsonify({
-                        'success': True,
-                        'message_id': ai_message.id,
-                        'content': ai_message_content,
-                        'plugin_modified': True,
-                        'compile_status': modification_result['compile_status']
-                    })
-                else:
-                    ai_message_content = f"❌ Falha ao aplicar modificações: {modification_result['error']}"
-            elif ai_data.get('modification_type') == 'discussion':
-                ai_message_content = ai_data.get('response', ai_response)
-            else:
-                # Unknown format, use raw response
-                ai_message_content = ai_response
-        except json.JSONDecodeError:
-            # Not JSON, use as regular text response
-            ai_message_content = ai_response
+    
+    # Construir prompt completo
+    return f"{system_prompt}\n\nPedido do usuário: {message_content}"
+
+def process_chat_message(job, chat_id, message_content, is_modification_request):
+    """Gera a resposta da IA para uma mensagem do chat (e aplica modificações de código)"""
+    chat = db.session.get(Chat, chat_id)
+    full_prompt = build_chat_prompt(chat, message_content, is_modification_request)
+    
+    # Chamar API
+    job.update('calling_ai', 10)
+    ai_response, _ = call_ai_api(full_prompt)
+    return finish_chat_reply(job, chat_id, ai_response)
+
+def finish_chat_reply(job, chat_id, ai_response):
+    """
+    Grava a resposta da IA no chat.
+    
+    Respostas JSON com modification_type 'code_change' aplicam o novo código
+    e recompilam o plugin; 'discussion' grava só o texto da resposta.
+    """
+    chat = db.session.get(Chat, chat_id)
+    
+    if not ai_response:
+        ai_message_content = "Desculpe, não consegui gerar uma resposta. Tente novamente."
         
         # Adicionar resposta da IA
         ai_message = Message(
@@ -820,21 +998,82 @@ Sempre forneça código Java funcional e completo quando necessário."""
         db.session.add(ai_message)
         db.session.commit()
         
-        return jsonify({
+        return {
             'success': True,
             'message_id': ai_message.id,
             'content': ai_message_content
-        })
+        }
+    
+    # Try to parse as JSON for code modifications
+    try:
+        ai_data = json.loads(ai_response)
         
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': f'Erro ao processar mensagem: {str(e)}'
-        }), 500
+        if ai_data.get('modification_type') == 'code_change':
+            # This is a code modification - apply it!
+            print(f"🔧 Applying code modifications to plugin {chat.plugin.name}...")
+            
+            modification_result = apply_plugin_modification(
+                plugin=chat.plugin,
+                new_code=ai_data.get('main_class'),
+                new_plugin_yml=ai_data.get('plugin_yml'),
+                new_config_yml=ai_data.get('config_yml'),
+                changes_summary=ai_data.get('changes_summary', 'Code modified by AI'),
+                job=job
+            )
+            
+            if modification_result['success']:
+                ai_message_content = f"✅ Modificações aplicadas com sucesso!\n\n{ai_data.get('changes_summary', 'Código atualizado.')}\n\nO plugin foi recompilado e está pronto para download."
+                
+                # Add success message to chat
+                ai_message = Message(
+                    chat_id=chat_id,
+                    role='assistant',
+                    content=ai_message_content,
+                    content_type='plugin_update',
+                    generated_code=ai_data.get('main_class'),
+                    plugin_yml=ai_data.get('plugin_yml')
+                )
+                db.session.add(ai_message)
+                db.session.commit()
+                
+                return {
+                    'success': True,
+                    'message_id': ai_message.id,
+                    'content': ai_message_content,
+                    'plugin_modified': True,
+                    'compile_status': modification_result['compile_status']
+                }
+            else:
+                ai_message_content = f"❌ Falha ao aplicar modificações: {modification_result['error']}"
+        elif ai_data.get('modification_type') == 'discussion':
+            ai_message_content = ai_data.get('response', ai_response)
+        else:
+            # Unknown format, use raw response
+            ai_message_content = ai_response
+    except json.JSONDecodeError:
+        # Not JSON, use as regular text response
+        ai_message_content = ai_response
+    
+    # Adicionar resposta da IA
+    ai_message = Message(
+        chat_id=chat_id,
+        role='assistant',
+        content=ai_message_content
+    )
+    db.session.add(ai_message)
+    db.session.commit()
+    
+    return {
+        'success': True,
+        'message_id': ai_message.id,
+        'content': ai_message_content
+    }
 
-def apply_plugin_modification(plugin, new_code, new_plugin_yml, new_config_yml, changes_summary):
+def apply_plugin_modification(plugin, new_code, new_plugin_yml, new_config_yml, changes_summary, job=None):
     """Apply modifications to an existing plugin and recompile"""
+    job = job or jobs.NullJobContext()
     try:
+        job.update('writing_files', 50)
         print(f"🔧 Starting plugin modification for {plugin.name}...")
         
         # Update plugin status
@@ -842,29 +1081,10 @@ def apply_plugin_modification(plugin, new_code, new_plugin_yml, new_config_yml,
         plugin.updated_at = datetime.now(UTC)
         db.session.commit()
         
-        # Create new project directory
-        project_id = str(uuid.uuid4())[:8]
-        project_dir = WORKSPACE_DIR / f"{plugin.name}_{project_id}"
-        
-        # Maven structure
-        src_dir = project_dir / "src" / "main" / "java"
-        resources_dir = project_dir / "src" / "main" / "resources"
-        src_dir.mkdir(parents=True, exist_ok=True)
-        resources_dir.mkdir(parents=True, exist_ok=True)
-        
         # Get package name from latest version or generate
         latest_version = PluginVersion.query.filter_by(plugin_id=plugin.id).order_by(PluginVersion.created_at.desc()).first()
         package_name = latest_version.package_name if latest_version else f'com.pluginforge.{plugin.name.lower()}'
         
-        # Package path
-        package_path = src_dir / package_name.replace('.', '/')
-        package_path.mkdir(parents=True, exist_ok=True)
-        
-        # Save modified Java file
-        main_class_file = package_path / f"{plugin.name}.java"
-        with open(main_class_file, 'w', encoding='utf-8') as f:
-            f.write(new_code)
-        
         # Validate syntax
         print("🔍 Validating modified Java syntax...")
         syntax_errors = validate_java_syntax(new_code)
@@ -879,52 +1099,41 @@ def apply_plugin_modification(plugin, new_code, new_plugin_yml, new_config_yml,
                 'compile_status': False
             }
         
-        # Save resource files (use existing if not modified)
-        if new_plugin_yml:
-            with open(resources_dir / "plugin.yml", 'w', encoding='utf-8') as f:
-                f.write(new_plugin_yml)
-        else:
-            # Use existing plugin.yml
-            if latest_version and latest_version.plugin_yml_content:
-                with open(resources_dir / "plugin.yml", 'w', encoding='utf-8') as f:
-                    f.write(latest_version.plugin_yml_content)
-        
-        if new_config_yml:
-            with open(resources_dir / "config.yml", 'w', encoding='utf-8') as f:
-                f.write(new_config_yml)
-        else:
-            # Generate default config.yml
-            default_config = f"""# Configuration for {plugin.name}
+        # Resource files: use existing ones if not modified
+        plugin_yml_content = new_plugin_yml or (latest_version.plugin_yml_content if latest_version else None)
+        
+        # Update the plugin's persistent workspace in place and rebuild incrementally
+        with workspace.workspace_lock(plugin.id) as project_dir:
+            config_yml_content = new_config_yml or workspace.read_config(project_dir) \
+                or (latest_version.config_yml_content if latest_version else None)
+            if not config_yml_content:
+                # Generate default config.yml
+                config_yml_content = f"""# Configuration for {plugin.name}
 messages:
   enabled: '&aPlugin enabled!'
   disabled: '&cPlugin disabled!'
 settings:
   debug: false
 """
-            with open(resources_dir / "config.yml", 'w', encoding='utf-8') as f:
-                f.write(default_config)
-        
-        # Generate pom.xml
-        pom_template = Path(__file__).parent / "pom.xml"
-        if pom_template.exists():
-            with open(pom_template, 'r', encoding='utf-8') as f:
-                pom_content = f.read()
             
-            pom_content = pom_content.replace('{PLUGIN_NAME}', plugin.name)
-            pom_content = pom_content.replace('{PLUGIN_VERSION}', plugin.version)
-            pom_content = pom_content.replace('{MC_VERSION}', plugin.minecraft_version)
+            workspace.sync_project(
+                project_dir, plugin.name, plugin.version, plugin.minecraft_version, package_name,
+                new_code, plugin_yml_content, config_yml_content
+            )
             
-            with open(project_dir / "pom.xml", 'w', encoding='utf-8') as f:
-                f.write(pom_content)
-        
-        # Compile
-        print("🔨 Compiling modified plugin with Maven...")
-        compile_result = compile_with_maven(project_dir)
+            # Compile
+            print("🔨 Compiling modified plugin...")
+            job.update('compiling', 60)
+            compile_result = build_project(project_dir, plugin.name, plugin.version, plugin.minecraft_version,
+                                           on_queue_position=job.queue_callback(60))
+            artifact_sha256 = store_build_artifact(compile_result, project_dir, plugin.name, plugin.version)
+        job.update('saving', 90)
         
         # Update plugin status
         if compile_result['success']:
             plugin.status = 'compiled'
-            plugin.compiled_file = str(project_dir / "target" / f"{plugin.name}-{plugin.version}.jar")
+            plugin.compiled_file = f"{plugin.name}-{plugin.version}.jar"
+            artifact_store.set_plugin_artifact(plugin, artifact_sha256)
             print("✅ Modified plugin compiled successfully!")
         else:
             plugin.status = 'error'
@@ -940,11 +1149,15 @@ settings:
             version_number=plugin.version,
             changes=changes_summary,
             main_code=new_code,
-            plugin_yml_content=new_plugin_yml or (latest_version.plugin_yml_content if latest_version else ''),
-            package_name=package_name
+            plugin_yml_content=plugin_yml_content or '',
+            config_yml_content=config_yml_content,
+            package_name=package_name,
+            artifact_sha256=artifact_sha256
         )
         db.session.add(new_version)
+        artifact_store.retain(artifact_sha256)
         db.session.commit()
+        record_build(plugin.id, plugin.minecraft_version, compile_result, new_version.id)
         
         return {
             'success': True,
@@ -968,23 +1181,59 @@ settings:
         }
 
 
+def send_jar(jar_path, download_name, etag=None):
+    """
+    Envia um JAR com ETag, respostas 304 (If-None-Match) e Range.
+    
+    Artefatos do repositório usam o hash do conteúdo como ETag. Com
+    DOWNLOAD_OFFLOAD, o proxy entrega os bytes (X-Accel-Redirect/X-Sendfile)
+    e o worker fica livre assim que os cabeçalhos são enviados.
+    
+    Args:
+        jar_path (Path): Arquivo a enviar
+        download_name (str): Nome do arquivo para o navegador
+        etag (str): ETag forte (SHA-256 do artefato); None usa mtime/tamanho
+    """
+    if etag and DOWNLOAD_OFFLOAD in ('x-accel', 'x-sendfile') and ARTIFACTS_DIR in jar_path.parents:
+        response = app.response_class(mimetype='application/java-archive')
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.set_etag(etag)
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+        if DOWNLOAD_OFFLOAD == 'x-accel':
+            relative_path = jar_path.relative_to(ARTIFACTS_DIR).as_posix()
+            response.headers['X-Accel-Redirect'] = DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/' + relative_path
+        else:
+            response.headers['X-Sendfile'] = str(jar_path)
+        return response
+    
+    response = send_file(
+        jar_path,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype='application/java-archive',
+        etag=etag or True,
+        conditional=True
+    )
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @app.route('/api/download/<project_id>/<filename>')
 @login_required
 def download_plugin(project_id, filename):
-    """Download do plugin compilado"""
-    # Buscar o arquivo
-    for project_dir in WORKSPACE_DIR.iterdir():
-        if project_id in project_dir.name:
-            jar_path = project_dir / "target" / filename
-            if jar_path.exists():
-                return send_file(
-                    jar_path,
-                    as_attachment=True,
-                    download_name=filename,
-                    mimetype='application/java-archive'
-                )
+    """Download do plugin compilado (busca direta pelo ID, sem varrer o workspace)"""
+    plugin = Plugin.query.filter_by(id=project_id, user_id=current_user.id).first()
+    if (plugin is None or plugin.status != 'compiled' or not plugin.compiled_file
+            or Path(plugin.compiled_file).name != filename):
+        return jsonify({'error': 'Arquivo não encontrado'}), 404
     
-    return jsonify({'error': 'Arquivo não encontrado'}), 404
+    jar_path = artifact_store.plugin_jar_path(plugin)
+    if jar_path is None or not jar_path.exists():
+        return jsonify({'error': 'Arquivo não encontrado'}), 404
+    
+    return send_jar(jar_path, filename, etag=plugin.artifact_sha256)
 
 @app.route('/api/plugin/<plugin_id>/download')
 @login_required
@@ -997,18 +1246,83 @@ def download_plugin_by_id(plugin_id):
     if not plugin.compiled_file or plugin.status != 'compiled':
         return jsonify({'error': 'Plugin ainda não foi compilado'}), 400
     
-    # Verificar se o arquivo existe
-    jar_path = Path(plugin.compiled_file)
-    if not jar_path.exists():
+    # JAR atual no repositório de artefatos (plugins antigos guardam o caminho no workspace)
+    jar_path = artifact_store.plugin_jar_path(plugin)
+    if jar_path is None or not jar_path.exists():
         return jsonify({'error': 'Arquivo JAR não encontrado no servidor'}), 404
     
     # Enviar arquivo
-    return send_file(
-        jar_path,
-        as_attachment=True,
-        download_name=jar_path.name,
-        mimetype='application/java-archive'
-    )
+    return send_jar(jar_path, Path(plugin.compiled_file).name, etag=plugin.artifact_sha256)
+
+@app.route('/api/plugin/<plugin_id>/diagnostics', methods=['GET'])
+@login_required
+def get_plugin_diagnostics(plugin_id):
+    """Diagnósticos do último build do plugin (sem transferir o log completo)"""
+    plugin = Plugin.query.filter_by(id=plugin_id, user_id=current_user.id).first_or_404()
+    build_log = build_logs.latest_build(plugin.id)
+    
+    return jsonify({
+        'success': True,
+        'build': build_logs.serialize(build_log) if build_log else None
+    })
+
+@app.route('/api/plugin/<plugin_id>/build-logs/<log_id>', methods=['GET'])
+@login_required
+def get_build_log(plugin_id, log_id):
+    """Log completo de um build (enviado comprimido quando o navegador aceita gzip)"""
+    plugin = Plugin.query.filter_by(id=plugin_id, user_id=current_user.id).first_or_404()
+    build_log = BuildLog.query.filter_by(id=log_id, plugin_id=plugin.id).first_or_404()
+    
+    path = build_logs.log_path(build_log.id)
+    if not path.exists():
+        return jsonify({'error': 'Log não encontrado no servidor'}), 404
+    
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = send_file(path, mimetype='text/plain')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+    
+    return app.response_class(build_logs.read_log(build_log.id), mimetype='text/plain')
+
+def send_zip(entries, download_name):
+    """Resposta com um zip gerado em streaming (sem montar o arquivo em memória ou disco)"""
+    response = app.response_class(stream_with_context(exports.stream_zip(entries)), mimetype='application/zip')
+    # Mesmo formato do send_file: nome ASCII e, se preciso, filename* (RFC 5987) em UTF-8
+    try:
+        download_name.encode('ascii')
+        names = {'filename': download_name}
+    except UnicodeEncodeError:
+        ascii_name = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        names = {'filename': ascii_name, 'filename*': f"UTF-8''{url_quote(download_name, safe='')}"}
+    response.headers.set('Content-Disposition', 'attachment', **names)
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
+@app.route('/api/plugin/<plugin_id>/source')
+@login_required
+def download_plugin_source(plugin_id):
+    """Projeto Maven de uma versão do plugin (?versionId=, padrão: a mais recente) em zip"""
+    plugin = Plugin.query.filter_by(id=plugin_id, user_id=current_user.id).first_or_404()
+
+    version_query = PluginVersion.query.filter_by(plugin_id=plugin.id)
+    version_id = request.args.get('versionId')
+    if version_id:
+        version = version_query.filter_by(id=version_id).first()
+    else:
+        version = version_query.order_by(PluginVersion.created_at.desc()).first()
+    if version is None:
+        return jsonify({'error': 'Versão não encontrada'}), 404
+
+    folder = f"{plugin.name}-{version.version_number}"
+    return send_zip(exports.project_entries(plugin, version, prefix=f"{folder}/"), f"{folder}-source.zip")
+
+@app.route('/api/export')
+@login_required
+def export_user_plugins():
+    """Exporta todos os plugins do usuário (metadados, projeto e JAR) em um único zip"""
+    download_name = f"pluginforge-{current_user.username}-{datetime.now(UTC):%Y%m%d}.zip"
+    return send_zip(exports.user_export_entries(current_user.id), download_name)
 
 @app.route('/api/dashboard/plugins', methods=['GET'])
 @login_required
@@ -1040,6 +1354,19 @@ def get_dashboard_plugins():
             'error': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Status de um job assíncrono (geração, modificação ou recriação)"""
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    if jobs.mark_if_stale(job):
+        db.session.refresh(job)
+    
+    return jsonify({
+        'success': True,
+        'job': jobs.serialize(job)
+    })
+
 @app.route('/api/plugin/<plugin_id>/recreate', methods=['POST'])
 @login_required
 def recreate_plugin(plugin_id):
@@ -1055,6 +1382,12 @@ def recreate_plugin(plugin_id):
                 'error': 'Only plugins with error status can be recreated'
             }), 400
         
+        # Fail fast if the compile queue is full (before calling the AI)
+        try:
+            compile_scheduler.check_admission()
+        except compile_scheduler.CompileQueueFull as e:
+            return compile_queue_full_response(e)
+        
         # Get optional parameter modifications from request
         data = request.get_json() or {}
         
@@ -1065,15 +1398,51 @@ def recreate_plugin(plugin_id):
         plugin_version = data.get('pluginVersion', original_plugin.version)
         features = data.get('features', original_plugin.features or '')
         
-        print(f"🔄 Recreating plugin '{plugin_name}' for user {current_user.username}...")
-        print(f"   Original plugin ID: {plugin_id}")
-        print(f"   Previous error: {original_plugin.error_message}")
+        params = {
+            'plugin_name': plugin_name,
+            'mc_version': mc_version,
+            'description': description,
+            'plugin_version': plugin_version,
+            'features': features
+        }
+        
+        # The AI call and the build run in the background
+        job = jobs.create_job(current_user.id, 'recreate', plugin_id=original_plugin.id)
+        jobs.submit(app, job.id, run_recreate_pipeline, plugin_id, current_user.id, current_user.username, params)
+        print(f"📨 Recreation job created: {job.id}")
         
-        # Build improved prompt with error context
-        full_description = f"{description}\n\nFuncionalidades: {features}" if features else description
+        return job_accepted_response(job)
         
-        # Enhanced prompt with error learning
-        prompt = f"""Você é o PluginCraft AI, especialista em desenvolvimento de plugins para Minecraft Spigot.
+    except Exception as e:
+        print(f"❌ Critical error in recreation: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Internal error: {str(e)}'
+        }), 500
+
+def run_recreate_pipeline(job, plugin_id, user_id, username, params):
+    """Recreation pipeline (runs in the background as a job)"""
+    original_plugin = Plugin.query.filter_by(id=plugin_id, user_id=user_id).first()
+    if not original_plugin:
+        return {'success': False, 'error': 'Plugin not found'}
+    
+    plugin_name = params['plugin_name']
+    mc_version = params['mc_version']
+    description = params['description']
+    plugin_version = params['plugin_version']
+    features = params['features']
+    
+    print(f"🔄 Recreating plugin '{plugin_name}' for user {username}...")
+    print(f"   Original plugin ID: {plugin_id}")
+    print(f"   Previous error: {original_plugin.error_message}")
+    
+    # Build improved prompt with error context
+    full_description = f"{description}\n\nFuncionalidades: {features}" if features else description
+    
+    # Enhanced prompt with error learning
+    prompt = f"""Você é o PluginCraft AI, especialista em desenvolvimento de plugins para Minecraft Spigot.
 
 Tarefa: Gere um plugin completo para Minecraft {mc_version} com base na seguinte descrição:
 
@@ -1123,28 +1492,31 @@ FORMATO OBRIGATÓRIO (retorne APENAS isto, nada mais):
 
 IMPORTANTE: Retorne apenas o JSON acima, sem texto adicional, sem formatação markdown."""
 
-        print(f"📡 Generating plugin with improved error handling...")
-        
-        # Call AI API
-        ai_response = call_ai_api(prompt)
-        
-        if not ai_response:
-            return jsonify({
-                'success': False,
-                'error': 'Failed to generate code with AI. Please check your API key.'
-            }), 500
-        
-        # Parse JSON
-        try:
-            code_data = json.loads(ai_response)
-            main_class_code = code_data.get('main_class', '')
-            plugin_yml_code = code_data.get('plugin_yml', '')
-            config_yml_code = code_data.get('config_yml', '')
-            package_name = code_data.get('package_name', f'com.pluginforge.{plugin_name.lower()}')
-            
-            # Generate default config.yml if not provided
-            if not config_yml_code:
-                config_yml_code = f"""# Configuration for {plugin_name}
+    print(f"📡 Generating plugin with improved error handling...")
+    
+    # Call AI API
+    job.update('calling_ai', 10)
+    cache_key = ai_cache_key(prompt, user_id)
+    ai_response, ai_model = call_ai_api(prompt, cache_key=cache_key, expect_json=True)
+    
+    if not ai_response:
+        return {
+            'success': False,
+            'error': 'Failed to generate code with AI. Please check your API key.'
+        }
+    
+    # Parse JSON
+    job.update('parsing', 40)
+    try:
+        code_data = json.loads(ai_response)
+        main_class_code = code_data.get('main_class', '')
+        plugin_yml_code = code_data.get('plugin_yml', '')
+        config_yml_code = code_data.get('config_yml', '')
+        package_name = code_data.get('package_name', f'com.pluginforge.{plugin_name.lower()}')
+        
+        # Generate default config.yml if not provided
+        if not config_yml_code:
+            config_yml_code = f"""# Configuration for {plugin_name}
 # Generated automatically by PluginForge Studio
 
 messages:
@@ -1155,327 +1527,543 @@ settings:
   debug: false
   language: 'en_US'
 """
-        except json.JSONDecodeError as e:
-            return jsonify({
-                'success': False,
-                'error': f'AI did not return valid format. Details: {str(e)}'
-            }), 500
-        
-        # Update the existing plugin instead of creating new one
-        original_plugin.status = 'generating'
-        original_plugin.error_message = None
-        original_plugin.updated_at = datetime.now(UTC)
-        
-        # Update parameters if modified
-        original_plugin.name = plugin_name
-        original_plugin.version = plugin_version
-        original_plugin.minecraft_version = mc_version
-        original_plugin.description = description
-        original_plugin.features = features
-        
+    except json.JSONDecodeError as e:
+        return {
+            'success': False,
+            'error': f'AI did not return valid format. Details: {str(e)}'
+        }
+    
+    # Update the existing plugin instead of creating new one
+    original_plugin.status = 'generating'
+    original_plugin.error_message = None
+    original_plugin.updated_at = datetime.now(UTC)
+    
+    # Update parameters if modified
+    original_plugin.name = plugin_name
+    original_plugin.version = plugin_version
+    original_plugin.minecraft_version = mc_version
+    original_plugin.description = description
+    original_plugin.features = features
+    
+    db.session.commit()
+    print(f"✅ Plugin updated in database")
+    
+    # Create new chat message for recreation
+    chat = Chat.query.filter_by(plugin_id=plugin_id, is_active=True).first()
+    if not chat:
+        chat = Chat(plugin_id=plugin_id, title=f'Recreation of {plugin_name}')
+        db.session.add(chat)
         db.session.commit()
-        print(f"✅ Plugin updated in database")
-        
-        # Create new chat message for recreation
-        chat = Chat.query.filter_by(plugin_id=plugin_id, is_active=True).first()
-        if not chat:
-            chat = Chat(plugin_id=plugin_id, title=f'Recreation of {plugin_name}')
-            db.session.add(chat)
-            db.session.commit()
-        
-        # Add recreation message
-        recreation_message = Message(
-            chat_id=chat.id,
-            role='system',
-            content=f'Plugin recreation initiated. Attempting to fix previous error and regenerate...'
-        )
-        db.session.add(recreation_message)
+    
+    # Add recreation message
+    recreation_message = Message(
+        chat_id=chat.id,
+        role='system',
+        content=f'Plugin recreation initiated. Attempting to fix previous error and regenerate...'
+    )
+    db.session.add(recreation_message)
+    db.session.commit()
+    
+    # Validate syntax
+    print("🔍 Validating Java syntax...")
+    syntax_errors = validate_java_syntax(main_class_code)
+    if syntax_errors:
+        original_plugin.status = 'error'
+        original_plugin.error_message = f"Java syntax errors: {'; '.join(syntax_errors)}"
         db.session.commit()
         
-        # Create project structure
-        project_id = str(uuid.uuid4())[:8]
-        project_dir = WORKSPACE_DIR / f"{plugin_name}_{project_id}"
-        
-        # Maven structure
-        src_dir = project_dir / "src" / "main" / "java"
-        resources_dir = project_dir / "src" / "main" / "resources"
-        src_dir.mkdir(parents=True, exist_ok=True)
-        resources_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Package path
-        package_path = src_dir / package_name.replace('.', '/')
-        package_path.mkdir(parents=True, exist_ok=True)
-        
-        # Save Java file
-        main_class_file = package_path / f"{plugin_name}.java"
-        with open(main_class_file, 'w', encoding='utf-8') as f:
-            f.write(main_class_code)
-        
-        # Validate syntax
-        print("🔍 Validating Java syntax...")
-        syntax_errors = validate_java_syntax(main_class_code)
-        if syntax_errors:
-            original_plugin.status = 'error'
-            original_plugin.error_message = f"Java syntax errors: {'; '.join(syntax_errors)}"
-            db.session.commit()
-            
-            return jsonify({
-                'success': False,
-                'error': f"Java syntax errors detected: {'; '.join(syntax_errors)}"
-            }), 400
-        
-        # Save resource files
-        with open(resources_dir / "plugin.yml", 'w', encoding='utf-8') as f:
-            f.write(plugin_yml_code)
-        
-        with open(resources_dir / "config.yml", 'w', encoding='utf-8') as f:
-            f.write(config_yml_code)
-        
-        # Generate pom.xml
-        pom_template = Path(__file__).parent / "pom.xml"
-        if pom_template.exists():
-            with open(pom_template, 'r', encoding='utf-8') as f:
-                pom_content = f.read()
-            
-            pom_content = pom_content.replace('{PLUGIN_NAME}', plugin_name)
-            pom_content = pom_content.replace('{PLUGIN_VERSION}', plugin_version)
-            pom_content = pom_content.replace('{MC_VERSION}', mc_version)
-            
-            with open(project_dir / "pom.xml", 'w', encoding='utf-8') as f:
-                f.write(pom_content)
+        return {
+            'success': False,
+            'error': f"Java syntax errors detected: {'; '.join(syntax_errors)}"
+        }
+    
+    # Reuse the plugin's persistent workspace (sources updated in place)
+    job.update('writing_files', 50)
+    with workspace.workspace_lock(original_plugin.id) as project_dir:
+        workspace.sync_project(
+            project_dir, plugin_name, plugin_version, mc_version, package_name,
+            main_class_code, plugin_yml_code, config_yml_code
+        )
         
         # Compile
-        print("🔨 Compiling with Maven...")
-        compile_result = compile_with_maven(project_dir)
-        
-        # Update plugin status
-        if compile_result['success']:
-            original_plugin.status = 'compiled'
-            original_plugin.compiled_file = str(project_dir / "target" / f"{plugin_name}-{plugin_version}.jar")
-            print("✅ Plugin recreated and compiled successfully!")
-        else:
-            original_plugin.status = 'error'
-            original_plugin.error_message = compile_result['error']
-            print(f"❌ Compilation error: {compile_result['error']}")
-        
-        original_plugin.last_compile_attempt = datetime.now(UTC)
-        db.session.commit()
-        
-        # Create new version entry
-        new_version = PluginVersion(
-            plugin_id=original_plugin.id,
-            version_number=plugin_version,
-            changes=f'Recreated after error. Previous error: {original_plugin.error_message[:200] if original_plugin.error_message else "Unknown"}',
-            main_code=main_class_code,
-            plugin_yml_content=plugin_yml_code,
+        print("🔨 Compiling...")
+        job.update('compiling', 60)
+        compile_result = build_project(project_dir, plugin_name, plugin_version, mc_version,
+                                       on_queue_position=job.queue_callback(60))
+        artifact_sha256 = store_build_artifact(compile_result, project_dir, plugin_name, plugin_version)
+    
+    # Update plugin status
+    job.update('saving', 90)
+    if compile_result['success']:
+        original_plugin.status = 'compiled'
+        original_plugin.compiled_file = f"{plugin_name}-{plugin_version}.jar"
+        artifact_store.set_plugin_artifact(original_plugin, artifact_sha256)
+        if cache_key and ai_model == ai_client.API_MODEL:
+            ai_cache.store(cache_key, ai_response, ai_model)
+        print("✅ Plugin recreated and compiled successfully!")
+    else:
+        original_plugin.status = 'error'
+        original_plugin.error_message = compile_result['error']
+        print(f"❌ Compilation error: {compile_result['error']}")
+    
+    original_plugin.last_compile_attempt = datetime.now(UTC)
+    db.session.commit()
+    
+    # Create new version entry
+    new_version = PluginVersion(
+        plugin_id=original_plugin.id,
+        version_number=plugin_version,
+        changes=f'Recreated after error. Previous error: {original_plugin.error_message[:200] if original_plugin.error_message else "Unknown"}',
+        main_code=main_class_code,
+        plugin_yml_content=plugin_yml_code,
+        config_yml_content=config_yml_code,
+        package_name=package_name,
+        artifact_sha256=artifact_sha256
+    )
+    db.session.add(new_version)
+    artifact_store.retain(artifact_sha256)
+    db.session.commit()
+    record_build(original_plugin.id, mc_version, compile_result, new_version.id)
+    
+    # Add AI success/error message to chat
+    if compile_result['success']:
+        success_message = Message(
+            chat_id=chat.id,
+            role='assistant',
+            content=f'Plugin recreated successfully! The previous error has been fixed.',
+            content_type='plugin_generation',
+            generated_code=main_class_code,
+            plugin_yml=plugin_yml_code,
             package_name=package_name
         )
-        db.session.add(new_version)
-        db.session.commit()
-        
-        # Add AI success/error message to chat
-        if compile_result['success']:
-            success_message = Message(
-                chat_id=chat.id,
-                role='assistant',
-                content=f'Plugin recreated successfully! The previous error has been fixed.',
-                content_type='plugin_generation',
-                generated_code=main_class_code,
-                plugin_yml=plugin_yml_code,
-                package_name=package_name
-            )
-        else:
-            success_message = Message(
-                chat_id=chat.id,
-                role='assistant',
-                content=f'Recreation attempted but compilation failed: {compile_result["error"][:200]}',
-                content_type='text'
-            )
-        db.session.add(success_message)
-        db.session.commit()
-        
+    else:
+        success_message = Message(
+            chat_id=chat.id,
+            role='assistant',
+            content=f'Recreation attempted but compilation failed: {compile_result["error"][:200]}',
+            content_type='text'
+        )
+    db.session.add(success_message)
+    db.session.commit()
+    
+    return {
+        'success': True,
+        'message': 'Plugin recreated successfully!' if compile_result['success'] else 'Recreation attempted but compilation failed',
+        'plugin_id': original_plugin.id,
+        'compile_status': compile_result['success'],
+        'error': compile_result.get('error')
+    }
+
+@app.route('/api/plugin/<plugin_id>/matrix', methods=['POST'])
+@login_required
+def build_plugin_matrix(plugin_id):
+    """Compila uma versão do plugin para várias versões do Minecraft (assíncrono: retorna o ID do job)"""
+    plugin = Plugin.query.filter_by(id=plugin_id, user_id=current_user.id).first_or_404()
+    data = request.get_json() or {}
+    
+    # Versão armazenada do plugin (padrão: a mais recente)
+    versions_query = PluginVersion.query.filter_by(plugin_id=plugin.id)
+    if data.get('versionId'):
+        plugin_version = versions_query.filter_by(id=data['versionId']).first()
+    else:
+        plugin_version = versions_query.order_by(PluginVersion.created_at.desc()).first()
+    if not plugin_version or not plugin_version.main_code:
         return jsonify({
-            'success': True,
-            'message': 'Plugin recreated successfully!' if compile_result['success'] else 'Recreation attempted but compilation failed',
-            'plugin_id': original_plugin.id,
-            'compile_status': compile_result['success'],
-            'error': compile_result.get('error')
-        })
-        
-    except Exception as e:
-        print(f"❌ Critical error in recreation: {str(e)}")
-        import traceback
-        traceback.print_exc()
+            'success': False,
+            'error': 'Versão do plugin não encontrada.'
+        }), 404
+    
+    mc_versions = data.get('mcVersions')
+    if not isinstance(mc_versions, list) or not mc_versions:
         return jsonify({
             'success': False,
-            'error': f'Internal error: {str(e)}'
-        }), 500
+            'error': 'Informe a lista de versões do Minecraft em mcVersions.'
+        }), 400
+    mc_versions = list(dict.fromkeys(str(version).strip() for version in mc_versions))
+    unsupported = [version for version in mc_versions if version not in maven_repo.SUPPORTED_MC_VERSIONS]
+    if unsupported:
+        return jsonify({
+            'success': False,
+            'error': f"Versões do Minecraft não suportadas: {', '.join(unsupported)}",
+            'supported_versions': maven_repo.SUPPORTED_MC_VERSIONS
+        }), 400
+    
+    try:
+        compile_scheduler.check_admission()
+    except compile_scheduler.CompileQueueFull as e:
+        print(f"❌ {str(e)}")
+        return compile_queue_full_response(e)
+    
+    job = jobs.create_job(current_user.id, 'matrix', plugin_id=plugin.id)
+    jobs.submit(app, job.id, run_matrix_pipeline, plugin.id, plugin_version.id, mc_versions)
+    print(f"📨 Job de matriz criado: {job.id} ({', '.join(mc_versions)})")
+    
+    return job_accepted_response(job)
+
+def run_matrix_pipeline(job, plugin_id, version_id, mc_versions):
+    """
+    Compila a mesma versão do plugin para cada versão do Minecraft.
+    
+    Cada versão tem o próprio projeto (pom.xml renderizado para ela) e os
+    builds rodam em paralelo, limitados pelos slots do agendador de
+    compilações. Executado em segundo plano pelo job.
+    """
+    plugin = db.session.get(Plugin, plugin_id)
+    plugin_version = db.session.get(PluginVersion, version_id)
+    if plugin is None or plugin_version is None:
+        return {'success': False, 'error': 'Plugin não encontrado'}
+    
+    # As threads de build não usam a sessão do banco: só valores simples
+    plugin_name = plugin.name
+    version_number = plugin_version.version_number
+    package_name = plugin_version.package_name or f'com.pluginforge.{plugin_name.lower()}'
+    main_code = plugin_version.main_code
+    plugin_yml = plugin_version.plugin_yml_content
+    config_yml = plugin_version.config_yml_content
+    
+    def build_target(mc_version):
+        with workspace.matrix_workspace_lock(plugin_id, mc_version) as project_dir:
+            workspace.sync_project(
+                project_dir, plugin_name, version_number, mc_version, package_name,
+                main_code, plugin_yml, config_yml
+            )
+            result = build_project(project_dir, plugin_name, version_number, mc_version)
+            if not result['success']:
+                # Sem `clean`, um JAR de um build anterior ficaria disponível para download
+                (project_dir / "target" / f"{plugin_name}-{version_number}.jar").unlink(missing_ok=True)
+            return result
+    
+    print(f"🧮 Matriz de compatibilidade de '{plugin_name}' {version_number}: {', '.join(mc_versions)}")
+    job.update('compiling', 10)
+    results = {}
+    workers = max(1, min(len(mc_versions), compile_scheduler.COMPILE_SLOTS))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pluginforge-matrix') as executor:
+        futures = {executor.submit(build_target, mc_version): mc_version for mc_version in mc_versions}
+        for future in as_completed(futures):
+            mc_version = futures[future]
+            try:
+                results[mc_version] = future.result()
+            except Exception as e:
+                print(f"❌ Erro ao compilar para Minecraft {mc_version}: {str(e)}")
+                results[mc_version] = {'success': False, 'error': f'Erro interno: {str(e)}'}
+            job.update('compiling', 10 + 80 * len(results) // len(mc_versions))
+    
+    job.update('saving', 95)
+    matrix = []
+    for mc_version in mc_versions:
+        result = results[mc_version]
+        build_metrics.record(plugin_id, mc_version, result, version_id)
+        entry = {
+            'minecraft_version': mc_version,
+            'success': result['success'],
+            'backend': result.get('backend'),
+            'total_ms': result.get('total_ms'),
+            'error': None if result['success'] else result.get('error'),
+            'download_url': f'/api/plugin/{plugin_id}/matrix/{mc_version}/download' if result['success'] else None
+        }
+        if 'retry_after' in result:
+            entry['retry_after'] = result['retry_after']
+        matrix.append(entry)
+    
+    compatible = [entry['minecraft_version'] for entry in matrix if entry['success']]
+    print(f"✅ Matriz concluída: {len(compatible)}/{len(matrix)} versões compilaram")
+    return {
+        'success': True,
+        'plugin_id': plugin_id,
+        'version_id': version_id,
+        'plugin_version': version_number,
+        'matrix': matrix,
+        'compatible_versions': compatible
+    }
+
+@app.route('/api/plugin/<plugin_id>/matrix/<mc_version>/download')
+@login_required
+def download_matrix_build(plugin_id, mc_version):
+    """Download do JAR compilado para uma versão da matriz de compatibilidade"""
+    plugin = Plugin.query.filter_by(id=plugin_id, user_id=current_user.id).first_or_404()
+    if mc_version not in maven_repo.SUPPORTED_MC_VERSIONS:
+        return jsonify({'error': 'Versão do Minecraft não suportada'}), 404
+    
+    target_dir = plugin_workspace_dir(plugin.id, mc_version) / "target"
+    jars = sorted(target_dir.glob('*.jar')) if target_dir.exists() else []
+    if not jars:
+        return jsonify({'error': 'Nenhum JAR compilado para esta versão do Minecraft'}), 404
+    
+    jar_path = jars[0]
+    return send_jar(jar_path, f"{jar_path.stem}-mc{mc_version}.jar")
 
 # ========================================
 # FUNÇÕES AUXILIARES (mantidas do código original)
 # ========================================
 
-def call_ai_api(prompt):
-    """Chama a API da IA para gerar código"""
+def ai_payload(prompt, stream=False):
+    """Corpo da requisição de chat completion para um prompt"""
+    system_prompt = "Você é um especialista em desenvolvimento de plugins Minecraft Spigot. Sempre retorne código em formato JSON."
+    return {
+        'model': ai_client.API_MODEL,
+        'messages': [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': prompt}
+        ],
+        'temperature': 0.7,
+        'max_tokens': 4096,
+        'stream': stream
+    }
+
+def clean_ai_content(content):
+    """Remove espaços e a cerca de código (```json ... ```) da resposta da IA"""
+    content = content.strip()
+    if content.startswith('```json'):
+        content = content[7:]
+    elif content.startswith('```'):
+        content = content[3:]
+    
+    if content.endswith('```'):
+        content = content[:-3]
+    return content.strip()
+
+def ai_cache_key(prompt, user_id):
+    """Chave do cache de respostas para o prompt (None se o usuário desativou o cache)"""
+    if not ai_cache.enabled_for(db.session.get(User, user_id)):
+        return None
+    return ai_cache.compute_key(ai_payload(prompt))
+
+def ai_result_content(result):
+    """Texto da resposta de chat completion (sem a cerca de código), ou None"""
+    choices = result.get('choices') or []
+    if choices and 'content' in (choices[0].get('message') or {}):
+        return clean_ai_content(choices[0]['message']['content'] or '')
+    return None
+
+def is_json_reply(result):
+    """A resposta da IA traz um objeto JSON (formato pedido pelos pipelines de geração)"""
+    content = ai_result_content(result)
     try:
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {API_KEY}',
-            'HTTP-Referer': 'https://pluginforge.studio',
-            'X-Title': 'PluginForge Studio'
-        }
-        
-        system_prompt = "Você é um especialista em desenvolvimento de plugins Minecraft Spigot. Sempre retorne código em formato JSON."
-        
-        payload = {
-            'model': API_MODEL,
-            'messages': [
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': prompt}
-            ],
-            'temperature': 0.7,
-            'max_tokens': 4096,
-            'stream': False
-        }
-        
-        print(f"🚀 Chamando API OpenRouter - Modelo: {API_MODEL}")
-        print(f"🔑 API Key: {API_KEY[:20]}...")
+        return content is not None and isinstance(json.loads(content), dict)
+    except ValueError:
+        return False
+
+def call_ai_api(prompt, cache_key=None, expect_json=False):
+    """
+    Chama a API da IA para gerar código (sessão persistente com retries, hedge e failover, veja ai_client).
+    
+    Com cache_key, uma resposta já validada para o mesmo prompt é devolvida
+    do cache de respostas sem chamar a API; quem chama guarda a resposta
+    com ai_cache.store depois de validá-la.
+    
+    Com expect_json, uma resposta que não é um objeto JSON conta como falha
+    do modelo e a chamada passa para o próximo modelo configurado.
+    
+    Returns:
+        tuple: (texto da resposta ou None, modelo que respondeu ou None)
+    """
+    if cache_key:
+        cached_response = ai_cache.lookup(cache_key)
+        if cached_response is not None:
+            # O cache só guarda respostas do modelo principal
+            return cached_response, ai_client.API_MODEL
+    
+    try:
+        print(f"🚀 Chamando API OpenRouter - Modelo: {ai_client.API_MODEL}")
         
-        response = requests.post(API_ENDPOINT, headers=headers, json=payload, timeout=60)
+        result = ai_client.post_chat(ai_payload(prompt), validate=is_json_reply if expect_json else None)
+        if result is None:
+            return None, None
         
-        print(f"📊 Status Code: {response.status_code}")
+        content = ai_result_content(result)
+        if content is not None:
+            print(f"✅ Resposta da IA recebida ({result.get('model')}): {len(content)} caracteres")
+            return content, result.get('model')
         
-        if response.status_code == 200:
-            result = response.json()
+        if not result.get('choices'):
+            print(f"❌ Resposta da API não contém choices: {result}")
+        return None, None
             
-            if 'choices' in result and len(result['choices']) > 0:
-                choice = result['choices'][0]
-                
-                if 'message' in choice and 'content' in choice['message']:
-                    content = choice['message']['content']
-                    
-                    # Limpa a resposta
-                    content = content.strip()
-                    if content.startswith('```json'):
-                        content = content[7:]
-                    elif content.startswith('```'):
-                        content = content[3:]
-                    
-                    if content.endswith('```'):
-                        content = content[:-3]
-                    
-                    print(f"✅ Resposta da IA recebida: {len(content)} caracteres")
-                    return content.strip()
-            else:
-                print(f"❌ Resposta da API não contém choices: {result}")
-        else:
-            print(f"❌ Erro da API - Status: {response.status_code}")
-            print(f"❌ Resposta da API: {response.text}")
-                    
-        return None
-            
-    except requests.exceptions.Timeout:
-        print("❌ Timeout: API demorou mais de 60 segundos para responder")
-        return None
-    except requests.exceptions.ConnectionError:
-        print("❌ Erro de conexão: Não foi possível conectar com a API")
-        return None
     except Exception as e:
         print(f"❌ Erro inesperado ao chamar API: {str(e)}")
         import traceback
         traceback.print_exc()
-        return None
-
-def compile_with_maven(project_dir):
+        return None, None
+
+def get_resource_properties(plugin_name, plugin_version):
+    """Propriedades do pom.xml usadas para filtrar os resources (ex: ${project.version})"""
+    return {
+        'project.groupId': 'com.pluginforge',
+        'project.artifactId': plugin_name,
+        'project.name': plugin_name,
+        'project.version': plugin_version,
+        'project.description': 'Plugin gerado automaticamente pelo PluginForge Studio',
+        'project.build.sourceEncoding': 'UTF-8',
+        'name': plugin_name,
+        'version': plugin_version,
+    }
+
+def build_project(project_dir, plugin_name, plugin_version, mc_version, on_queue_position=None):
     """
-    Compila o projeto Maven usando múltiplos métodos para garantir compatibilidade.
+    Compila o projeto do plugin pelo caminho mais rápido disponível.
+    
+    Entradas idênticas (fontes, resources, pom.xml e parâmetros) são
+    atendidas pelo cache de builds sem compilar. Sem acerto no cache, os
+    imports e referências à spigot-api são conferidos no índice de símbolos
+    (recusando na hora o que não compilaria) e a ordem de tentativa é:
+    1. Servidor de compilação (JVM aquecida)
+    2. Build rápido (javac + zipfile)
+    3. Maven (fallback para tudo que os caminhos rápidos não suportam)
+    
+    Os caminhos rápidos só são usados quando o classpath da spigot-api da
+    versão do Minecraft já está em cache. Builds que não vêm do cache
+    esperam um slot do agendador de compilações.
     
     Args:
         project_dir (Path): Diretório do projeto Maven
+        plugin_name (str): Nome do plugin
+        plugin_version (str): Versão do plugin
+        mc_version (str): Versão do Minecraft
+        on_queue_position (callable): Recebe a posição na fila enquanto espera um slot
         
     Returns:
-        dict: {'success': bool, 'error': str}
+        dict: {'success': bool, 'error': str, 'backend': str, 'timings': dict, 'total_ms': int}
     """
+    jar_path = project_dir / "target" / f"{plugin_name}-{plugin_version}.jar"
+    timer = build_metrics.BuildTimer()
     
-    # Lista de possíveis caminhos para o Maven (ordenado por preferência)
-    maven_commands = [
-        # Windows - comandos que funcionam na prática
-        'mvn.cmd',                                # CMD extension (Windows)
-        'mvn',                                    # PATH padrão
-        'C:\\apache-maven-3.9.11\\bin\\mvn.cmd', # Apache Maven 3.9.11 (Windows)
-        # macOS paths
-        '/usr/local/bin/mvn',                     # Homebrew (macOS)
-        '/opt/homebrew/bin/mvn',                  # Homebrew ARM (macOS)
-        # Linux paths
-        '/usr/bin/mvn',                           # APT (Linux)
-        '/opt/maven/bin/mvn',                     # Maven manual (Linux)
-        '/snap/bin/mvn',                          # Snap (Linux)
-        str(Path.home() / 'maven/bin/mvn'),       # Maven instalado em home
-        # Windows Program Files (menos comum)
-        'C:\\Program Files\\Apache\\Maven\\bin\\mvn.cmd',
-        'C:\\Program Files\\Maven\\bin\\mvn.cmd',
-        # Alternative Windows paths
-        str(Path('C:/Program Files/Apache/Maven/bin/mvn.cmd')),
-        str(Path('C:/Program Files/Maven/bin/mvn.cmd')),
-    ]
-    
-    print(f"🔍 Procurando Maven em: {len(maven_commands)} localizações...")
+    with timer.stage('cache_lookup'):
+        cache_key = build_cache.compute_key(project_dir, plugin_name, plugin_version, mc_version)
+        cached_result = build_cache.lookup(cache_key, jar_path)
+    if cached_result is not None:
+        return finish_build(cached_result, timer, 'cache')
     
-    # Método 1: Tenta executar Maven diretamente
-    maven_executable = find_maven_executable(maven_commands)
+    with timer.stage('symbol_check'):
+        diagnostics = symbol_index.check_project(project_dir, mc_version)
+    if diagnostics:
+        # Import ou símbolo inexistente: o compilador falharia, não ocupa um slot
+        print(f"❌ Verificação de símbolos: {len(diagnostics)} erro(s)")
+        result = {'success': False, 'error': compile_server.format_diagnostics(diagnostics), 'diagnostics': diagnostics}
+        return finish_build(result, timer, 'symbol_index')
     
-    if maven_executable:
-        print(f"✅ Maven encontrado: {maven_executable}")
-        return execute_maven_compilation(maven_executable, project_dir)
+    wait_start = time.monotonic()
+    try:
+        with compile_scheduler.compile_slot(on_position=on_queue_position):
+            timer.add('queue_wait', (time.monotonic() - wait_start) * 1000)
+            result = compile_project(project_dir, jar_path, plugin_name, plugin_version, mc_version, timer)
+    except compile_scheduler.CompileQueueFull as e:
+        print(f"❌ {str(e)}")
+        return {'success': False, 'error': str(e), 'retry_after': e.retry_after}
+    except compile_scheduler.CompileQueueTimeout as e:
+        print(f"❌ {str(e)}")
+        timer.add('queue_wait', (time.monotonic() - wait_start) * 1000)
+        return finish_build({'success': False, 'error': str(e)}, timer, 'none')
     
-    # Método 2: Tenta usar Maven via Docker
-    print("🐳 Maven não encontrado localmente, tentando via Docker...")
-    return compile_with_maven_docker(project_dir)
+    build_cache.store(cache_key, result, jar_path)
+    return finish_build(result, timer, 'none')
+
+def finish_build(result, timer, backend):
+    """Anexa ao resultado o backend usado e o tempo de cada etapa (e resume o erro)"""
+    if not result.get('success') and result.get('error'):
+        # O erro completo fica no log; o resultado leva só o resumo
+        result.setdefault('log', result['error'])
+        result['error'] = build_logs.summarize(result.get('diagnostics'), result['error'])
+    timer.merge(result.pop('timings', None))
+    result.setdefault('backend', backend)
+    result['timings'] = timer.stages
+    result['total_ms'] = timer.total_ms()
+    print(f"⏱️ Build ({result['backend']}) em {result['total_ms']} ms: {timer.stages}")
+    return result
+
+def record_build(plugin_id, mc_version, result, plugin_version_id=None):
+    """Grava métricas, log comprimido e diagnósticos de um build"""
+    build_metrics.record(plugin_id, mc_version, result, plugin_version_id)
+    build_logs.record(plugin_id, result, plugin_version_id)
+
+def store_build_artifact(compile_result, project_dir, plugin_name, plugin_version):
+    """
+    Guarda o JAR de um build bem-sucedido no repositório de artefatos.
+    
+    Deve ser chamado com o lock do workspace: outro build poderia
+    reescrever o JAR em target/ logo em seguida.
+    
+    Returns:
+        str: SHA-256 do artefato, ou None se o build falhou
+    """
+    if not compile_result['success']:
+        return None
+    return artifact_store.store(project_dir / "target" / f"{plugin_name}-{plugin_version}.jar")
+
+def compile_project(project_dir, jar_path, plugin_name, plugin_version, mc_version, timer=None):
+    """Compila sem consultar o cache (servidor de compilação → javac → Maven)"""
+    timer = timer or build_metrics.BuildTimer()
+    if compile_server.COMPILE_SERVER_ENABLED or fast_build.FAST_BUILD_ENABLED:
+        with timer.stage('toolchain_lookup'):
+            classpath = get_api_classpath(mc_version)
+            maven_executable = None
+            if classpath is None and not maven_repo.check_offline_ready(mc_version):
+                maven_executable = find_maven_executable(MAVEN_COMMANDS)
+        if maven_executable:
+            with timer.stage('dependency_resolution'):
+                classpath = resolve_api_classpath(
+                    maven_executable,
+                    project_dir,
+                    mc_version,
+                    extra_args=maven_repo.get_maven_args(mc_version)
+                )
+        
+        if classpath is not None:
+            properties = get_resource_properties(plugin_name, plugin_version)
+            
+            result = compile_server.compile_project(project_dir, jar_path, classpath, properties)
+            if result is not None:
+                return result
+            
+            result = fast_build.build_with_javac(project_dir, jar_path, classpath, properties)
+            if result is not None:
+                return result
+    
+    return compile_with_maven(project_dir, mc_version, timer)
 
-def find_maven_executable(commands):
+def compile_with_maven(project_dir, mc_version=None, timer=None):
     """
-    Procura pelo executável Maven em várias localizações.
+    Compila o projeto Maven usando múltiplos métodos para garantir compatibilidade.
+    
+    Os builds rodam offline contra o repositório Maven gerenciado; versões
+    do Minecraft ainda não preparadas falham imediatamente.
     
     Args:
-        commands (list): Lista de comandos Maven para testar
+        project_dir (Path): Diretório do projeto Maven
+        mc_version (str): Versão do Minecraft do projeto
+        timer (BuildTimer): Recebe o tempo da busca pelo Maven
         
     Returns:
-        str: Caminho do Maven encontrado ou None
+        dict: {'success': bool, 'error': str, 'backend': str, 'timings': dict}
     """
-    print(f"🔍 Testando {len(commands)} comandos Maven...")
+    timer = timer or build_metrics.BuildTimer()
     
-    for i, cmd in enumerate(commands, 1):
-        try:
-            print(f"   [{i}/{len(commands)}] Testando: {cmd}")
-            # Testa se o comando existe e funciona
-            result = subprocess.run(
-                [cmd, '--version'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                version_info = result.stdout.strip() if result.stdout else "Unknown version"
-                print(f"✅ Maven encontrado: {cmd}")
-                print(f"   📦 Versão: {version_info}")
-                return cmd
-            else:
-                print(f"   ❌ Comando falhou (código: {result.returncode})")
-        except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError) as e:
-            print(f"   ❌ Erro ao testar {cmd}: {str(e)}")
-        except Exception as e:
-            print(f"   ❌ Erro inesperado com {cmd}: {str(e)}")
+    offline_error = maven_repo.check_offline_ready(mc_version) if mc_version else None
+    if offline_error:
+        print(f"❌ {offline_error}")
+        return {'success': False, 'error': offline_error}
     
-    print("❌ Nenhum executável Maven foi encontrado!")
-    return None
+    print(f"🔍 Procurando Maven em: {len(MAVEN_COMMANDS)} localizações...")
+    
+    # Método 1: Tenta executar Maven diretamente
+    with timer.stage('toolchain_lookup'):
+        maven_executable = find_maven_executable(MAVEN_COMMANDS)
+    
+    if maven_executable:
+        print(f"✅ Maven encontrado: {maven_executable}")
+        return execute_maven_compilation(maven_executable, project_dir, mc_version)
+    
+    # Método 2: Tenta usar Maven via Docker
+    print("🐳 Maven não encontrado localmente, tentando via Docker...")
+    return compile_with_maven_docker(project_dir, mc_version, timer)
 
-def execute_maven_compilation(maven_cmd, project_dir):
+def execute_maven_compilation(maven_cmd, project_dir, mc_version=None):
     """
     Executa a compilação Maven usando o comando encontrado.
     
     Args:
         maven_cmd (str): Comando Maven para executar
         project_dir (Path): Diretório do projeto
+        mc_version (str): Versão do Minecraft do projeto
         
     Returns:
         dict: {'success': bool, 'error': str}
@@ -1499,35 +2087,42 @@ def execute_maven_compilation(maven_cmd, project_dir):
         print(f"📂 Diretório de trabalho: {project_dir}")
         print(f"📄 Arquivo pom.xml: {pom_file}")
         
-        # Executa o Maven
+        # Executa o Maven (sem clean: o workspace é persistente e o build é incremental)
+        # Log com horário para medir o tempo de cada plugin do ciclo de vida
+        start = time.monotonic()
         result = subprocess.run(
-            [maven_cmd, 'clean', 'install'],
+            [maven_cmd, *maven_repo.get_maven_args(mc_version), *build_metrics.MAVEN_TIMESTAMP_ARGS, 'package'],
             cwd=project_dir,
             capture_output=True,
             text=True,
             timeout=300  # Timeout de 5 minutos
         )
+        timings = build_metrics.parse_maven_timings(result.stdout, (time.monotonic() - start) * 1000)
+        
+        # Log completo (vai comprimido para build_logs/) e diagnósticos estruturados
+        full_log = "\n\n".join(part for part in (result.stdout, result.stderr) if part)
+        diagnostics = build_logs.parse_maven_output(full_log)
         
         if result.returncode == 0:
             print("✅ Compilação Maven concluída com sucesso!")
-            if result.stdout:
-                print(f"📤 Output Maven:\n{result.stdout}")
-            return {'success': True, 'error': None}
+            return {'success': True, 'error': None, 'diagnostics': diagnostics, 'log': full_log,
+                    'backend': 'maven', 'timings': timings}
         else:
-            # Mostrar detalhes completos do erro
-            error_details = []
-            if result.stderr:
-                error_details.append(f"❌ ERRO STDERR:\n{result.stderr}")
-            if result.stdout:
-                error_details.append(f"📤 STDOUT:\n{result.stdout}")
-            if not result.stderr and not result.stdout:
-                error_details.append("❌ Nenhum output de erro capturado")
+            if not full_log:
+                full_log = "❌ Nenhum output de erro capturado"
             
-            error_msg = f"Erro na compilação Maven:\n" + "\n\n".join(error_details)
+            error_msg = build_logs.summarize(
+                diagnostics,
+                f"Erro na compilação Maven: {build_logs.first_error_line(full_log) or full_log.strip()[:300]}"
+            )
             print(f"❌ {error_msg}")
             return {
                 'success': False,
-                'error': error_msg
+                'error': error_msg,
+                'diagnostics': diagnostics,
+                'log': full_log,
+                'backend': 'maven',
+                'timings': timings
             }
             
     except subprocess.TimeoutExpired:
@@ -1537,7 +2132,9 @@ def execute_maven_compilation(maven_cmd, project_dir):
     except FileNotFoundError as e:
         error_msg = f'Arquivo ou comando não encontrado: {str(e)}. Verifique se Maven está instalado corretamente.'
         print(f"❌ {error_msg}")
-        print(f"💡 Comandos Maven testados: {maven_commands}")
+        print(f"💡 Comandos Maven testados: {MAVEN_COMMANDS}")
+        # O executável em cache não existe mais: procura de novo no próximo build
+        toolchain.invalidate('maven')
         return {'success': False, 'error': error_msg}
     except PermissionError as e:
         error_msg = f'Erro de permissão: {str(e)}. Execute como administrador ou verifique permissões de pasta.'
@@ -1548,44 +2145,73 @@ def execute_maven_compilation(maven_cmd, project_dir):
         print(f"❌ {error_msg}")
         return {'success': False, 'error': error_msg}
 
-def compile_with_maven_docker(project_dir):
+def compile_with_maven_docker(project_dir, mc_version=None, timer=None):
     """
     Compila o projeto Maven usando Docker como fallback.
     
     Args:
         project_dir (Path): Diretório do projeto Maven
+        mc_version (str): Versão do Minecraft do projeto
+        timer (BuildTimer): Recebe o tempo da verificação do Docker
         
     Returns:
-        dict: {'success': bool, 'error': str}
+        dict: {'success': bool, 'error': str, 'backend': str, 'timings': dict}
     """
+    timer = timer or build_metrics.BuildTimer()
+    
+    # Decisão sobre o Docker fica em cache (evita testar o daemon a cada build)
+    with timer.stage('toolchain_lookup'):
+        docker_ok = toolchain.docker_available()
+    if not docker_ok:
+        error_msg = 'Maven não encontrado e Docker indisponível. Instale o Maven localmente ou o Docker.'
+        print(f"❌ {error_msg}")
+        return {'success': False, 'error': error_msg}
+    
     try:
         print("🐳 Tentando compilação via Docker...")
         
-        # Comando Docker para Maven
+        # Comando Docker para Maven (repositório gerenciado montado em /m2)
+        offline_args = ['-o'] if maven_repo.MAVEN_OFFLINE and maven_repo.is_seeded(mc_version) else ['-nsu']
+        maven_repo.MAVEN_REPO_DIR.mkdir(parents=True, exist_ok=True)
         docker_cmd = [
             'docker', 'run', '--rm',
             '-v', f'{project_dir}:/workspace',
+            '-v', f'{maven_repo.MAVEN_REPO_DIR}:/m2',
             '-w', '/workspace',
             'maven:3.9-eclipse-temurin-17-alpine',
-            'mvn', 'clean', 'install'
+            'mvn', '-B', '-Dmaven.repo.local=/m2', *offline_args, *build_metrics.MAVEN_TIMESTAMP_ARGS, 'package'
         ]
         
+        start = time.monotonic()
         result = subprocess.run(
             docker_cmd,
             capture_output=True,
             text=True,
             timeout=300
         )
+        timings = build_metrics.parse_maven_timings(result.stdout, (time.monotonic() - start) * 1000)
+        
+        full_log = "\n\n".join(part for part in (result.stdout, result.stderr) if part)
+        diagnostics = build_logs.parse_maven_output(full_log)
         
         if result.returncode == 0:
             print("✅ Compilação Docker Maven concluída com sucesso!")
-            return {'success': True, 'error': None}
+            return {'success': True, 'error': None, 'diagnostics': diagnostics, 'log': full_log,
+                    'backend': 'docker', 'timings': timings}
         else:
-            error_msg = f"Erro na compilação Docker:\n{result.stderr}"
-            print(f"❌ Erro na compilação Docker: {error_msg}")
+            error_msg = build_logs.summarize(
+                diagnostics,
+                f"Erro na compilação Docker: {build_logs.first_error_line(full_log) or full_log.strip()[:300]}"
+            )
+            print(f"❌ {error_msg}")
+            print("💡 Dica: Instale o Maven localmente para compilar mais rápido.")
             return {
                 'success': False,
-                'error': f"{error_msg}\n\n💡 Dica: Instale o Maven localmente para compilar mais rápido."
+                'error': error_msg,
+                'diagnostics': diagnostics,
+                'log': full_log,
+                'backend': 'docker',
+                'timings': timings
             }
             
     except subprocess.TimeoutExpired:
@@ -1595,16 +2221,144 @@ def compile_with_maven_docker(project_dir):
     except FileNotFoundError:
         error_msg = 'Docker não está instalado. Instale o Maven localmente ou o Docker.'
         print(f"❌ {error_msg}")
+        toolchain.invalidate('docker')
         return {'success': False, 'error': error_msg}
     except Exception as e:
         error_msg = f'Erro inesperado na compilação Docker: {str(e)}'
         print(f"❌ {error_msg}")
         return {'success': False, 'error': error_msg}
 
+# ========================================
+# ROTAS DE ADMINISTRAÇÃO
+# ========================================
+
+@app.route('/api/admin/toolchain', methods=['GET'])
+@admin_required
+def admin_toolchain():
+    """Mostra as ferramentas de build ativas (Maven, Docker, Java, servidor de compilação)"""
+    # Resolve agora (usa o cache) para mostrar o estado que os builds vão usar
+    find_maven_executable(MAVEN_COMMANDS)
+    
+    return jsonify({
+        'success': True,
+        'toolchain': toolchain.describe_toolchain(),
+        'compile_server': compile_server.status(),
+        'fast_build_enabled': fast_build.FAST_BUILD_ENABLED,
+        'symbol_index': symbol_index.status(),
+        'scratch_builds': {
+            'enabled': workspace.SCRATCH_BUILDS,
+            'path': str(workspace.SCRATCH_DIR)
+        },
+        'maven_repository': {
+            'path': str(maven_repo.MAVEN_REPO_DIR),
+            'offline': maven_repo.MAVEN_OFFLINE,
+            'seeded_versions': maven_repo.seeded_versions()
+        }
+    })
+
+@app.route('/api/admin/artifacts', methods=['GET'])
+@admin_required
+def admin_artifacts():
+    """Estatísticas do repositório de artefatos (JARs, referências, tamanho)"""
+    return jsonify({
+        'success': True,
+        'artifacts': artifact_store.get_stats()
+    })
+
+@app.route('/api/admin/workspace-gc', methods=['GET'])
+@admin_required
+def admin_workspace_gc():
+    """Métricas do coletor de workspaces (execuções, árvores apagadas, bytes recuperados)"""
+    return jsonify({
+        'success': True,
+        'workspace_gc': workspace_gc.get_stats()
+    })
+
+@app.route('/api/admin/workspace-gc', methods=['POST'])
+@admin_required
+def admin_run_workspace_gc():
+    """Executa o coletor de workspaces agora (dryRun=true só simula)"""
+    data = request.get_json(silent=True) or {}
+    result = workspace_gc.collect(dry_run=bool(data.get('dryRun')))
+    return jsonify({
+        'success': True,
+        'result': result
+    })
+
+@app.route('/api/admin/ai-client', methods=['GET'])
+@admin_required
+def admin_ai_client():
+    """Métricas das chamadas à API de IA (latência, retries, resultados, limitador)"""
+    return jsonify({
+        'success': True,
+        'ai_client': ai_client.get_stats()
+    })
+
+@app.route('/api/admin/ai-cache', methods=['GET'])
+@admin_required
+def admin_ai_cache():
+    """Estatísticas do cache de respostas da IA (taxa de acerto, tamanho)"""
+    return jsonify({
+        'success': True,
+        'ai_cache': ai_cache.get_stats()
+    })
+
+@app.route('/api/admin/build-cache', methods=['GET'])
+@admin_required
+def admin_build_cache():
+    """Estatísticas do cache de builds (acertos, falhas, tamanho)"""
+    return jsonify({
+        'success': True,
+        'build_cache': build_cache.get_stats()
+    })
+
+@app.route('/api/admin/build-metrics', methods=['GET'])
+@admin_required
+def admin_build_metrics():
+    """Percentis (p50/p95/p99) do tempo de build por versão do Minecraft e backend"""
+    days = request.args.get('days', 30, type=int)
+    return jsonify({
+        'success': True,
+        'days': days,
+        'build_metrics': build_metrics.summarize(
+            days=days,
+            mc_version=request.args.get('mc_version'),
+            backend=request.args.get('backend')
+        )
+    })
+
+@app.route('/api/admin/compile-queue', methods=['GET'])
+@admin_required
+def admin_compile_queue():
+    """Slots de compilação ocupados e tamanho da fila"""
+    return jsonify({
+        'success': True,
+        'compile_queue': compile_scheduler.get_status()
+    })
+
 # ========================================
 # SUBSCRIPTION MANAGEMENT ROUTES
 # ========================================
 
+@app.route('/api/profile/ai-cache', methods=['POST'])
+@login_required
+def update_ai_cache_preference():
+    """Ativa ou desativa o reaproveitamento de respostas da IA em cache para o usuário"""
+    data = request.get_json(silent=True) or {}
+    enabled = data.get('enabled')
+    if not isinstance(enabled, bool):
+        return jsonify({
+            'success': False,
+            'error': 'enabled must be true or false'
+        }), 400
+    
+    current_user.ai_cache_opt_out = not enabled
+    db.session.commit()
+    return jsonify({
+        'success': True,
+        'ai_cache_enabled': enabled
+    })
+
 @app.route('/api/subscription/upgrade', methods=['POST'])
 @login_required
 def upgrade_subscription():
@@ -1696,6 +2450,17 @@ def cancel_subscription():
 with app.app_context():
     init_db(app)
 
+# Preparar repositório Maven offline em segundo plano (opcional, e sempre que
+# nenhuma versão foi preparada ainda: deploy sem python seed_maven_repo.py)
+if maven_repo.MAVEN_SEED_ON_STARTUP or (maven_repo.MAVEN_OFFLINE and not maven_repo.seeded_versions()):
+    maven_repo.seed_in_background(find_maven_executable(MAVEN_COMMANDS))
+
+# Coletor de workspaces (cotas de disco, LRU) em segundo plano
+workspace_gc.start_background_collector(app)
+
+# Conexão com a API de IA aberta antes da primeira geração
+ai_client.start_warmup()
+
 if __name__ == '__main__':
     print("🚀 PluginForge Studio iniciado com sistema completo!")
     print("📍 Acesse: http://localhost:5002")
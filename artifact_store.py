@@ -0,0 +1,222 @@
+"""
+Repositório de artefatos do PluginForge Studio
+Os JARs compilados ficam fora dos workspaces, endereçados pelo SHA-256 do
+conteúdo: JARs idênticos são guardados uma única vez e o banco conta quantos
+Plugin/PluginVersion apontam para cada um.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from datetime import datetime, UTC, timedelta
+from pathlib import Path
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Artifact, Plugin
+from storage import ARTIFACTS_DIR, iter_workspace_trees
+
+# Artefatos sem referências são apagados após este intervalo (segundos)
+ARTIFACT_GRACE_SECONDS = int(os.getenv('ARTIFACT_GRACE_SECONDS', '3600'))
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def artifact_path(sha256):
+    """Arquivo de um artefato (artifacts/ab/abcdef....jar)"""
+    return ARTIFACTS_DIR / sha256[:2] / f"{sha256}.jar"
+
+
+def hash_file(path):
+    """SHA-256 do conteúdo de um arquivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store(jar_path):
+    """
+    Guarda um JAR no repositório (se ainda não houver um idêntico).
+
+    O registro Artifact é criado com zero referências; quem passa a apontar
+    para o artefato chama retain() na mesma transação.
+
+    Args:
+        jar_path (Path): JAR recém-compilado
+
+    Returns:
+        str: SHA-256 do artefato, ou None se o JAR não existir
+    """
+    try:
+        sha256 = hash_file(jar_path)
+    except OSError as e:
+        print(f"❌ JAR não encontrado para o repositório de artefatos: {str(e)}")
+        return None
+
+    path = artifact_path(sha256)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Cópia (não hard link): os builds reescrevem o JAR do workspace no lugar
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        shutil.copyfile(jar_path, tmp_path)
+        os.replace(tmp_path, path)
+        print(f"📦 Artefato armazenado: {sha256[:12]} ({path.stat().st_size} bytes)")
+
+    if db.session.get(Artifact, sha256) is None:
+        try:
+            # Outro worker pode registrar o mesmo JAR ao mesmo tempo
+            with db.session.begin_nested():
+                db.session.add(Artifact(sha256=sha256, size=path.stat().st_size, ref_count=0))
+        except IntegrityError:
+            pass
+    return sha256
+
+
+def retain(sha256):
+    """Soma uma referência ao artefato (commit fica a cargo de quem chama)"""
+    if sha256:
+        Artifact.query.filter_by(sha256=sha256).update(
+            {Artifact.ref_count: Artifact.ref_count + 1, Artifact.updated_at: datetime.now(UTC)},
+            synchronize_session=False
+        )
+
+
+def release(sha256):
+    """Remove uma referência; o arquivo é apagado depois por collect()"""
+    if sha256:
+        Artifact.query.filter(Artifact.sha256 == sha256, Artifact.ref_count > 0).update(
+            {Artifact.ref_count: Artifact.ref_count - 1, Artifact.updated_at: datetime.now(UTC)},
+            synchronize_session=False
+        )
+
+
+def set_plugin_artifact(plugin, sha256):
+    """Aponta o plugin para um novo JAR, transferindo a referência"""
+    if plugin.artifact_sha256 == sha256:
+        return
+    retain(sha256)
+    release(plugin.artifact_sha256)
+    plugin.artifact_sha256 = sha256
+
+
+def plugin_jar_path(plugin):
+    """JAR atual do plugin: no repositório, ou o caminho antigo no workspace"""
+    if plugin.artifact_sha256:
+        return artifact_path(plugin.artifact_sha256)
+    if plugin.compiled_file and Path(plugin.compiled_file).is_absolute():
+        return Path(plugin.compiled_file)
+    return None
+
+
+def adopt_jar(plugin, jar_path):
+    """
+    Guarda no repositório o JAR de um plugin anterior ao repositório de artefatos.
+
+    Returns:
+        bool: True se o plugin passou a apontar para o artefato
+    """
+    sha256 = store(jar_path)
+    if not sha256:
+        return False
+    set_plugin_artifact(plugin, sha256)
+    plugin.compiled_file = Path(jar_path).name
+    return True
+
+
+def backfill_legacy_plugins():
+    """
+    Indexa os plugins compilados antes do repositório de artefatos.
+
+    Usa o caminho em compiled_file e, para os que não o têm, procura uma
+    única vez no workspace o diretório do plugin (ou um antigo com o ID no nome).
+
+    Returns:
+        dict: {'indexed': quantidade, 'missing': IDs sem JAR encontrado}
+    """
+    plugins = {
+        plugin.id: plugin
+        for plugin in Plugin.query.filter(Plugin.artifact_sha256.is_(None), Plugin.status == 'compiled').all()
+    }
+    jars = {}
+    for plugin in plugins.values():
+        jar_path = plugin_jar_path(plugin)
+        if jar_path is not None and jar_path.is_file():
+            jars[plugin.id] = jar_path
+
+    if len(jars) < len(plugins):
+        for kind, plugin_id, _mc_version, entry in iter_workspace_trees():
+            if kind == 'matrix' or plugin_id not in plugins or plugin_id in jars:
+                continue
+            plugin = plugins[plugin_id]
+            expected = entry / "target" / Path(plugin.compiled_file or f"{plugin.name}-{plugin.version}.jar").name
+            if expected.is_file():
+                jars[plugin_id] = expected
+
+    indexed = 0
+    for plugin_id, jar_path in jars.items():
+        if adopt_jar(plugins[plugin_id], jar_path):
+            indexed += 1
+    db.session.commit()
+
+    missing = sorted(set(plugins) - set(jars))
+    print(f"📇 Artefatos indexados: {indexed} plugins ({len(missing)} sem JAR encontrado)")
+    return {'indexed': indexed, 'missing': missing}
+
+
+def collect(grace_seconds=ARTIFACT_GRACE_SECONDS):
+    """
+    Apaga os artefatos sem referências há mais de grace_seconds.
+
+    O intervalo protege JARs recém-armazenados cuja referência ainda não
+    foi gravada por outro worker.
+
+    Returns:
+        dict: {'artifacts': quantidade apagada, 'bytes': espaço liberado}
+    """
+    cutoff = datetime.now(UTC) - timedelta(seconds=grace_seconds)
+    removed, reclaimed = 0, 0
+
+    for artifact in Artifact.query.filter(Artifact.ref_count <= 0, Artifact.updated_at < cutoff).all():
+        path = artifact_path(artifact.sha256)
+        try:
+            reclaimed += path.stat().st_size
+            path.unlink()
+        except OSError:
+            pass
+        db.session.delete(artifact)
+        removed += 1
+    db.session.commit()
+
+    # Arquivos sem registro (ex: worker interrompido entre a cópia e o commit)
+    known = {sha256 for (sha256,) in db.session.query(Artifact.sha256)}
+    for path in ARTIFACTS_DIR.glob('*/*.jar'):
+        try:
+            if path.stem not in known and path.stat().st_mtime < cutoff.timestamp():
+                reclaimed += path.stat().st_size
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+
+    if removed:
+        print(f"🧹 Artefatos removidos: {removed} ({reclaimed} bytes)")
+    return {'artifacts': removed, 'bytes': reclaimed}
+
+
+def get_stats():
+    """Estatísticas do repositório (artefatos, referências, tamanho)"""
+    count, size, references = db.session.query(
+        func.count(Artifact.sha256), func.coalesce(func.sum(Artifact.size), 0), func.coalesce(func.sum(Artifact.ref_count), 0)
+    ).one()
+    unreferenced = Artifact.query.filter(Artifact.ref_count <= 0).count()
+    return {
+        'path': str(ARTIFACTS_DIR),
+        'artifacts': count,
+        'size_bytes': int(size),
+        'references': int(references),
+        'unreferenced': unreferenced,
+    }
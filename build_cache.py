@@ -0,0 +1,260 @@
+"""
+Cache de builds do PluginForge Studio
+Resultados de compilação endereçados pelo conteúdo (hash dos fontes, resources,
+pom.xml renderizado e parâmetros do plugin). Um acerto devolve o JAR guardado
+sem compilar; falhas de código também ficam em cache.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from storage import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Configurações
+BUILD_CACHE_ENABLED = os.getenv('BUILD_CACHE_ENABLED', 'true').lower() == 'true'
+BUILD_CACHE_MAX_BYTES = int(os.getenv('BUILD_CACHE_MAX_MB', '512')) * 1024 * 1024
+BUILD_CACHE_MAX_ENTRIES = int(os.getenv('BUILD_CACHE_MAX_ENTRIES', '5000'))
+
+BUILD_CACHE_DIR = CACHE_DIR / "builds"
+STATS_FILE = BUILD_CACHE_DIR / "stats.json"
+
+# Incrementar quando a forma de compilar mudar (invalida o cache inteiro)
+CACHE_FORMAT_VERSION = '1'
+
+_stats_lock = threading.Lock()
+
+
+def _normalize(content):
+    """Normaliza quebras de linha e espaços finais para que diferenças irrelevantes não mudem o hash"""
+    lines = content.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip()
+
+
+def compute_key(project_dir, plugin_name, plugin_version, mc_version):
+    """
+    Calcula a chave de cache de um projeto.
+
+    Args:
+        project_dir (Path): Diretório do projeto (com o pom.xml já renderizado)
+        plugin_name (str): Nome do plugin
+        plugin_version (str): Versão do plugin
+        mc_version (str): Versão do Minecraft
+
+    Returns:
+        str: Hash SHA-256 das entradas do build
+    """
+    project_dir = Path(project_dir)
+    digest = hashlib.sha256()
+
+    def add(label, value):
+        digest.update(label.encode('utf-8') + b'\0' + value.encode('utf-8') + b'\0')
+
+    add('format', CACHE_FORMAT_VERSION)
+    add('plugin_name', plugin_name)
+    add('plugin_version', plugin_version)
+    add('mc_version', mc_version)
+
+    pom_file = project_dir / "pom.xml"
+    add('pom.xml', _normalize(pom_file.read_text(encoding='utf-8')) if pom_file.exists() else '')
+
+    source_root = project_dir / "src"
+    if source_root.exists():
+        for path in sorted(source_root.rglob('*')):
+            if not path.is_file():
+                continue
+            relative = path.relative_to(project_dir).as_posix()
+            try:
+                add(relative, _normalize(path.read_text(encoding='utf-8')))
+            except UnicodeDecodeError:
+                add(relative, hashlib.sha256(path.read_bytes()).hexdigest())
+
+    return digest.hexdigest()
+
+
+def _entry_paths(key):
+    """Arquivos de metadados e JAR de uma entrada"""
+    return BUILD_CACHE_DIR / f"{key}.json", BUILD_CACHE_DIR / f"{key}.jar"
+
+
+def _bump(counter, amount=1):
+    """Incrementa um contador de estatísticas (compartilhado entre workers)"""
+    BUILD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with _stats_lock, open(BUILD_CACHE_DIR / "stats.lock", 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                stats = json.loads(STATS_FILE.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                stats = {}
+            stats[counter] = stats.get(counter, 0) + amount
+            tmp_file = STATS_FILE.with_suffix(f'.{os.getpid()}.tmp')
+            tmp_file.write_text(json.dumps(stats), encoding='utf-8')
+            os.replace(tmp_file, STATS_FILE)
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def lookup(key, jar_path):
+    """
+    Procura um resultado em cache e, se for sucesso, copia o JAR para jar_path.
+
+    Args:
+        key (str): Chave calculada por compute_key
+        jar_path (Path): Onde o JAR deve ser entregue
+
+    Returns:
+        dict: {'success': bool, 'error': str, 'cached': True} ou None se não houver entrada
+    """
+    if not BUILD_CACHE_ENABLED:
+        return None
+
+    meta_file, cached_jar = _entry_paths(key)
+    try:
+        meta = json.loads(meta_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        _bump('misses')
+        return None
+
+    if meta.get('success'):
+        if not cached_jar.exists():
+            _bump('misses')
+            return None
+        Path(jar_path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cached_jar, jar_path)
+
+    # mtime dos metadados marca o último uso (política LRU)
+    now = time.time()
+    os.utime(meta_file, (now, now))
+    _bump('hits')
+
+    print(f"♻️ Build em cache ({'sucesso' if meta.get('success') else 'falha'}): {key[:12]}")
+    return {
+        'success': bool(meta.get('success')),
+        'error': meta.get('error'),
+        'diagnostics': meta.get('diagnostics', []),
+        'cached': True
+    }
+
+
+def is_cacheable(result):
+    """Sucessos e falhas de código (com diagnósticos de erro) podem ir para o cache"""
+    if result.get('success'):
+        return True
+    # Falhas de infraestrutura (Maven ausente, timeout, rede) não são cacheadas
+    return any(d.get('severity') == 'ERROR' for d in result.get('diagnostics') or [])
+
+
+def store(key, result, jar_path):
+    """
+    Guarda o resultado de um build no cache.
+
+    Args:
+        key (str): Chave calculada por compute_key
+        result (dict): Resultado do build ({'success', 'error', ...})
+        jar_path (Path): JAR gerado (quando o build teve sucesso)
+    """
+    if not BUILD_CACHE_ENABLED or not is_cacheable(result):
+        return
+
+    meta_file, cached_jar = _entry_paths(key)
+    try:
+        BUILD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        if result.get('success'):
+            if not Path(jar_path).exists():
+                return
+            tmp_jar = cached_jar.with_suffix(f'.{os.getpid()}.tmp')
+            shutil.copyfile(jar_path, tmp_jar)
+            os.replace(tmp_jar, cached_jar)
+
+        meta = {
+            'success': bool(result.get('success')),
+            'error': result.get('error'),
+            'diagnostics': result.get('diagnostics', []),
+            'created_at': time.time(),
+            'size': cached_jar.stat().st_size if result.get('success') else 0,
+        }
+        tmp_meta = meta_file.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_meta.write_text(json.dumps(meta), encoding='utf-8')
+        os.replace(tmp_meta, meta_file)
+        _bump('stores')
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar o build em cache: {str(e)}")
+        return
+
+    evict()
+
+
+def _entries():
+    """Lista as entradas do cache com tamanho e último uso"""
+    entries = []
+    if not BUILD_CACHE_DIR.exists():
+        return entries
+    for meta_file in BUILD_CACHE_DIR.glob('*.json'):
+        if meta_file == STATS_FILE:
+            continue
+        cached_jar = meta_file.with_suffix('.jar')
+        try:
+            size = meta_file.stat().st_size + (cached_jar.stat().st_size if cached_jar.exists() else 0)
+            entries.append((meta_file.stat().st_mtime, size, meta_file, cached_jar))
+        except OSError:
+            continue
+    return entries
+
+
+def evict():
+    """
+    Remove as entradas usadas há mais tempo até respeitar os limites de tamanho e quantidade.
+
+    Returns:
+        int: Número de entradas removidas
+    """
+    entries = sorted(_entries(), key=lambda entry: entry[0])
+    total_size = sum(entry[1] for entry in entries)
+    removed = 0
+
+    while entries and (total_size > BUILD_CACHE_MAX_BYTES or len(entries) > BUILD_CACHE_MAX_ENTRIES):
+        _, size, meta_file, cached_jar = entries.pop(0)
+        meta_file.unlink(missing_ok=True)
+        cached_jar.unlink(missing_ok=True)
+        total_size -= size
+        removed += 1
+
+    if removed:
+        _bump('evictions', removed)
+        print(f"🧹 Cache de builds: {removed} entradas removidas (LRU)")
+    return removed
+
+
+def get_stats():
+    """Estatísticas do cache (acertos, falhas, tamanho)"""
+    try:
+        stats = json.loads(STATS_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        stats = {}
+
+    entries = _entries()
+    hits, misses = stats.get('hits', 0), stats.get('misses', 0)
+    return {
+        'enabled': BUILD_CACHE_ENABLED,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        'stores': stats.get('stores', 0),
+        'evictions': stats.get('evictions', 0),
+        'entries': len(entries),
+        'size_bytes': sum(entry[1] for entry in entries),
+        'max_bytes': BUILD_CACHE_MAX_BYTES,
+        'max_entries': BUILD_CACHE_MAX_ENTRIES,
+    }
@@ -0,0 +1,218 @@
+"""
+Logs e diagnósticos de build do PluginForge Studio
+A saída do compilador vira diagnósticos estruturados (arquivo, linha, coluna,
+severidade, mensagem) no banco; o log completo vai para um arquivo comprimido
+referenciado pelo ID, e o Plugin guarda só um resumo curto.
+"""
+
+import gzip
+import os
+import re
+import uuid
+from datetime import UTC
+from pathlib import Path
+
+from models import db, BuildLog, BuildDiagnostic
+from storage import BUILD_LOGS_DIR
+
+# Tamanho máximo do resumo guardado em Plugin.error_message
+SUMMARY_MAX_LENGTH = 500
+# Erros citados no resumo
+SUMMARY_ERRORS = 3
+# Diagnósticos guardados por build
+MAX_DIAGNOSTICS = 200
+
+# Prefixo de horário adicionado ao log do Maven (build_metrics.MAVEN_TIMESTAMP_ARGS)
+_TIMESTAMP_PREFIX = re.compile(r'^\d{2}:\d{2}:\d{2}\.\d{3} ')
+# Formato do maven-compiler-plugin: [ERROR] /caminho/Arquivo.java:[12,34] mensagem
+_MAVEN_DIAGNOSTIC = re.compile(
+    r'^\[(?P<level>ERROR|WARNING)\] (?P<file>.+?\.java):\[(?P<line>\d+),(?P<column>\d+)\] (?P<message>.*)$'
+)
+_MAVEN_LEVEL = re.compile(r'^\[(?P<level>ERROR|WARNING|INFO)\] ?')
+
+
+def parse_maven_output(output):
+    """
+    Extrai os diagnósticos do compilador do log do Maven.
+
+    Args:
+        output (str): stdout/stderr do Maven
+
+    Returns:
+        list: Diagnósticos no formato {'severity', 'file', 'line', 'column', 'message'}
+    """
+    diagnostics = []
+    seen = set()
+    current = None
+    for raw_line in output.splitlines():
+        line = _TIMESTAMP_PREFIX.sub('', raw_line)
+        match = _MAVEN_DIAGNOSTIC.match(line)
+        if match:
+            current = {
+                'severity': match.group('level'),
+                'file': match.group('file'),
+                'line': int(match.group('line')),
+                'column': int(match.group('column')),
+                'message': match.group('message').strip(),
+            }
+            # O Maven repete os erros no resumo de "Failed to execute goal"
+            key = tuple(current.values())
+            if key in seen:
+                current = None
+                continue
+            seen.add(key)
+            diagnostics.append(current)
+            continue
+
+        detail = _MAVEN_LEVEL.sub('', line).strip()
+        if current is not None and detail.startswith(('symbol:', 'location:', 'required:', 'found:', 'reason:')):
+            current['message'] += f"\n{detail}"
+        else:
+            current = None
+    return diagnostics
+
+
+def first_error_line(output):
+    """Linha de erro mais útil do log ('Failed to execute goal ...' ou a primeira [ERROR])"""
+    errors = []
+    for raw_line in output.splitlines():
+        line = _TIMESTAMP_PREFIX.sub('', raw_line)
+        if line.startswith('[ERROR]') and line[7:].strip():
+            errors.append(line[7:].strip())
+    for line in errors:
+        if line.startswith('Failed to execute goal'):
+            return line
+    return errors[0] if errors else None
+
+
+def _relative_file(path):
+    """Caminho do fonte a partir de src/ (sem o diretório do workspace)"""
+    if not path:
+        return path
+    normalized = path.replace('\\', '/')
+    index = normalized.find('src/')
+    return normalized[index:] if index >= 0 else normalized
+
+
+def _truncate(text, limit=SUMMARY_MAX_LENGTH):
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+
+def summarize(diagnostics, fallback=''):
+    """
+    Resumo curto de um build com falha.
+
+    Args:
+        diagnostics (list): Diagnósticos do build
+        fallback (str): Mensagem de erro usada quando não há diagnósticos de erro
+
+    Returns:
+        str: Resumo com no máximo SUMMARY_MAX_LENGTH caracteres
+    """
+    errors = [d for d in diagnostics or [] if d.get('severity') == 'ERROR']
+    if not errors:
+        return _truncate((fallback or 'Erro na compilação').strip())
+
+    parts = []
+    for diag in errors[:SUMMARY_ERRORS]:
+        location = f"{Path(diag['file']).name}:{diag['line']}: " if diag.get('file') else ''
+        parts.append(location + diag['message'].split('\n')[0])
+    summary = f"{len(errors)} erro(s) de compilação: " + "; ".join(parts)
+    if len(errors) > SUMMARY_ERRORS:
+        summary += f" (+{len(errors) - SUMMARY_ERRORS})"
+    return _truncate(summary)
+
+
+def log_path(log_id):
+    """Arquivo comprimido do log de um build"""
+    return BUILD_LOGS_DIR / f"{log_id}.log.gz"
+
+
+def _write_log(log_id, text):
+    """Grava o log comprimido; retorna (tamanho original, tamanho comprimido)"""
+    data = text.encode('utf-8')
+    BUILD_LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    path = log_path(log_id)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data), path.stat().st_size
+
+
+def read_log(log_id):
+    """Conteúdo descomprimido do log (None se o arquivo não existir)"""
+    try:
+        with gzip.open(log_path(log_id), 'rb') as f:
+            return f.read().decode('utf-8', errors='replace')
+    except OSError:
+        return None
+
+
+def record(plugin_id, result, plugin_version_id=None):
+    """
+    Grava o log e os diagnósticos de um build.
+
+    Args:
+        plugin_id (str): Plugin compilado
+        result (dict): Resultado de build_project ('success', 'error', 'diagnostics', 'log')
+        plugin_version_id (str): Versão do plugin gerada pelo build
+
+    Returns:
+        BuildLog: Registro criado
+    """
+    build_log = BuildLog(
+        id=str(uuid.uuid4()),
+        plugin_id=plugin_id,
+        plugin_version_id=plugin_version_id,
+        success=bool(result.get('success')),
+        summary=None if result.get('success') else _truncate(result.get('error') or '')
+    )
+
+    log_text = result.get('log')
+    if log_text:
+        try:
+            build_log.size, build_log.compressed_size = _write_log(build_log.id, log_text)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar o log do build: {str(e)}")
+
+    db.session.add(build_log)
+    for diag in (result.get('diagnostics') or [])[:MAX_DIAGNOSTICS]:
+        db.session.add(BuildDiagnostic(
+            build_log_id=build_log.id,
+            plugin_id=plugin_id,
+            severity=diag.get('severity', 'ERROR'),
+            file=_relative_file(diag.get('file')),
+            line=diag.get('line'),
+            column=diag.get('column'),
+            message=diag.get('message', '')
+        ))
+    db.session.commit()
+    return build_log
+
+
+def latest_build(plugin_id):
+    """Último build registrado de um plugin (None se não houver)"""
+    return BuildLog.query.filter_by(plugin_id=plugin_id).order_by(BuildLog.created_at.desc()).first()
+
+
+def serialize(build_log):
+    """Representação JSON de um build com seus diagnósticos"""
+    return {
+        'id': build_log.id,
+        'success': build_log.success,
+        'summary': build_log.summary,
+        'created_at': build_log.created_at.replace(tzinfo=UTC).isoformat() if build_log.created_at else None,
+        'log_size': build_log.size,
+        'log_url': f'/api/plugin/{build_log.plugin_id}/build-logs/{build_log.id}' if build_log.size else None,
+        'diagnostics': [
+            {
+                'severity': diag.severity,
+                'file': diag.file,
+                'line': diag.line,
+                'column': diag.column,
+                'message': diag.message,
+            }
+            for diag in build_log.diagnostics
+        ],
+    }
@@ -0,0 +1,208 @@
+"""
+Métricas de build do PluginForge Studio
+Mede o tempo de cada etapa de um build (busca de ferramentas, resolução de
+dependências, compilação, resources, shade, JAR...) e guarda um registro por
+build para consultar percentis por versão do Minecraft e backend.
+"""
+
+import json
+import math
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, UTC, timedelta
+
+from models import db, BuildMetric
+
+# Faz o Maven prefixar cada linha do log com a hora (para medir cada plugin)
+MAVEN_TIMESTAMP_ARGS = [
+    '-Dorg.slf4j.simpleLogger.showDateTime=true',
+    '-Dorg.slf4j.simpleLogger.dateTimeFormat=HH:mm:ss.SSS',
+]
+
+# Linha do Maven com hora: 12:00:01.234 [INFO] ...
+_TIMESTAMP_PATTERN = re.compile(r'^(\d{2}):(\d{2}):(\d{2})\.(\d{3}) ')
+# Início da execução de um plugin: --- maven-compiler-plugin:3.11.0:compile (default-compile) @ x ---
+_MOJO_PATTERN = re.compile(r'\[\w+\] --- (?P<plugin>[\w.-]+):[\w.-]+:(?P<goal>[\w-]+)')
+
+# Goal do Maven -> etapa do build
+_GOAL_STAGES = {
+    'resources': 'resources',
+    'compile': 'compile',
+    'jar': 'jar_write',
+    'shade': 'shade',
+    'install': 'install',
+    'testResources': 'tests',
+    'testCompile': 'tests',
+    'test': 'tests',
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+class BuildTimer:
+    """Acumula o tempo (ms) de cada etapa de um build"""
+
+    def __init__(self):
+        self.stages = {}
+        self._start = time.monotonic()
+
+    def add(self, name, milliseconds):
+        """Soma um tempo medido à etapa"""
+        self.stages[name] = self.stages.get(name, 0) + int(round(milliseconds))
+
+    def merge(self, timings):
+        """Incorpora os tempos informados por um backend"""
+        for name, milliseconds in (timings or {}).items():
+            self.add(name, milliseconds)
+
+    @contextmanager
+    def stage(self, name):
+        """Mede o bloco como uma etapa"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, (time.monotonic() - start) * 1000)
+
+    def total_ms(self):
+        """Tempo total desde a criação do timer"""
+        return int(round((time.monotonic() - self._start) * 1000))
+
+
+def _timestamp_ms(match):
+    hours, minutes, seconds, millis = (int(group) for group in match.groups())
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + millis
+
+
+def parse_maven_timings(output, wall_ms=None):
+    """
+    Divide a duração de um build Maven nas etapas a partir do log com horário.
+
+    Args:
+        output (str): stdout do Maven executado com MAVEN_TIMESTAMP_ARGS
+        wall_ms (int): Duração total medida de fora (para a inicialização da JVM)
+
+    Returns:
+        dict: {etapa: ms}; vazio se o log não tiver horários
+    """
+    marks = []  # (ms, etapa ou None)
+    for line in output.splitlines():
+        match = _TIMESTAMP_PATTERN.match(line)
+        if not match:
+            continue
+        ms = _timestamp_ms(match)
+        if marks and ms < marks[-1][0]:
+            ms += 24 * 60 * 60 * 1000  # Passou da meia-noite
+        mojo = _MOJO_PATTERN.search(line)
+        stage = None
+        if mojo:
+            goal = mojo.group('goal')
+            stage = _GOAL_STAGES.get(goal, goal)
+        marks.append((ms, stage))
+
+    if not marks:
+        return {}
+
+    timings = defaultdict(int)
+    first_mojo = next((index for index, (_, stage) in enumerate(marks) if stage), None)
+    if first_mojo is None:
+        # Falhou antes de executar qualquer plugin (ex: dependência ausente)
+        timings['dependency_resolution'] = marks[-1][0] - marks[0][0]
+    else:
+        # Leitura do projeto e resolução de dependências/plugins
+        timings['dependency_resolution'] = marks[first_mojo][0] - marks[0][0]
+        current_stage, current_start = marks[first_mojo][1], marks[first_mojo][0]
+        for ms, stage in marks[first_mojo + 1:]:
+            if stage:
+                timings[current_stage] += ms - current_start
+                current_stage, current_start = stage, ms
+        timings[current_stage] += marks[-1][0] - current_start
+
+    if wall_ms is not None:
+        timings['maven_startup'] = max(0, wall_ms - (marks[-1][0] - marks[0][0]))
+    return dict(timings)
+
+
+def record(plugin_id, mc_version, result, plugin_version_id=None):
+    """
+    Grava as métricas de um build.
+
+    Args:
+        plugin_id (str): Plugin compilado
+        mc_version (str): Versão do Minecraft
+        result (dict): Resultado de build_project (com 'backend', 'timings', 'total_ms')
+        plugin_version_id (str): Versão do plugin gerada pelo build
+
+    Returns:
+        BuildMetric: Registro criado, ou None se o resultado não tiver tempos
+    """
+    if 'timings' not in result:
+        return None
+
+    metric = BuildMetric(
+        plugin_id=plugin_id,
+        plugin_version_id=plugin_version_id,
+        minecraft_version=mc_version,
+        backend=result.get('backend', 'none'),
+        success=bool(result.get('success')),
+        total_ms=result.get('total_ms'),
+        stages=json.dumps(result['timings'])
+    )
+    db.session.add(metric)
+    db.session.commit()
+    return metric
+
+
+def percentile(values, p):
+    """Percentil pelo método nearest-rank"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def _percentiles(values):
+    return {f'p{p}': percentile(values, p) for p in PERCENTILES}
+
+
+def summarize(days=30, mc_version=None, backend=None):
+    """
+    Percentis dos tempos de build agrupados por versão do Minecraft e backend.
+
+    Args:
+        days (int): Janela de tempo considerada
+        mc_version (str): Filtra por versão do Minecraft
+        backend (str): Filtra por backend
+
+    Returns:
+        list: Um item por (versão do Minecraft, backend) com percentis do total e de cada etapa
+    """
+    query = BuildMetric.query.filter(BuildMetric.created_at >= datetime.now(UTC) - timedelta(days=days))
+    if mc_version:
+        query = query.filter_by(minecraft_version=mc_version)
+    if backend:
+        query = query.filter_by(backend=backend)
+
+    groups = defaultdict(list)
+    for metric in query.all():
+        groups[(metric.minecraft_version, metric.backend)].append(metric)
+
+    summary = []
+    for (group_mc_version, group_backend), metrics in sorted(groups.items(), key=lambda item: (item[0][0] or '', item[0][1] or '')):
+        stage_values = defaultdict(list)
+        for metric in metrics:
+            for stage, milliseconds in json.loads(metric.stages or '{}').items():
+                stage_values[stage].append(milliseconds)
+
+        summary.append({
+            'minecraft_version': group_mc_version,
+            'backend': group_backend,
+            'builds': len(metrics),
+            'success_rate': round(sum(1 for m in metrics if m.success) / len(metrics), 4),
+            'total_ms': _percentiles([m.total_ms for m in metrics if m.total_ms is not None]),
+            'stages': {stage: _percentiles(values) for stage, values in sorted(stage_values.items())},
+        })
+    return summary
@@ -0,0 +1,270 @@
+"""
+Agendador de compilações do PluginForge Studio
+Limita os builds simultâneos entre todos os workers (slots com file lock) e
+mantém uma fila limitada; quando a fila está cheia a requisição é recusada
+rapidamente em vez de iniciar mais uma JVM.
+"""
+
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from storage import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Memória estimada por build (JVM do Maven/javac)
+COMPILE_MEMORY_MB = int(os.getenv('COMPILE_MEMORY_MB', '768'))
+# Tempo máximo de espera por um slot (segundos)
+COMPILE_QUEUE_TIMEOUT = int(os.getenv('COMPILE_QUEUE_TIMEOUT', '300'))
+# Duração média inicial de um build, usada para estimar o Retry-After (segundos)
+DEFAULT_BUILD_SECONDS = 20
+
+SCHEDULER_DIR = CACHE_DIR / "scheduler"
+QUEUE_DIR = SCHEDULER_DIR / "queue"
+POLL_INTERVAL = 0.2
+
+
+def _total_memory_mb():
+    """Memória física total em MB (None se não for possível descobrir)"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _default_slots():
+    """Slots padrão: limitado pelos CPUs e pela memória disponível"""
+    cpus = os.cpu_count() or 1
+    memory_mb = _total_memory_mb()
+    if memory_mb:
+        return max(1, min(cpus, memory_mb // COMPILE_MEMORY_MB))
+    return max(1, cpus)
+
+
+COMPILE_SLOTS = int(os.getenv('COMPILE_SLOTS', '0')) or _default_slots()
+COMPILE_QUEUE_SIZE = int(os.getenv('COMPILE_QUEUE_SIZE', str(COMPILE_SLOTS * 4)))
+
+
+class CompileQueueFull(Exception):
+    """Fila de compilação cheia: o cliente deve tentar novamente depois"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Fila de compilação cheia. Tente novamente em {retry_after} segundos.')
+        self.retry_after = retry_after
+
+
+class CompileQueueTimeout(Exception):
+    """Tempo de espera por um slot de compilação esgotado"""
+
+
+_average_build_seconds = DEFAULT_BUILD_SECONDS
+_local_semaphore = threading.BoundedSemaphore(COMPILE_SLOTS)
+_local_waiting = 0
+_local_lock = threading.Lock()
+
+
+def _record_duration(seconds):
+    """Média móvel da duração dos builds (para estimar o Retry-After)"""
+    global _average_build_seconds
+    _average_build_seconds = 0.8 * _average_build_seconds + 0.2 * seconds
+
+
+def estimate_retry_after(waiting):
+    """Estimativa em segundos até um novo build conseguir um slot"""
+    rounds = math.ceil((waiting + 1) / COMPILE_SLOTS)
+    return max(1, int(rounds * _average_build_seconds))
+
+
+def _pid_alive(pid):
+    """Verifica se o processo dono de um ticket ainda existe"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+@contextmanager
+def _queue_lock():
+    """Lock exclusivo para ler/alterar a fila"""
+    SCHEDULER_DIR.mkdir(parents=True, exist_ok=True)
+    with open(SCHEDULER_DIR / "queue.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _tickets():
+    """Tickets na fila em ordem de chegada (remove os de processos mortos)"""
+    tickets = []
+    for ticket in sorted(QUEUE_DIR.glob('*.ticket')):
+        try:
+            pid = int(ticket.stem.split('-')[1])
+        except (IndexError, ValueError):
+            pid = None
+        if pid is not None and not _pid_alive(pid):
+            ticket.unlink(missing_ok=True)
+            continue
+        tickets.append(ticket)
+    return tickets
+
+
+def _busy_slots():
+    """Quantos slots estão ocupados neste momento"""
+    busy = 0
+    for index in range(COMPILE_SLOTS):
+        with open(SCHEDULER_DIR / f"slot-{index}.lock", 'w') as slot:
+            try:
+                fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(slot, fcntl.LOCK_UN)
+            except BlockingIOError:
+                busy += 1
+    return busy
+
+
+def _try_acquire_slot():
+    """Tenta ocupar qualquer slot livre; retorna o arquivo aberto (lock) ou None"""
+    for index in range(COMPILE_SLOTS):
+        slot = open(SCHEDULER_DIR / f"slot-{index}.lock", 'w')
+        try:
+            fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return slot
+        except BlockingIOError:
+            slot.close()
+    return None
+
+
+def check_admission():
+    """
+    Verifica se há espaço para mais um build antes de iniciar o pipeline.
+
+    Raises:
+        CompileQueueFull: se a fila já estiver no limite
+    """
+    status = get_status()
+    if status['waiting'] >= COMPILE_QUEUE_SIZE:
+        raise CompileQueueFull(estimate_retry_after(status['waiting']))
+
+
+@contextmanager
+def compile_slot(on_position=None):
+    """
+    Aguarda um slot de compilação (FIFO) e o mantém durante o bloco.
+
+    Args:
+        on_position (callable): Chamado com a posição na fila (1 = próximo) enquanto espera
+
+    Raises:
+        CompileQueueFull: se a fila estiver cheia
+        CompileQueueTimeout: se o slot não for obtido a tempo
+    """
+    if fcntl is None:
+        with _local_compile_slot(on_position):
+            yield
+        return
+
+    QUEUE_DIR.mkdir(parents=True, exist_ok=True)
+    with _queue_lock():
+        waiting = len(_tickets())
+        if waiting >= COMPILE_QUEUE_SIZE:
+            raise CompileQueueFull(estimate_retry_after(waiting))
+        ticket = QUEUE_DIR / f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}.ticket"
+        ticket.touch()
+
+    slot = None
+    last_position = None
+    deadline = time.monotonic() + COMPILE_QUEUE_TIMEOUT
+    try:
+        while slot is None:
+            with _queue_lock():
+                tickets = _tickets()
+                position = tickets.index(ticket) if ticket in tickets else 0
+                # Só os primeiros da fila disputam os slots (ordem de chegada)
+                if position < COMPILE_SLOTS:
+                    slot = _try_acquire_slot()
+                if slot is not None:
+                    ticket.unlink(missing_ok=True)
+                    break
+
+            if position != last_position:
+                last_position = position
+                print(f"⏳ Aguardando slot de compilação (posição {position + 1} na fila)")
+                if on_position:
+                    on_position(position + 1)
+
+            if time.monotonic() > deadline:
+                raise CompileQueueTimeout('Tempo de espera por um slot de compilação esgotado.')
+            time.sleep(POLL_INTERVAL)
+    finally:
+        ticket.unlink(missing_ok=True)
+
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        _record_duration(time.monotonic() - start)
+        fcntl.flock(slot, fcntl.LOCK_UN)
+        slot.close()
+
+
+@contextmanager
+def _local_compile_slot(on_position=None):
+    """Versão sem file lock (Windows): limita apenas dentro do processo"""
+    global _local_waiting
+
+    with _local_lock:
+        if _local_waiting >= COMPILE_QUEUE_SIZE:
+            raise CompileQueueFull(estimate_retry_after(_local_waiting))
+        _local_waiting += 1
+        position = _local_waiting
+
+    try:
+        if on_position:
+            on_position(position)
+        if not _local_semaphore.acquire(timeout=COMPILE_QUEUE_TIMEOUT):
+            raise CompileQueueTimeout('Tempo de espera por um slot de compilação esgotado.')
+    finally:
+        with _local_lock:
+            _local_waiting -= 1
+
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        _record_duration(time.monotonic() - start)
+        _local_semaphore.release()
+
+
+def get_status():
+    """Estado atual do agendador (slots ocupados e fila)"""
+    if fcntl is None:
+        return {
+            'slots': COMPILE_SLOTS,
+            'busy': COMPILE_SLOTS - _local_semaphore._value,
+            'waiting': _local_waiting,
+            'queue_size': COMPILE_QUEUE_SIZE,
+            'average_build_seconds': round(_average_build_seconds, 2),
+        }
+
+    QUEUE_DIR.mkdir(parents=True, exist_ok=True)
+    with _queue_lock():
+        tickets = _tickets()
+        busy = _busy_slots()
+    return {
+        'slots': COMPILE_SLOTS,
+        'busy': busy,
+        'waiting': len(tickets),
+        'queue_size': COMPILE_QUEUE_SIZE,
+        'average_build_seconds': round(_average_build_seconds, 2),
+    }
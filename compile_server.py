@@ -0,0 +1,271 @@
+"""
+Cliente do servidor de compilação do PluginForge Studio
+Mantém uma JVM aquecida (java/CompileServer.java) compartilhada entre os workers,
+evitando iniciar o Maven a cada build.
+"""
+
+import json
+import os
+import secrets
+import socket
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from storage import BASE_DIR, CACHE_DIR
+from toolchain import find_java_executable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Configurações
+COMPILE_SERVER_ENABLED = os.getenv('COMPILE_SERVER_ENABLED', 'true').lower() == 'true'
+COMPILE_SERVER_HEAP = os.getenv('COMPILE_SERVER_HEAP', '512m')
+COMPILE_SERVER_IDLE_MINUTES = int(os.getenv('COMPILE_SERVER_IDLE_MINUTES', '30'))
+COMPILE_TIMEOUT = 120
+JAVA_RELEASE = '17'
+
+SERVER_SOURCE = BASE_DIR / "java" / "CompileServer.java"
+STATE_FILE = CACHE_DIR / "compile-server.json"
+LOCK_FILE = CACHE_DIR / "compile-server.lock"
+
+# Após uma falha ao iniciar, não tenta de novo por este intervalo (segundos)
+RETRY_INTERVAL = 60
+
+_state = None
+_unavailable_until = 0
+_state_lock = threading.Lock()
+
+
+def _read_state():
+    """Lê o estado do servidor compartilhado (porta e token)"""
+    try:
+        return json.loads(STATE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _send(state, fields, timeout=COMPILE_TIMEOUT):
+    """Envia uma requisição ao servidor e retorna as linhas da resposta"""
+    lines = [f"token={state['token']}"]
+    lines += [f"{key}={value}" for key, value in fields.items()]
+    payload = ("\n".join(lines) + "\n\n").encode('utf-8')
+
+    with socket.create_connection(('127.0.0.1', state['port']), timeout=timeout) as sock:
+        sock.sendall(payload)
+        with sock.makefile('r', encoding='utf-8') as reader:
+            return [line.rstrip('\n') for line in reader]
+
+
+def _ping(state):
+    """Verifica se o servidor responde"""
+    try:
+        response = _send(state, {'command': 'ping'}, timeout=2)
+        return bool(response) and response[-1].startswith('RESULT\tOK')
+    except OSError:
+        return False
+
+
+def _spawn():
+    """Inicia uma nova JVM do servidor de compilação"""
+    java = find_java_executable()
+    if not java:
+        print("⚠️ Java não encontrado: servidor de compilação indisponível")
+        return None
+    if not SERVER_SOURCE.exists():
+        print(f"⚠️ Fonte do servidor de compilação não encontrada: {SERVER_SOURCE}")
+        return None
+
+    token = secrets.token_hex(16)
+    env = dict(os.environ, COMPILE_SERVER_TOKEN=token)
+
+    print("☕ Iniciando servidor de compilação (JVM aquecida)...")
+    process = subprocess.Popen(
+        [java, f'-Xmx{COMPILE_SERVER_HEAP}', str(SERVER_SOURCE), '0', str(COMPILE_SERVER_IDLE_MINUTES)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        env=env,
+        start_new_session=True
+    )
+
+    # A primeira linha informa a porta; lida em thread para respeitar o timeout
+    first_line = []
+    reader = threading.Thread(target=lambda: first_line.append(process.stdout.readline()), daemon=True)
+    reader.start()
+    reader.join(timeout=30)
+
+    line = first_line[0].strip() if first_line else ''
+    if not line.startswith('LISTENING '):
+        print(f"❌ Servidor de compilação não iniciou: {line or 'timeout'}")
+        process.kill()
+        return None
+    process.stdout.close()
+
+    state = {'pid': process.pid, 'port': int(line.split()[1]), 'token': token}
+    tmp_file = STATE_FILE.with_suffix('.tmp')
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_file, STATE_FILE)
+
+    print(f"✅ Servidor de compilação ativo na porta {state['port']} (PID {state['pid']})")
+    return state
+
+
+def _ensure_server():
+    """Retorna o estado de um servidor ativo, iniciando-o se necessário"""
+    global _state, _unavailable_until
+
+    if not COMPILE_SERVER_ENABLED or time.time() < _unavailable_until:
+        return None
+
+    with _state_lock:
+        if _state and _ping(_state):
+            return _state
+
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(LOCK_FILE, 'w') as lock:
+            # Só um worker inicia a JVM; os demais reutilizam a mesma porta
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = _read_state()
+                if not state or not _ping(state):
+                    state = _spawn()
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+        if not state:
+            _unavailable_until = time.time() + RETRY_INTERVAL
+        _state = state
+        return state
+
+
+def _unescape(value):
+    """Desfaz o escape aplicado pelo servidor nos campos da resposta"""
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            nxt = next(chars, '')
+            result.append({'n': '\n', 't': '\t'}.get(nxt, nxt))
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def format_diagnostics(diagnostics):
+    """Formata diagnósticos no mesmo estilo da saída do Maven"""
+    lines = []
+    for diag in diagnostics:
+        severity = 'ERROR' if diag['severity'] == 'ERROR' else 'WARNING'
+        location = f"{diag['file']}:[{diag['line']},{diag['column']}] " if diag['file'] else ''
+        lines.append(f"[{severity}] {location}{diag['message']}")
+    return "\n".join(lines)
+
+
+def compile_project(project_dir, jar_path, classpath, properties=None):
+    """
+    Compila um projeto no servidor de compilação.
+
+    Args:
+        project_dir (Path): Diretório do projeto (layout Maven)
+        jar_path (Path): Caminho do JAR a ser gerado
+        classpath (list): JARs da spigot-api
+        properties (dict): Propriedades para filtrar os resources
+
+    Returns:
+        dict: {'success': bool, 'error': str, 'diagnostics': list, 'backend', 'timings'},
+              ou None se o servidor estiver indisponível (usar o Maven)
+    """
+    global _state
+
+    state = _ensure_server()
+    if not state:
+        return None
+
+    fields = {
+        'command': 'compile',
+        'project': str(Path(project_dir).resolve()),
+        'jar': str(Path(jar_path).resolve()),
+        'classpath': os.pathsep.join(classpath),
+        'release': JAVA_RELEASE,
+    }
+    for key, value in (properties or {}).items():
+        fields[f'prop.{key}'] = value
+
+    try:
+        print(f"⚡ Compilando no servidor de compilação: {project_dir}")
+        response = _send(state, fields)
+    except OSError as e:
+        print(f"⚠️ Servidor de compilação não respondeu: {str(e)}")
+        _state = None
+        return None
+
+    diagnostics = []
+    timings = {}
+    result_status, detail, elapsed = 'ERROR', 'resposta vazia', '0'
+    for line in response:
+        parts = line.split('\t')
+        if parts[0] == 'DIAG' and len(parts) >= 6:
+            diagnostics.append({
+                'severity': parts[1],
+                'file': _unescape(parts[2]),
+                'line': int(parts[3]),
+                'column': int(parts[4]),
+                'message': _unescape(parts[5]),
+            })
+        elif parts[0] == 'TIMING' and len(parts) >= 3:
+            timings[parts[1]] = int(parts[2])
+        elif parts[0] == 'RESULT':
+            result_status = parts[1] if len(parts) > 1 else 'ERROR'
+            elapsed = parts[2] if len(parts) > 2 else '0'
+            detail = _unescape(parts[3]) if len(parts) > 3 else ''
+
+    # Servidores iniciados por uma versão anterior não informam as etapas
+    timings = timings or {'compile': int(elapsed)}
+
+    if result_status == 'OK':
+        print(f"✅ Compilação concluída em {elapsed} ms (servidor de compilação)")
+        return {'success': True, 'error': None, 'diagnostics': diagnostics,
+                'backend': 'compile_server', 'timings': timings}
+
+    if result_status == 'FAIL':
+        error_msg = "Erro na compilação:\n" + format_diagnostics(
+            [d for d in diagnostics if d['severity'] == 'ERROR'] or diagnostics
+        )
+        print(f"❌ {error_msg}")
+        return {'success': False, 'error': error_msg, 'diagnostics': diagnostics,
+                'backend': 'compile_server', 'timings': timings}
+
+    # Falha de infraestrutura (não do código): deixa o Maven tentar
+    print(f"⚠️ Erro no servidor de compilação: {detail}")
+    return None
+
+
+def status():
+    """Estado do servidor de compilação compartilhado"""
+    state = _read_state()
+    return {
+        'enabled': COMPILE_SERVER_ENABLED,
+        'running': bool(state) and _ping(state),
+        'pid': state.get('pid') if state else None,
+        'port': state.get('port') if state else None,
+    }
+
+
+def shutdown():
+    """Encerra o servidor de compilação compartilhado, se estiver ativo"""
+    state = _read_state()
+    if state:
+        try:
+            _send(state, {'command': 'shutdown'}, timeout=5)
+        except OSError:
+            pass
+        STATE_FILE.unlink(missing_ok=True)
@@ -0,0 +1,148 @@
+"""
+Exportação de plugins do PluginForge Studio
+Gera arquivos zip em streaming (um gerador que entrega o zip em pedaços):
+o projeto Maven de uma versão do plugin e a exportação de todos os plugins e
+JARs de um usuário, com memória constante independentemente do tamanho.
+"""
+
+import io
+import json
+import zipfile
+from datetime import datetime, UTC
+from pathlib import Path
+
+import artifact_store
+import workspace
+from models import Plugin, PluginVersion
+
+# Tamanho dos pedaços lidos dos JARs
+_CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Destino do ZipFile que acumula os bytes até o gerador entregá-los"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_info(arcname, date_time, compress_type):
+    info = zipfile.ZipInfo(arcname, date_time=date_time.timetuple()[:6])
+    info.compress_type = compress_type
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def stream_zip(entries):
+    """
+    Escreve um zip em streaming.
+
+    Args:
+        entries (iterable): Tuplas (nome no zip, conteúdo, data), onde o
+            conteúdo é str/bytes (comprimido) ou Path (JAR, lido em pedaços
+            e guardado sem recompressão)
+
+    Yields:
+        bytes: Pedaços do arquivo zip
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for arcname, content, date_time in entries:
+            if isinstance(content, Path):
+                info = _zip_info(arcname, date_time, zipfile.ZIP_STORED)
+                with open(content, 'rb') as source, archive.open(info, 'w') as target:
+                    for chunk in iter(lambda: source.read(_CHUNK_SIZE), b''):
+                        target.write(chunk)
+                        yield buffer.drain()
+            else:
+                data = content.encode('utf-8') if isinstance(content, str) else content
+                archive.writestr(_zip_info(arcname, date_time, zipfile.ZIP_DEFLATED), data)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _date(value):
+    """Data de um registro (SQLite devolve sem fuso; zip não aceita antes de 1980)"""
+    return value if value and value.year >= 1980 else datetime.now(UTC)
+
+
+def project_entries(plugin, version, prefix=''):
+    """
+    Arquivos do projeto Maven de uma versão do plugin.
+
+    Args:
+        plugin (Plugin): Plugin
+        version (PluginVersion): Versão armazenada
+        prefix (str): Diretório dentro do zip
+
+    Yields:
+        tuple: (nome no zip, conteúdo, data)
+    """
+    date_time = _date(version.created_at)
+    package_name = version.package_name or f'com.pluginforge.{plugin.name.lower()}'
+    source_path = f"src/main/java/{package_name.replace('.', '/')}/{plugin.name}.java"
+
+    pom_content = workspace.render_pom(plugin.name, version.version_number, plugin.minecraft_version)
+    if pom_content is not None:
+        yield f"{prefix}pom.xml", pom_content, date_time
+    yield f"{prefix}{source_path}", version.main_code or '', date_time
+    if version.plugin_yml_content:
+        yield f"{prefix}src/main/resources/plugin.yml", version.plugin_yml_content, date_time
+    if version.config_yml_content:
+        yield f"{prefix}src/main/resources/config.yml", version.config_yml_content, date_time
+
+
+def _latest_version(plugin):
+    return PluginVersion.query.filter_by(plugin_id=plugin.id).order_by(PluginVersion.created_at.desc()).first()
+
+
+def user_export_entries(user_id):
+    """
+    Todos os plugins de um usuário: metadados, projeto da última versão e JAR atual.
+
+    Os plugins são lidos do banco em lotes, então a memória não cresce com
+    a quantidade de plugins.
+
+    Yields:
+        tuple: (nome no zip, conteúdo, data)
+    """
+    plugins = Plugin.query.filter_by(user_id=user_id).order_by(Plugin.created_at).yield_per(50)
+    for plugin in plugins:
+        folder = f"{plugin.name}-{plugin.id[:8]}/"
+        date_time = _date(plugin.updated_at)
+        metadata = {
+            'id': plugin.id,
+            'name': plugin.name,
+            'version': plugin.version,
+            'minecraft_version': plugin.minecraft_version,
+            'description': plugin.description,
+            'author': plugin.plugin_author,
+            'features': plugin.features,
+            'status': plugin.status,
+            'artifact_sha256': plugin.artifact_sha256,
+            'created_at': plugin.created_at.isoformat() if plugin.created_at else None,
+            'updated_at': plugin.updated_at.isoformat() if plugin.updated_at else None,
+        }
+        yield f"{folder}plugin.json", json.dumps(metadata, indent=2, ensure_ascii=False), date_time
+
+        version = _latest_version(plugin)
+        if version is not None:
+            yield from project_entries(plugin, version, prefix=f"{folder}source/")
+
+        if plugin.status == 'compiled' and plugin.compiled_file:
+            jar_path = artifact_store.plugin_jar_path(plugin)
+            if jar_path is not None and jar_path.is_file():
+                yield f"{folder}{Path(plugin.compiled_file).name}", jar_path, date_time
@@ -0,0 +1,185 @@
+"""
+Build rápido do PluginForge Studio
+Compila com javac direto contra o classpath em cache da spigot-api e empacota
+o JAR com zipfile, sem passar pelo ciclo de vida do Maven.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import time
+import zipfile
+from pathlib import Path
+
+from compile_server import JAVA_RELEASE, format_diagnostics
+from toolchain import find_javac_executable
+
+# Configurações
+FAST_BUILD_ENABLED = os.getenv('FAST_BUILD_ENABLED', 'true').lower() == 'true'
+JAVAC_TIMEOUT = 120
+
+MANIFEST = "Manifest-Version: 1.0\r\nCreated-By: PluginForge Studio\r\n\r\n"
+
+# Formato do javac: Arquivo.java:12: error: mensagem
+_DIAGNOSTIC_PATTERN = re.compile(r'^(?P<file>.+?\.java):(?P<line>\d+): (?P<kind>error|warning|note): (?P<message>.*)$')
+
+
+def can_fast_build(project_dir):
+    """
+    Verifica se o projeto tem o layout simples suportado pelo build rápido.
+
+    Args:
+        project_dir (Path): Diretório do projeto
+
+    Returns:
+        bool: True se só houver fontes em src/main/java e resources em src/main/resources
+    """
+    source_dir = Path(project_dir) / "src" / "main" / "java"
+    if not source_dir.is_dir() or not any(source_dir.rglob('*.java')):
+        return False
+    # Outros source sets (ex: src/test) ou módulos precisam do Maven
+    return all(child.name in ('java', 'resources') for child in (Path(project_dir) / "src" / "main").iterdir())
+
+
+def parse_javac_output(output):
+    """
+    Converte a saída do javac em diagnósticos estruturados.
+
+    Args:
+        output (str): stderr do javac
+
+    Returns:
+        list: Diagnósticos no formato {'severity', 'file', 'line', 'column', 'message'}
+    """
+    diagnostics = []
+    current = None
+    for line in output.splitlines():
+        match = _DIAGNOSTIC_PATTERN.match(line)
+        if match:
+            current = {
+                'severity': {'error': 'ERROR', 'warning': 'WARNING'}.get(match.group('kind'), 'NOTE'),
+                'file': match.group('file'),
+                'line': int(match.group('line')),
+                'column': 0,
+                'message': match.group('message'),
+            }
+            diagnostics.append(current)
+        elif current is not None and line.strip() == '^':
+            # Linha do acento circunflexo indica a coluna do erro
+            current['column'] = line.index('^') + 1
+        elif current is not None and line.strip().startswith(('symbol:', 'location:')):
+            current['message'] += f"\n{line.strip()}"
+    return diagnostics
+
+
+def filter_resource(content, properties):
+    """Aplica a filtragem de resources do Maven (${nome} e @nome@)"""
+    for key, value in properties.items():
+        content = content.replace(f'${{{key}}}', value)
+        content = content.replace(f'@{key}@', value)
+    return content
+
+
+def write_plugin_jar(classes_dir, resources_dir, jar_path, properties=None):
+    """
+    Empacota classes e resources em um JAR com zipfile.
+
+    Args:
+        classes_dir (Path): Diretório com os .class compilados
+        resources_dir (Path): Diretório src/main/resources
+        jar_path (Path): Caminho do JAR de saída
+        properties (dict): Propriedades para filtrar os resources
+    """
+    jar_path = Path(jar_path)
+    jar_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_jar = jar_path.with_name(jar_path.name + '.tmp')
+
+    with zipfile.ZipFile(tmp_jar, 'w', compression=zipfile.ZIP_DEFLATED) as jar:
+        jar.writestr('META-INF/MANIFEST.MF', MANIFEST)
+        for path in sorted(Path(classes_dir).rglob('*')):
+            if path.is_file():
+                jar.write(path, path.relative_to(classes_dir).as_posix())
+        if Path(resources_dir).is_dir():
+            for path in sorted(Path(resources_dir).rglob('*')):
+                if path.is_file():
+                    content = path.read_text(encoding='utf-8')
+                    jar.writestr(path.relative_to(resources_dir).as_posix(), filter_resource(content, properties or {}))
+
+    os.replace(tmp_jar, jar_path)
+
+
+def build_with_javac(project_dir, jar_path, classpath, properties=None):
+    """
+    Compila o projeto com javac e gera o JAR sem o Maven.
+
+    Args:
+        project_dir (Path): Diretório do projeto (layout Maven)
+        jar_path (Path): Caminho do JAR a ser gerado
+        classpath (list): JARs da spigot-api
+        properties (dict): Propriedades para filtrar os resources
+
+    Returns:
+        dict: {'success': bool, 'error': str, 'diagnostics': list, 'backend', 'timings'},
+              ou None se o build rápido não puder ser usado (usar o Maven)
+    """
+    if not FAST_BUILD_ENABLED or not can_fast_build(project_dir):
+        return None
+
+    javac = find_javac_executable()
+    if not javac:
+        print("⚠️ javac não encontrado: build rápido indisponível")
+        return None
+
+    project_dir = Path(project_dir)
+    classes_dir = project_dir / "target" / "classes"
+    sources = sorted(str(path) for path in (project_dir / "src" / "main" / "java").rglob('*.java'))
+
+    shutil.rmtree(classes_dir, ignore_errors=True)
+    classes_dir.mkdir(parents=True, exist_ok=True)
+
+    command = [
+        javac,
+        '-d', str(classes_dir),
+        '-encoding', 'UTF-8',
+        '--release', JAVA_RELEASE,
+        '-proc:none',
+        '-classpath', os.pathsep.join(classpath),
+        *sources
+    ]
+
+    try:
+        print(f"⚡ Build rápido com javac: {project_dir}")
+        start = time.monotonic()
+        result = subprocess.run(command, cwd=project_dir, capture_output=True, text=True, timeout=JAVAC_TIMEOUT)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        print(f"⚠️ Erro ao executar javac: {str(e)}")
+        return None
+
+    timings = {'compile': round((time.monotonic() - start) * 1000)}
+    diagnostics = parse_javac_output(result.stderr)
+
+    if result.returncode != 0:
+        if not diagnostics:
+            # Falha sem diagnóstico de código (ex: opção inválida): deixa o Maven tentar
+            print(f"⚠️ javac falhou sem diagnósticos: {result.stderr.strip()[:500]}")
+            return None
+        error_msg = "Erro na compilação:\n" + format_diagnostics(
+            [d for d in diagnostics if d['severity'] == 'ERROR'] or diagnostics
+        )
+        print(f"❌ {error_msg}")
+        return {'success': False, 'error': error_msg, 'diagnostics': diagnostics,
+                'backend': 'javac', 'timings': timings}
+
+    jar_start = time.monotonic()
+    try:
+        write_plugin_jar(classes_dir, project_dir / "src" / "main" / "resources", jar_path, properties)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"⚠️ Erro ao empacotar JAR: {str(e)}")
+        return None
+
+    timings['jar_write'] = round((time.monotonic() - jar_start) * 1000)
+
+    print(f"✅ Build rápido concluído em {time.monotonic() - start:.2f}s")
+    return {'success': True, 'error': None, 'diagnostics': diagnostics,
+            'backend': 'javac', 'timings': timings}
@@ -0,0 +1,47 @@
+"""
+Libera espaço em disco apagando workspaces antigos (LRU) conforme as cotas
+Mesma lógica do coletor em segundo plano, para rodar manualmente ou via cron:
+
+    python gc_workspaces.py                      # cotas do .env
+    python gc_workspaces.py --dry-run            # só mostra o que seria apagado
+    python gc_workspaces.py --quota-mb 1024 --user-quota-mb 128 --min-idle 0
+"""
+import argparse
+import sys
+
+from app import app
+import workspace_gc
+
+
+def _format_mb(size_bytes):
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def run_collector(args):
+    """Executa a coleta e mostra um resumo"""
+    with app.app_context():
+        result = workspace_gc.collect(
+            global_quota_mb=args.quota_mb,
+            user_quota_mb=args.user_quota_mb,
+            min_idle=args.min_idle,
+            dry_run=args.dry_run
+        )
+
+    print(f"\n📊 Resumo{' (simulação)' if result['dry_run'] else ''}:")
+    print(f"   Workspaces: {result['trees']}")
+    print(f"   Uso: {_format_mb(result['usage_bytes_before'])} → {_format_mb(result['usage_bytes_after'])}")
+    for tree in result['evicted']:
+        print(f"   🗑️ {tree['path']} ({_format_mb(tree['size_bytes'])}, último uso {tree['last_used']})")
+    print(f"   Recuperado: {_format_mb(result['reclaimed_bytes'])} em workspaces, "
+          f"{_format_mb(result['artifacts']['bytes'])} em artefatos sem referência")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Coletor de workspaces do PluginForge Studio')
+    parser.add_argument('--dry-run', action='store_true', help='só mostra o que seria apagado')
+    parser.add_argument('--quota-mb', type=int, default=None, help='cota global (padrão: WORKSPACE_QUOTA_MB)')
+    parser.add_argument('--user-quota-mb', type=int, default=None, help='cota por usuário (padrão: WORKSPACE_USER_QUOTA_MB)')
+    parser.add_argument('--min-idle', type=int, default=None, help='segundos sem uso para apagar (padrão: WORKSPACE_GC_MIN_IDLE)')
+    success = run_collector(parser.parse_args())
+    sys.exit(0 if success else 1)
@@ -8,8 +8,12 @@ backlog = 2048
 
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = 'sync'
+# Threads por worker: respostas do chat em streaming (SSE) ocupam uma thread,
+# não o worker inteiro, e o polling de /api/jobs continua sendo atendido
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
 worker_connections = 1000
+# Maior que AI_STREAM_DEADLINE (90s), o prazo de uma resposta transmitida
 timeout = 120
 keepalive = 2
 
@@ -0,0 +1,265 @@
+/*
+ * ========================================
+ * PLUGINFORGE STUDIO - SERVIDOR DE COMPILAÇÃO
+ * ========================================
+ * JVM de longa duração que compila projetos de plugin sem iniciar o Maven.
+ * Iniciado pelo compile_server.py com: java CompileServer.java <porta> <minutos-ocioso>
+ * O token de acesso é lido da variável de ambiente COMPILE_SERVER_TOKEN.
+ *
+ * Protocolo (linhas UTF-8 sobre TCP em 127.0.0.1):
+ *   Requisição: linhas "chave=valor" terminadas por uma linha vazia
+ *     token=...           token de acesso
+ *     command=compile     compile | ping | shutdown
+ *     project=...         diretório do projeto (layout Maven)
+ *     jar=...             caminho do JAR de saída
+ *     classpath=...       classpath da spigot-api
+ *     release=17          versão alvo do Java
+ *     prop.<nome>=...     propriedades para filtrar os resources (${nome} e @nome@)
+ *   Resposta:
+ *     DIAG<TAB>tipo<TAB>arquivo<TAB>linha<TAB>coluna<TAB>mensagem
+ *     TIMING<TAB>etapa<TAB>milissegundos   (compile, jar_write)
+ *     RESULT<TAB>OK|FAIL|ERROR<TAB>milissegundos<TAB>detalhe
+ * ========================================
+ */
+
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.OutputStreamWriter;
+import java.io.PrintWriter;
+import java.net.InetAddress;
+import java.net.ServerSocket;
+import java.net.Socket;
+import java.net.SocketTimeoutException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.util.ArrayList;
+import java.util.Comparator;
+import java.util.HashMap;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.atomic.AtomicLong;
+import java.util.jar.Attributes;
+import java.util.jar.JarEntry;
+import java.util.jar.JarOutputStream;
+import java.util.jar.Manifest;
+import java.util.stream.Collectors;
+import java.util.stream.Stream;
+
+public class CompileServer {
+
+    private static final JavaCompiler COMPILER = ToolProvider.getSystemJavaCompiler();
+    private static final String TOKEN = System.getenv().getOrDefault("COMPILE_SERVER_TOKEN", "");
+    private static final AtomicLong LAST_ACTIVITY = new AtomicLong(System.currentTimeMillis());
+
+    public static void main(String[] args) throws IOException {
+        int port = args.length > 0 ? Integer.parseInt(args[0]) : 0;
+        long idleMillis = (args.length > 1 ? Long.parseLong(args[1]) : 30L) * 60_000L;
+        int threads = Math.max(1, Runtime.getRuntime().availableProcessors());
+
+        if (COMPILER == null) {
+            System.out.println("ERROR javac indisponível (é necessário um JDK, não um JRE)");
+            System.exit(2);
+        }
+
+        ServerSocket server = new ServerSocket(port, 50, InetAddress.getLoopbackAddress());
+        server.setSoTimeout(10_000);
+        System.out.println("LISTENING " + server.getLocalPort());
+        System.out.flush();
+
+        ExecutorService pool = Executors.newFixedThreadPool(threads);
+        while (true) {
+            try {
+                Socket socket = server.accept();
+                LAST_ACTIVITY.set(System.currentTimeMillis());
+                pool.submit(() -> handle(socket));
+            } catch (SocketTimeoutException e) {
+                // Encerra sozinho quando ficar ocioso para não deixar JVMs órfãs
+                if (System.currentTimeMillis() - LAST_ACTIVITY.get() > idleMillis) {
+                    System.exit(0);
+                }
+            }
+        }
+    }
+
+    private static void handle(Socket socket) {
+        try (socket;
+             BufferedReader in = new BufferedReader(new InputStreamReader(socket.getInputStream(), StandardCharsets.UTF_8));
+             PrintWriter out = new PrintWriter(new OutputStreamWriter(socket.getOutputStream(), StandardCharsets.UTF_8), true)) {
+
+            Map<String, String> request = new HashMap<>();
+            Map<String, String> props = new LinkedHashMap<>();
+            String line;
+            while ((line = in.readLine()) != null && !line.isEmpty()) {
+                int eq = line.indexOf('=');
+                if (eq < 0) {
+                    continue;
+                }
+                String key = line.substring(0, eq);
+                String value = line.substring(eq + 1);
+                if (key.startsWith("prop.")) {
+                    props.put(key.substring(5), value);
+                } else {
+                    request.put(key, value);
+                }
+            }
+
+            long start = System.currentTimeMillis();
+            if (TOKEN.isEmpty() || !TOKEN.equals(request.get("token"))) {
+                out.println("RESULT\tERROR\t0\ttoken inválido");
+                return;
+            }
+
+            String command = request.getOrDefault("command", "compile");
+            if (command.equals("ping")) {
+                out.println("RESULT\tOK\t0\tpong");
+                return;
+            }
+            if (command.equals("shutdown")) {
+                out.println("RESULT\tOK\t0\tbye");
+                out.flush();
+                System.exit(0);
+            }
+
+            try {
+                boolean ok = compile(request, props, out);
+                out.println("RESULT\t" + (ok ? "OK" : "FAIL") + "\t" + (System.currentTimeMillis() - start) + "\t");
+            } catch (Exception e) {
+                out.println("RESULT\tERROR\t" + (System.currentTimeMillis() - start) + "\t" + escape(String.valueOf(e)));
+            }
+        } catch (IOException e) {
+            // Cliente desconectou: nada a fazer
+        } finally {
+            LAST_ACTIVITY.set(System.currentTimeMillis());
+        }
+    }
+
+    private static boolean compile(Map<String, String> request, Map<String, String> props, PrintWriter out) throws IOException {
+        Path project = Paths.get(request.get("project"));
+        Path sourceDir = project.resolve("src/main/java");
+        Path resourceDir = project.resolve("src/main/resources");
+        Path classesDir = project.resolve("target/classes");
+        Path jarPath = Paths.get(request.get("jar"));
+        String classpath = request.getOrDefault("classpath", "");
+        String release = request.getOrDefault("release", "17");
+
+        List<File> sources;
+        try (Stream<Path> walk = Files.walk(sourceDir)) {
+            sources = walk.filter(p -> p.toString().endsWith(".java")).map(Path::toFile).collect(Collectors.toList());
+        }
+        if (sources.isEmpty()) {
+            throw new IOException("nenhum arquivo .java em " + sourceDir);
+        }
+
+        deleteTree(classesDir);
+        Files.createDirectories(classesDir);
+
+        long compileStart = System.currentTimeMillis();
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        boolean ok;
+        try (StandardJavaFileManager fileManager = COMPILER.getStandardFileManager(diagnostics, Locale.ROOT, StandardCharsets.UTF_8)) {
+            List<String> options = new ArrayList<>(List.of(
+                "-d", classesDir.toString(),
+                "-encoding", "UTF-8",
+                "--release", release,
+                "-proc:none"
+            ));
+            if (!classpath.isEmpty()) {
+                options.add("-classpath");
+                options.add(classpath);
+            }
+            ok = COMPILER.getTask(null, fileManager, diagnostics, options, null,
+                fileManager.getJavaFileObjectsFromFiles(sources)).call();
+        }
+        out.println("TIMING\tcompile\t" + (System.currentTimeMillis() - compileStart));
+
+        for (Diagnostic<? extends JavaFileObject> d : diagnostics.getDiagnostics()) {
+            String file = d.getSource() != null ? d.getSource().getName() : "";
+            out.println(String.join("\t",
+                "DIAG",
+                d.getKind().name(),
+                escape(file),
+                String.valueOf(d.getLineNumber()),
+                String.valueOf(d.getColumnNumber()),
+                escape(d.getMessage(Locale.ROOT))));
+        }
+
+        if (ok) {
+            long jarStart = System.currentTimeMillis();
+            writeJar(classesDir, resourceDir, jarPath, props);
+            out.println("TIMING\tjar_write\t" + (System.currentTimeMillis() - jarStart));
+        }
+        return ok;
+    }
+
+    private static void writeJar(Path classesDir, Path resourceDir, Path jarPath, Map<String, String> props) throws IOException {
+        Manifest manifest = new Manifest();
+        manifest.getMainAttributes().put(Attributes.Name.MANIFEST_VERSION, "1.0");
+        manifest.getMainAttributes().put(new Attributes.Name("Created-By"), "PluginForge Studio");
+
+        Files.createDirectories(jarPath.getParent());
+        Path tmpJar = jarPath.resolveSibling(jarPath.getFileName() + ".tmp");
+        try (OutputStream file = Files.newOutputStream(tmpJar);
+             JarOutputStream jar = new JarOutputStream(file, manifest)) {
+            addTree(jar, classesDir, null);
+            if (Files.isDirectory(resourceDir)) {
+                addTree(jar, resourceDir, props);
+            }
+        }
+        Files.move(tmpJar, jarPath, java.nio.file.StandardCopyOption.REPLACE_EXISTING);
+    }
+
+    private static void addTree(JarOutputStream jar, Path root, Map<String, String> props) throws IOException {
+        List<Path> files;
+        try (Stream<Path> walk = Files.walk(root)) {
+            files = walk.filter(Files::isRegularFile).sorted().collect(Collectors.toList());
+        }
+        for (Path file : files) {
+            String name = root.relativize(file).toString().replace(File.separatorChar, '/');
+            byte[] data = Files.readAllBytes(file);
+            if (props != null) {
+                data = filter(new String(data, StandardCharsets.UTF_8), props).getBytes(StandardCharsets.UTF_8);
+            }
+            jar.putNextEntry(new JarEntry(name));
+            jar.write(data);
+            jar.closeEntry();
+        }
+    }
+
+    private static String filter(String content, Map<String, String> props) {
+        for (Map.Entry<String, String> prop : props.entrySet()) {
+            content = content.replace("${" + prop.getKey() + "}", prop.getValue());
+            content = content.replace("@" + prop.getKey() + "@", prop.getValue());
+        }
+        return content;
+    }
+
+    private static void deleteTree(Path root) throws IOException {
+        if (!Files.exists(root)) {
+            return;
+        }
+        try (Stream<Path> walk = Files.walk(root)) {
+            for (Path p : walk.sorted(Comparator.reverseOrder()).collect(Collectors.toList())) {
+                Files.delete(p);
+            }
+        }
+    }
+
+    private static String escape(String value) {
+        return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\r", "").replace("\n", "\\n");
+    }
+}
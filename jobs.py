@@ -0,0 +1,283 @@
+"""
+Jobs assíncronos do PluginForge Studio
+Geração, modificação e recriação de plugins rodam em threads de fundo; a
+requisição HTTP só cria o job e retorna o ID, e o navegador consulta o
+andamento em /api/jobs/<id>. Pedidos repetidos enquanto um job igual está
+em andamento são agrupados nele (single-flight).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, UTC, timedelta
+
+from models import db, Job
+from storage import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Configurações
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+# Jobs sem atualização há mais tempo que isso são considerados interrompidos (segundos)
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '900'))
+# Janela em que um Idempotency-Key repetido devolve o mesmo job (segundos)
+JOB_IDEMPOTENCY_SECONDS = int(os.getenv('JOB_IDEMPOTENCY_SECONDS', '86400'))
+
+# Serializa a criação de jobs deduplicados entre os workers do gunicorn
+LOCK_FILE = CACHE_DIR / "jobs.lock"
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_create_lock = threading.Lock()
+
+
+class IdempotencyKeyConflict(Exception):
+    """Idempotency-Key reutilizado com parâmetros diferentes"""
+
+
+def _get_executor():
+    """Executor criado sob demanda (um por processo, seguro após o fork do gunicorn)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='pluginforge-job')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _as_utc(value):
+    """Datas do SQLite voltam sem fuso horário"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
+
+
+class JobContext:
+    """Permite ao pipeline informar o estágio e o progresso do job"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def update(self, stage, progress=None, queue_position=None):
+        """Atualiza estágio/progresso do job (faz commit da sessão atual)"""
+        job = db.session.get(Job, self.job_id)
+        if job is None:
+            return
+        job.stage = stage
+        if progress is not None:
+            job.progress = progress
+        job.queue_position = queue_position
+        db.session.commit()
+
+    def set_plugin(self, plugin_id):
+        """Associa o job ao plugin criado/alterado"""
+        job = db.session.get(Job, self.job_id)
+        if job is not None:
+            job.plugin_id = plugin_id
+            db.session.commit()
+
+    def queue_callback(self, progress):
+        """Callback para build_project: mostra a posição na fila de compilação"""
+        def on_position(position):
+            if position:
+                self.update('waiting_compile_slot', progress, queue_position=position)
+            else:
+                self.update('compiling', progress)
+        return on_position
+
+
+class NullJobContext:
+    """Contexto vazio para quando o pipeline roda fora de um job"""
+
+    def update(self, stage, progress=None, queue_position=None):
+        pass
+
+    def set_plugin(self, plugin_id):
+        pass
+
+    def queue_callback(self, progress):
+        return None
+
+
+def create_job(user_id, kind, plugin_id=None):
+    """Cria o registro do job (status queued)"""
+    job = Job(user_id=user_id, kind=kind, plugin_id=plugin_id, status='queued', stage='queued', progress=0)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def request_key(user_id, kind, params):
+    """
+    Chave de deduplicação de um pedido.
+
+    Args:
+        user_id (str): Usuário que fez o pedido
+        kind (str): Tipo do job
+        params (dict): Parâmetros do pipeline (espaços extras são ignorados)
+
+    Returns:
+        str: SHA-256 do usuário, tipo e parâmetros normalizados
+    """
+    normalized = {
+        key: ' '.join(value.split()) if isinstance(value, str) else value
+        for key, value in params.items()
+    }
+    payload = json.dumps([user_id, kind, normalized], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def find_job(user_id, kind, dedup_key, idempotency_key=None):
+    """
+    Job existente que atende o pedido.
+
+    Com Idempotency-Key, devolve o job criado com a mesma chave dentro de
+    JOB_IDEMPOTENCY_SECONDS (mesmo se já terminou). Sem ela, só um job com
+    os mesmos parâmetros ainda em andamento.
+
+    Returns:
+        Job: Job encontrado, ou None
+
+    Raises:
+        IdempotencyKeyConflict: A chave já foi usada com outros parâmetros
+    """
+    if idempotency_key:
+        cutoff = datetime.now(UTC) - timedelta(seconds=JOB_IDEMPOTENCY_SECONDS)
+        job = Job.query.filter(
+            Job.user_id == user_id, Job.idempotency_key == idempotency_key, Job.created_at >= cutoff
+        ).order_by(Job.created_at.desc()).first()
+        if job is not None:
+            if job.kind != kind or job.dedup_key != dedup_key:
+                raise IdempotencyKeyConflict('Idempotency-Key já usado com outros dados')
+            return job
+
+    active_jobs = Job.query.filter(
+        Job.user_id == user_id, Job.kind == kind, Job.dedup_key == dedup_key,
+        Job.status.in_(('queued', 'running'))
+    ).order_by(Job.created_at.desc()).all()
+    for job in active_jobs:
+        if not mark_if_stale(job):
+            return job
+    return None
+
+
+@contextmanager
+def _creation_lock():
+    with _create_lock:
+        LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(LOCK_FILE, 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def create_or_join_job(user_id, kind, dedup_key, idempotency_key=None, plugin_id=None):
+    """
+    Cria o job, ou devolve o job igual já existente (veja find_job).
+
+    A busca e a criação acontecem sob um lock entre workers, então pedidos
+    simultâneos iguais resultam em um único job.
+
+    Returns:
+        tuple: (job, created) - created é False quando o pedido foi agrupado
+
+    Raises:
+        IdempotencyKeyConflict: A chave já foi usada com outros parâmetros
+    """
+    with _creation_lock():
+        db.session.expire_all()
+        job = find_job(user_id, kind, dedup_key, idempotency_key)
+        if job is not None:
+            return job, False
+        job = Job(user_id=user_id, kind=kind, plugin_id=plugin_id, status='queued', stage='queued', progress=0,
+                  dedup_key=dedup_key, idempotency_key=idempotency_key)
+        db.session.add(job)
+        db.session.commit()
+        return job, True
+
+
+def _finish(job_id, status, result=None, error=None):
+    """Grava o resultado final do job"""
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return
+    job.status = status
+    job.stage = 'done' if status == 'completed' else 'failed'
+    job.progress = 100
+    job.queue_position = None
+    job.result = json.dumps(result) if result is not None else None
+    job.error = error
+    job.finished_at = datetime.now(UTC)
+    db.session.commit()
+
+
+def submit(app, job_id, func, *args, **kwargs):
+    """
+    Executa func(job_context, *args, **kwargs) em segundo plano.
+
+    A função deve retornar um dict com a chave 'success'; o job termina
+    como completed ou failed de acordo com ela.
+    """
+    def run():
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            job.status = 'running'
+            job.stage = 'started'
+            job.progress = 5
+            job.started_at = datetime.now(UTC)
+            db.session.commit()
+
+            try:
+                result = func(JobContext(job_id), *args, **kwargs)
+                if result.get('success'):
+                    _finish(job_id, 'completed', result=result)
+                else:
+                    _finish(job_id, 'failed', result=result, error=result.get('error'))
+            except Exception as e:
+                print(f"❌ Erro no job {job_id}: {str(e)}")
+                traceback.print_exc()
+                db.session.rollback()
+                _finish(job_id, 'failed', error=f'Erro interno: {str(e)}')
+
+    _get_executor().submit(run)
+
+
+def mark_if_stale(job):
+    """Marca como falho um job que parou de ser atualizado (ex: worker reiniciado)"""
+    if job.status not in ('queued', 'running'):
+        return False
+    updated_at = _as_utc(job.updated_at or job.created_at)
+    if datetime.now(UTC) - updated_at < timedelta(seconds=JOB_STALE_SECONDS):
+        return False
+    _finish(job.id, 'failed', error='O job foi interrompido (o servidor reiniciou). Tente novamente.')
+    return True
+
+
+def serialize(job):
+    """Representação JSON do job para o endpoint de status"""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'stage': job.stage,
+        'progress': job.progress,
+        'queue_position': job.queue_position,
+        'plugin_id': job.plugin_id,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'created_at': _as_utc(job.created_at).isoformat() if job.created_at else None,
+        'started_at': _as_utc(job.started_at).isoformat() if job.started_at else None,
+        'finished_at': _as_utc(job.finished_at).isoformat() if job.finished_at else None,
+    }
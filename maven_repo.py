@@ -0,0 +1,211 @@
+"""
+Repositório Maven local gerenciado do PluginForge Studio
+Cada versão do Minecraft é preparada (seed) uma única vez; depois disso todos
+os builds rodam em modo offline contra este repositório.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+from datetime import datetime, UTC
+from pathlib import Path
+
+import symbol_index
+from storage import BASE_DIR, CACHE_DIR
+from toolchain import resolve_api_classpath
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Configurações
+MAVEN_REPO_DIR = Path(os.getenv('MAVEN_REPO_DIR', CACHE_DIR / "m2"))
+MAVEN_OFFLINE = os.getenv('MAVEN_OFFLINE', 'true').lower() == 'true'
+MAVEN_SEED_ON_STARTUP = os.getenv('MAVEN_SEED_ON_STARTUP', 'false').lower() == 'true'
+SUPPORTED_MC_VERSIONS = [
+    version.strip()
+    for version in os.getenv(
+        'MC_VERSIONS',
+        '1.20.1,1.20,1.19.4,1.19.3,1.19.2,1.18.2,1.17.1,1.16.5,1.15.2,1.14.4'
+    ).split(',')
+    if version.strip()
+]
+SEED_TIMEOUT = 900
+
+POM_TEMPLATE = BASE_DIR / "pom.xml"
+SEEDED_DIR = MAVEN_REPO_DIR / ".seeded"
+
+SEED_PLUGIN_CODE = """package com.pluginforge.seed;
+
+import org.bukkit.plugin.java.JavaPlugin;
+
+public class SeedPlugin extends JavaPlugin {
+}
+"""
+
+SEED_PLUGIN_YML = """name: SeedPlugin
+version: ${project.version}
+main: com.pluginforge.seed.SeedPlugin
+"""
+
+
+def is_seeded(mc_version):
+    """Verifica se a versão do Minecraft já foi preparada no repositório local"""
+    return bool(mc_version) and (SEEDED_DIR / mc_version).exists()
+
+
+def seeded_versions():
+    """Lista as versões do Minecraft já preparadas"""
+    if not SEEDED_DIR.exists():
+        return []
+    return sorted(marker.name for marker in SEEDED_DIR.iterdir())
+
+
+def get_maven_args(mc_version):
+    """
+    Argumentos do Maven para builds contra o repositório gerenciado.
+
+    Args:
+        mc_version (str): Versão do Minecraft do projeto
+
+    Returns:
+        list: Argumentos do Maven (modo offline quando a versão já foi preparada)
+    """
+    args = ['-B', f'-Dmaven.repo.local={MAVEN_REPO_DIR}']
+    if MAVEN_OFFLINE and is_seeded(mc_version):
+        args.append('-o')
+    else:
+        # Sem re-checagem de snapshots para não travar builds seguintes
+        args.append('-nsu')
+    return args
+
+
+def check_offline_ready(mc_version):
+    """
+    Verifica se um build pode rodar para a versão informada.
+
+    Returns:
+        str: Mensagem de erro se a versão não foi preparada no modo offline, ou None
+    """
+    if not MAVEN_OFFLINE or is_seeded(mc_version):
+        return None
+    return (
+        f"A versão {mc_version} do Minecraft ainda não foi preparada no repositório Maven local. "
+        f"Execute: python seed_maven_repo.py {mc_version}"
+    )
+
+
+def _render_seed_project(project_dir, mc_version):
+    """Cria um projeto mínimo com o pom.xml do template para baixar as dependências"""
+    shutil.rmtree(project_dir, ignore_errors=True)
+    package_dir = project_dir / "src" / "main" / "java" / "com" / "pluginforge" / "seed"
+    resources_dir = project_dir / "src" / "main" / "resources"
+    package_dir.mkdir(parents=True, exist_ok=True)
+    resources_dir.mkdir(parents=True, exist_ok=True)
+
+    (package_dir / "SeedPlugin.java").write_text(SEED_PLUGIN_CODE, encoding='utf-8')
+    (resources_dir / "plugin.yml").write_text(SEED_PLUGIN_YML, encoding='utf-8')
+
+    pom_content = POM_TEMPLATE.read_text(encoding='utf-8')
+    pom_content = pom_content.replace('{PLUGIN_NAME}', 'SeedPlugin')
+    pom_content = pom_content.replace('{PLUGIN_VERSION}', '1.0.0')
+    pom_content = pom_content.replace('{MC_VERSION}', mc_version)
+    (project_dir / "pom.xml").write_text(pom_content, encoding='utf-8')
+
+
+def seed_version(maven_cmd, mc_version, force=False):
+    """
+    Prepara o repositório local para uma versão do Minecraft.
+
+    Executa um build completo (clean install) de um plugin mínimo online,
+    baixando a spigot-api e todos os plugins Maven do ciclo de vida, guarda
+    o classpath resolvido para os caminhos de build rápidos e extrai o
+    índice de símbolos da versão.
+
+    Args:
+        maven_cmd (str): Comando Maven
+        mc_version (str): Versão do Minecraft
+        force (bool): Prepara novamente mesmo se já estiver pronto
+
+    Returns:
+        dict: {'success': bool, 'error': str}
+    """
+    if is_seeded(mc_version) and not force:
+        return {'success': True, 'error': None}
+
+    SEEDED_DIR.mkdir(parents=True, exist_ok=True)
+    seed_root = CACHE_DIR / "seed"
+    seed_root.mkdir(parents=True, exist_ok=True)
+
+    with open(seed_root / f"{mc_version}.lock", 'w') as lock:
+        # Evita que dois workers preparem a mesma versão ao mesmo tempo
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if is_seeded(mc_version) and not force:
+                return {'success': True, 'error': None}
+
+            project_dir = seed_root / mc_version
+            _render_seed_project(project_dir, mc_version)
+            repo_args = ['-B', f'-Dmaven.repo.local={MAVEN_REPO_DIR}']
+
+            print(f"🌱 Preparando repositório Maven para Minecraft {mc_version}...")
+            result = subprocess.run(
+                [maven_cmd, *repo_args, 'clean', 'install'],
+                cwd=project_dir,
+                capture_output=True,
+                text=True,
+                timeout=SEED_TIMEOUT
+            )
+            if result.returncode != 0:
+                error_msg = f"Falha ao preparar Minecraft {mc_version}:\n{result.stdout[-4000:]}\n{result.stderr[-2000:]}"
+                print(f"❌ {error_msg}")
+                return {'success': False, 'error': error_msg}
+
+            classpath = resolve_api_classpath(maven_cmd, project_dir, mc_version, extra_args=repo_args)
+            if classpath is None:
+                return {'success': False, 'error': f"Falha ao resolver o classpath da spigot-api {mc_version}"}
+            symbol_index.build_index(mc_version, classpath)
+
+            (SEEDED_DIR / mc_version).write_text(datetime.now(UTC).isoformat(), encoding='utf-8')
+            shutil.rmtree(project_dir, ignore_errors=True)
+            print(f"✅ Minecraft {mc_version} pronto para builds offline")
+            return {'success': True, 'error': None}
+
+        except subprocess.TimeoutExpired:
+            error_msg = f"Preparação do Minecraft {mc_version} excedeu o tempo limite"
+            print(f"❌ {error_msg}")
+            return {'success': False, 'error': error_msg}
+        except OSError as e:
+            error_msg = f"Erro ao preparar Minecraft {mc_version}: {str(e)}"
+            print(f"❌ {error_msg}")
+            return {'success': False, 'error': error_msg}
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def seed_versions(maven_cmd, versions=None, force=False):
+    """
+    Prepara várias versões do Minecraft (por padrão, todas as suportadas).
+
+    Returns:
+        dict: {versão: {'success': bool, 'error': str}}
+    """
+    return {
+        version: seed_version(maven_cmd, version, force=force)
+        for version in (versions or SUPPORTED_MC_VERSIONS)
+    }
+
+
+def seed_in_background(maven_cmd, versions=None):
+    """Prepara as versões em uma thread separada (usado na inicialização)"""
+    pending = [version for version in (versions or SUPPORTED_MC_VERSIONS) if not is_seeded(version)]
+    if not maven_cmd or not pending:
+        return None
+
+    thread = threading.Thread(target=seed_versions, args=(maven_cmd, pending), daemon=True, name='maven-seed')
+    thread.start()
+    return thread
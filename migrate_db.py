@@ -46,5 +46,129 @@ def migrate_database():
             print("\nℹ️  If using SQLite and columns already exist, you can ignore this error.")
             print("   The new fields will be created automatically when creating new tables.")
 
+def migrate_plugin_versions():
+    """Add config.yml content to plugin versions (versions are restorable into the workspace)"""
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect, text
+            inspector = inspect(db.engine)
+            columns = [col['name'] for col in inspector.get_columns('plugin_versions')]
+            
+            if 'config_yml_content' not in columns:
+                print("📝 Adding config_yml_content to plugin_versions table...")
+                
+                with db.engine.connect() as conn:
+                    conn.execute(text("ALTER TABLE plugin_versions ADD COLUMN config_yml_content TEXT"))
+                    conn.commit()
+                
+                print("✅ Migration completed successfully!")
+                print("   - Added config_yml_content column")
+            else:
+                print("✅ Plugin version fields already exist in database")
+                
+        except Exception as e:
+            print(f"❌ Migration error: {e}")
+
+def migrate_artifacts():
+    """Add artifact store references to plugins and plugin versions"""
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect, text
+            inspector = inspect(db.engine)
+            
+            with db.engine.connect() as conn:
+                for table in ('plugins', 'plugin_versions'):
+                    columns = [col['name'] for col in inspector.get_columns(table)]
+                    if 'artifact_sha256' not in columns:
+                        print(f"📝 Adding artifact_sha256 to {table} table...")
+                        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN artifact_sha256 VARCHAR(64)"))
+                        print(f"   - Added artifact_sha256 column to {table}")
+                    else:
+                        print(f"✅ Artifact reference already exists in {table}")
+                conn.commit()
+                
+        except Exception as e:
+            print(f"❌ Migration error: {e}")
+
+def migrate_job_keys():
+    """Add request deduplication and Idempotency-Key columns to jobs"""
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect, text
+            inspector = inspect(db.engine)
+            columns = [col['name'] for col in inspector.get_columns('jobs')]
+            
+            with db.engine.connect() as conn:
+                if 'dedup_key' not in columns:
+                    print("📝 Adding dedup_key to jobs table...")
+                    conn.execute(text("ALTER TABLE jobs ADD COLUMN dedup_key VARCHAR(64)"))
+                    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_dedup_key ON jobs (dedup_key)"))
+                    print("   - Added dedup_key column")
+                else:
+                    print("✅ dedup_key already exists in jobs")
+                
+                if 'idempotency_key' not in columns:
+                    print("📝 Adding idempotency_key to jobs table...")
+                    conn.execute(text("ALTER TABLE jobs ADD COLUMN idempotency_key VARCHAR(100)"))
+                    print("   - Added idempotency_key column")
+                else:
+                    print("✅ idempotency_key already exists in jobs")
+                conn.commit()
+                
+        except Exception as e:
+            print(f"❌ Migration error: {e}")
+
+def migrate_user_ai_cache():
+    """Add the AI response cache opt-out column to users"""
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect, text
+            inspector = inspect(db.engine)
+            columns = [col['name'] for col in inspector.get_columns('users')]
+            
+            if 'ai_cache_opt_out' not in columns:
+                print("📝 Adding ai_cache_opt_out to users table...")
+                with db.engine.connect() as conn:
+                    conn.execute(text("ALTER TABLE users ADD COLUMN ai_cache_opt_out BOOLEAN DEFAULT FALSE"))
+                    conn.commit()
+                print("   - Added ai_cache_opt_out column")
+            else:
+                print("✅ ai_cache_opt_out already exists in users")
+                
+        except Exception as e:
+            print(f"❌ Migration error: {e}")
+
+def backfill_artifact_index():
+    """Index JARs of plugins built before the artifact store (one-time workspace scan)"""
+    with app.app_context():
+        try:
+            import artifact_store
+            result = artifact_store.backfill_legacy_plugins()
+            print(f"✅ Artifact index backfilled: {result['indexed']} plugins")
+            if result['missing']:
+                print(f"   - {len(result['missing'])} compiled plugins have no JAR on disk")
+        except Exception as e:
+            print(f"❌ Backfill error: {e}")
+
+def migrate_workspace_layout():
+    """Move flat workspace trees into the sharded layout (run with the app stopped)"""
+    with app.app_context():
+        try:
+            import workspace
+            from models import Plugin
+            plugin_ids = {plugin_id for (plugin_id,) in db.session.query(Plugin.id)}
+            result = workspace.migrate_layout(plugin_ids)
+            print(f"✅ Workspace layout migrated: {result['moved']} trees moved")
+            if result['skipped']:
+                print(f"   - {result['skipped']} trees left in place (in use, orphaned or superseded)")
+        except Exception as e:
+            print(f"❌ Workspace migration error: {e}")
+
 if __name__ == '__main__':
     migrate_database()
+    migrate_plugin_versions()
+    migrate_artifacts()
+    migrate_job_keys()
+    migrate_user_ai_cache()
+    backfill_artifact_index()
+    migrate_workspace_layout()
@@ -27,6 +27,9 @@ class User(UserMixin, db.Model):
     subscription_start = db.Column(db.DateTime)
     subscription_end = db.Column(db.DateTime)
     
+    # Preferências
+    ai_cache_opt_out = db.Column(db.Boolean, default=False)  # Sempre chamar a IA, sem reaproveitar respostas em cache
+    
     # Relacionamentos
     plugins = db.relationship('Plugin', backref='author', lazy=True, cascade='all, delete-orphan')
     
@@ -67,7 +70,8 @@ class Plugin(db.Model):
     
     # Status do plugin
     status = db.Column(db.String(20), default='draft')  # draft, generating, compiled, error
-    compiled_file = db.Column(db.String(255))  # Caminho para o arquivo compilado
+    compiled_file = db.Column(db.String(255))  # Nome do JAR compilado (antigos: caminho no workspace)
+    artifact_sha256 = db.Column(db.String(64), db.ForeignKey('artifacts.sha256'))  # JAR atual no repositório de artefatos
     last_compile_attempt = db.Column(db.DateTime)
     error_message = db.Column(db.Text)
     
@@ -136,14 +140,129 @@ class PluginVersion(db.Model):
     # Código da versão
     main_code = db.Column(db.Text)
     plugin_yml_content = db.Column(db.Text)
+    config_yml_content = db.Column(db.Text)
     package_name = db.Column(db.String(100))
     
+    # JAR compilado desta versão (None se o build falhou)
+    artifact_sha256 = db.Column(db.String(64), db.ForeignKey('artifacts.sha256'))
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
     
     def __repr__(self):
         return f'<PluginVersion {self.plugin.name} v{self.version_number}>'
 
+class Job(db.Model):
+    """Job assíncrono de geração/modificação/recriação de plugin"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    plugin_id = db.Column(db.String(36), db.ForeignKey('plugins.id'))
+    
+    # Tipo e andamento do job
+    kind = db.Column(db.String(20), nullable=False)  # generate, chat, recreate, matrix
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    stage = db.Column(db.String(40), default='queued')
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    queue_position = db.Column(db.Integer)  # Posição na fila de compilação
+    
+    # Deduplicação: hash do usuário + parâmetros normalizados e Idempotency-Key do cliente
+    dedup_key = db.Column(db.String(64), index=True)
+    idempotency_key = db.Column(db.String(100))
+    
+    # Resultado (JSON) ou erro
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<Job {self.kind} {self.status}>'
+
+class BuildMetric(db.Model):
+    """Tempo de cada etapa de um build (para métricas históricas de compilação)"""
+    __tablename__ = 'build_metrics'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    plugin_id = db.Column(db.String(36), db.ForeignKey('plugins.id'), nullable=False)
+    plugin_version_id = db.Column(db.String(36), db.ForeignKey('plugin_versions.id'))
+    
+    # Contexto do build
+    minecraft_version = db.Column(db.String(20))
+    backend = db.Column(db.String(20))  # cache, compile_server, javac, maven, docker, none
+    success = db.Column(db.Boolean, default=False)
+    
+    # Tempos em milissegundos (stages: JSON {etapa: ms})
+    total_ms = db.Column(db.Integer)
+    stages = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), index=True)
+    
+    def __repr__(self):
+        return f'<BuildMetric {self.backend} {self.total_ms}ms>'
+
+class BuildLog(db.Model):
+    """Log completo de um build (arquivo comprimido em build_logs/{id}.log.gz)"""
+    __tablename__ = 'build_logs'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    plugin_id = db.Column(db.String(36), db.ForeignKey('plugins.id'), nullable=False, index=True)
+    plugin_version_id = db.Column(db.String(36), db.ForeignKey('plugin_versions.id'))
+    
+    # Resultado do build
+    success = db.Column(db.Boolean, default=False)
+    summary = db.Column(db.String(500))
+    
+    # Tamanho do log (original e comprimido, em bytes)
+    size = db.Column(db.Integer, default=0)
+    compressed_size = db.Column(db.Integer, default=0)
+    
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    
+    # Relacionamentos
+    diagnostics = db.relationship('BuildDiagnostic', backref='build_log', lazy=True, cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<BuildLog {self.id} {"ok" if self.success else "falha"}>'
+
+class BuildDiagnostic(db.Model):
+    """Diagnóstico do compilador (erro/aviso) de um build"""
+    __tablename__ = 'build_diagnostics'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    build_log_id = db.Column(db.String(36), db.ForeignKey('build_logs.id'), nullable=False, index=True)
+    plugin_id = db.Column(db.String(36), db.ForeignKey('plugins.id'), nullable=False, index=True)
+    
+    severity = db.Column(db.String(10), nullable=False)  # ERROR, WARNING, NOTE
+    file = db.Column(db.String(255))
+    line = db.Column(db.Integer)
+    column = db.Column(db.Integer)
+    message = db.Column(db.Text, nullable=False)
+    
+    def __repr__(self):
+        return f'<BuildDiagnostic {self.severity} {self.file}:{self.line}>'
+
+class Artifact(db.Model):
+    """JAR compilado no repositório de artefatos (endereçado pelo SHA-256 do conteúdo)"""
+    __tablename__ = 'artifacts'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    
+    # Plugins e versões que apontam para este JAR
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+    
+    def __repr__(self):
+        return f'<Artifact {self.sha256[:12]} refs={self.ref_count}>'
+
 def init_db(app):
     """Inicializar banco de dados"""
     db.init_app(app)
@@ -153,7 +272,8 @@ def init_db(app):
         db.create_all()
         
         # Verificar se já existe um usuário admin
-        admin_user = User.query.filter_by(username='admin').first()
+        # (só a coluna id: o banco pode ainda não ter colunas novas de users antes do migrate_db.py)
+        admin_user = db.session.query(User.id).filter_by(username='admin').first()
         if not admin_user:
             admin_user = User(username='admin', email='admin@pluginforge.com')
             admin_user.set_password('admin123')
@@ -0,0 +1,37 @@
+"""
+Prepara o repositório Maven local para builds offline
+Execute uma vez por servidor (e sempre que adicionar uma versão do Minecraft):
+
+    python seed_maven_repo.py              # todas as versões suportadas
+    python seed_maven_repo.py 1.20.1 1.19.4
+    python seed_maven_repo.py --force 1.20.1
+"""
+import sys
+
+from app import MAVEN_COMMANDS, find_maven_executable
+import maven_repo
+
+
+def seed_repository(versions, force=False):
+    """Prepara as versões informadas e mostra um resumo"""
+    maven_cmd = find_maven_executable(MAVEN_COMMANDS)
+    if not maven_cmd:
+        print("❌ Maven não encontrado. Instale o Maven para preparar o repositório.")
+        return False
+
+    print(f"📦 Repositório Maven: {maven_repo.MAVEN_REPO_DIR}")
+    results = maven_repo.seed_versions(maven_cmd, versions or None, force=force)
+
+    print("\n📊 Resumo:")
+    for version, result in results.items():
+        print(f"   {'✅' if result['success'] else '❌'} {version}")
+
+    return all(result['success'] for result in results.values())
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    force = '--force' in args
+    versions = [arg for arg in args if arg != '--force']
+    success = seed_repository(versions, force=force)
+    sys.exit(0 if success else 1)
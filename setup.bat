@@ -63,6 +63,16 @@ pip install -r requirements.txt --quiet
 echo OK: Dependencias instaladas
 echo.
 
+REM Prepara o repositório Maven offline
+echo Preparando repositorio Maven para builds offline...
+python seed_maven_repo.py
+if %errorlevel% neq 0 (
+    echo AVISO: Algumas versoes nao foram preparadas. Execute novamente: python seed_maven_repo.py
+) else (
+    echo OK: Repositorio Maven preparado
+)
+echo.
+
 REM Verifica API Key
 echo Verificando configuracao da API...
 findstr /C:"SUA_CHAVE_API_AQUI" app.py >nul 2>&1
@@ -58,6 +58,15 @@ pip install -r requirements.txt --quiet
 echo "✅ Dependências instaladas"
 echo ""
 
+# Prepara o repositório Maven offline
+echo "🌱 Preparando repositório Maven para builds offline..."
+if python seed_maven_repo.py; then
+    echo "✅ Repositório Maven preparado"
+else
+    echo "⚠️  Algumas versões não foram preparadas. Execute novamente: python seed_maven_repo.py"
+fi
+echo ""
+
 # Verifica API Key
 echo "🔑 Verificando configuração da API..."
 if grep -q "SUA_CHAVE_API_AQUI" app.py; then
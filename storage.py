@@ -0,0 +1,120 @@
+"""
+Layout de diretórios do PluginForge Studio
+Centraliza os caminhos usados pelo sistema de build (workspace e caches)
+"""
+
+import hashlib
+import os
+import re
+from pathlib import Path
+
+# Diretório raiz da aplicação
+BASE_DIR = Path(__file__).parent
+
+# Diretório base dos projetos (um workspace persistente por plugin, em shards ab/cd/)
+WORKSPACE_DIR = BASE_DIR / "workspace"
+
+# Subdiretório com os projetos da matriz de compatibilidade
+MATRIX_DIR_NAME = "matrix"
+
+# Logs completos dos builds (comprimidos, referenciados pelo ID no banco)
+BUILD_LOGS_DIR = BASE_DIR / "build_logs"
+
+# JARs compilados, endereçados pelo conteúdo (independentes dos workspaces)
+ARTIFACTS_DIR = BASE_DIR / "artifacts"
+
+# Nível de shard do workspace (dois dígitos hexadecimais)
+_SHARD_PATTERN = re.compile(r'^[0-9a-f]{2}$')
+
+# ID de plugin (UUID) no nome de diretórios do layout antigo ({nome}_{id})
+_PLUGIN_ID_PATTERN = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+# Diretório para caches do sistema de build (classpath, servidor de compilação, etc.)
+CACHE_DIR = Path(os.getenv('PLUGINFORGE_CACHE_DIR', BASE_DIR / "cache"))
+
+
+def ensure_dirs():
+    """Cria os diretórios base se ainda não existirem"""
+    WORKSPACE_DIR.mkdir(parents=True, exist_ok=True)
+    BUILD_LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def workspace_shard(plugin_id):
+    """Prefixo de dois níveis (ab/cd) derivado do hash do ID do plugin"""
+    digest = hashlib.sha256(plugin_id.encode('utf-8')).hexdigest()
+    return Path(digest[:2]) / digest[2:4]
+
+
+def plugin_workspace_dir(plugin_id, mc_version=None):
+    """
+    Diretório de projeto (estável) de um plugin.
+
+    Único ponto que resolve caminhos de workspace: workspace/ab/cd/{id} para
+    o projeto do plugin e workspace/matrix/ab/cd/{id}/{versão} para a matriz
+    de compatibilidade. Os shards mantêm cada diretório com poucas entradas.
+
+    Args:
+        plugin_id (str): ID do plugin
+        mc_version (str): Versão do Minecraft na matriz (None: projeto do plugin)
+
+    Returns:
+        Path: Diretório do projeto
+    """
+    if mc_version is None:
+        return WORKSPACE_DIR / workspace_shard(plugin_id) / plugin_id
+    return WORKSPACE_DIR / MATRIX_DIR_NAME / workspace_shard(plugin_id) / plugin_id / mc_version
+
+
+def _subdirs(path):
+    try:
+        return sorted(entry for entry in path.iterdir() if entry.is_dir())
+    except OSError:
+        return []
+
+
+def _sharded_entries(root):
+    """Diretórios no último nível de shards (root/ab/cd/*) e os que estão fora dos shards"""
+    sharded, unsharded = [], []
+    for first in _subdirs(root):
+        if not _SHARD_PATTERN.match(first.name):
+            unsharded.append(first)
+            continue
+        for second in _subdirs(first):
+            sharded.extend(_subdirs(second))
+    return sharded, unsharded
+
+
+def iter_workspace_trees():
+    """
+    Percorre as árvores de build do workspace.
+
+    Yields:
+        tuple: (tipo, plugin_id, versão da matriz, diretório), onde o tipo é
+               'plugin', 'matrix' ou 'legacy' (layout plano anterior aos
+               shards; plugin_id é o ID contido no nome, se houver)
+    """
+    if not WORKSPACE_DIR.exists():
+        return
+
+    sharded, unsharded = _sharded_entries(WORKSPACE_DIR)
+    for path in sharded:
+        yield 'plugin', path.name, None, path
+
+    for path in unsharded:
+        if path.name != MATRIX_DIR_NAME:
+            yield 'legacy', plugin_id_in_name(path.name), None, path
+            continue
+        matrix_sharded, matrix_unsharded = _sharded_entries(path)
+        for plugin_dir in matrix_sharded:
+            for version_dir in _subdirs(plugin_dir):
+                yield 'matrix', plugin_dir.name, version_dir.name, version_dir
+        for plugin_dir in matrix_unsharded:
+            yield 'legacy', plugin_id_in_name(plugin_dir.name), None, plugin_dir
+
+
+def plugin_id_in_name(name):
+    """ID de plugin contido no nome de um diretório antigo do workspace (None se não houver)"""
+    match = _PLUGIN_ID_PATTERN.search(name)
+    return match.group() if match else None
@@ -0,0 +1,579 @@
+"""
+Índice de símbolos da spigot-api do PluginForge Studio
+Extrai uma única vez, dos JARs em cache de cada versão do Minecraft, os
+pacotes, classes, métodos e campos públicos, e confere os imports e as
+referências qualificadas do código gerado antes de compilar: um build que
+certamente falharia é recusado em milissegundos, com a linha e a coluna do
+símbolo inexistente.
+"""
+
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+import zipfile
+from datetime import datetime, UTC
+from pathlib import Path
+
+from storage import CACHE_DIR
+from toolchain import get_api_classpath
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Configurações
+SYMBOL_INDEX_ENABLED = os.getenv('SYMBOL_INDEX_ENABLED', 'true').lower() == 'true'
+
+# Um índice comprimido por versão do Minecraft
+SYMBOLS_DIR = CACHE_DIR / "symbols"
+INDEX_FORMAT = 1
+
+_ACC_PUBLIC = 0x0001
+_ACC_PROTECTED = 0x0004
+_ACC_SYNTHETIC = 0x1000
+
+# Bytes ocupados por cada tipo de entrada do constant pool (exceto Utf8 e Class)
+_CONSTANT_SIZES = {3: 4, 4: 4, 5: 8, 6: 8, 8: 2, 9: 4, 10: 4, 11: 4, 12: 4, 15: 3, 16: 2, 17: 4, 18: 4, 19: 2, 20: 2}
+
+# Superclasses do JDK que aparecem na hierarquia das classes da API
+_JDK_CLASSES = {
+    'java.lang.Object': (None, {'getClass', 'hashCode', 'equals', 'toString', 'notify', 'notifyAll', 'wait'}),
+    'java.lang.Enum': ('java.lang.Object', {'name', 'ordinal', 'compareTo', 'getDeclaringClass', 'valueOf', 'describeConstable'}),
+    'java.lang.Record': ('java.lang.Object', set()),
+}
+
+# Nomes de java.lang têm prioridade sobre imports com curinga
+_JAVA_LANG_TYPES = {
+    'Boolean', 'Byte', 'Character', 'Class', 'Double', 'Enum', 'Exception', 'Float', 'Integer', 'Iterable',
+    'Long', 'Math', 'Number', 'Object', 'Override', 'Record', 'Runnable', 'Runtime', 'Short', 'String',
+    'StringBuilder', 'System', 'Thread', 'Throwable', 'Void',
+}
+
+# Comentários, text blocks e literais de string/caractere
+_NOISE_PATTERN = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'',
+    re.DOTALL
+)
+_PACKAGE_PATTERN = re.compile(r'\bpackage\s+([\w$.\s]+?)\s*;')
+_IMPORT_PATTERN = re.compile(
+    r'\bimport\s+(?P<static>static\s+)?(?P<name>[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*)(?P<wildcard>\s*\.\s*\*)?\s*;'
+)
+_TYPE_DECLARATION_PATTERN = re.compile(r'\b(?:class|interface|enum|record)\s+([A-Za-z_$][\w$]*)')
+# org.bukkit.ChatColor (pacote em minúsculas seguido da classe)
+_QUALIFIED_PATTERN = re.compile(r'(?<![\w$.])((?:[a-z_][\w$]*\s*\.\s*)+[A-Z][\w$]*)')
+# Material.DIAMOND_SWORD, Bukkit.getPlayer(...)
+_MEMBER_PATTERN = re.compile(r'(?<![\w$.])([A-Z][\w$]*)\s*\.\s*([A-Za-z_$][\w$]*)(\s*\()?')
+_NEXT_MEMBER_PATTERN = re.compile(r'\s*\.\s*([A-Za-z_$][\w$]*)(\s*\()?')
+_EVENT_HANDLER_PATTERN = re.compile(
+    r'@EventHandler\b(?:\s*\([^)]*\))?\s*(?:(?:public|protected|private|static|final|synchronized)\s+)*'
+    r'void\s+[\w$]+\s*\(\s*(?:final\s+)?(?P<type>[A-Za-z_$][\w$]*)\s+[\w$]+\s*\)'
+)
+_CONSTANT_NAME = re.compile(r'^[A-Z][A-Z0-9_]*$')
+_KEYWORDS = {'class', 'this', 'super', 'new'}
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _parse_class(data):
+    """
+    Lê nome, superclasse, interfaces e membros públicos/protegidos de um .class.
+
+    Returns:
+        dict: Informações da classe, ou None se ela não for pública
+    """
+    if data[:4] != b'\xca\xfe\xba\xbe':
+        return None
+
+    offset = 8
+    pool_count, = struct.unpack_from('>H', data, offset)
+    offset += 2
+    utf8 = {}
+    class_refs = {}
+    index = 1
+    while index < pool_count:
+        tag = data[offset]
+        offset += 1
+        if tag == 1:
+            length, = struct.unpack_from('>H', data, offset)
+            offset += 2
+            utf8[index] = data[offset:offset + length].decode('utf-8', errors='replace')
+            offset += length
+        elif tag == 7:
+            class_refs[index], = struct.unpack_from('>H', data, offset)
+            offset += 2
+        else:
+            offset += _CONSTANT_SIZES[tag]
+        # Long e Double ocupam duas posições do constant pool
+        index += 2 if tag in (5, 6) else 1
+
+    access, this_index, super_index, interface_count = struct.unpack_from('>HHHH', data, offset)
+    offset += 8
+    if not access & _ACC_PUBLIC:
+        return None
+
+    def class_name(ref):
+        return utf8[class_refs[ref]].replace('/', '.') if ref else None
+
+    interfaces = [class_name(ref) for ref in struct.unpack_from(f'>{interface_count}H', data, offset)]
+    offset += 2 * interface_count
+
+    members = []
+    for _ in range(2):  # campos, depois métodos
+        names = set()
+        member_count, = struct.unpack_from('>H', data, offset)
+        offset += 2
+        for _ in range(member_count):
+            member_access, name_index, _descriptor, attribute_count = struct.unpack_from('>HHHH', data, offset)
+            offset += 8
+            for _ in range(attribute_count):
+                _attribute_name, length = struct.unpack_from('>HI', data, offset)
+                offset += 6 + length
+            if member_access & (_ACC_PUBLIC | _ACC_PROTECTED) and not member_access & _ACC_SYNTHETIC:
+                names.add(utf8[name_index])
+        members.append(sorted(names - {'<init>', '<clinit>'}))
+
+    return {
+        'name': class_name(this_index),
+        'super': class_name(super_index),
+        'interfaces': interfaces,
+        'fields': members[0],
+        'methods': members[1],
+    }
+
+
+def _fingerprint(classpath):
+    """Identifica o classpath pelos JARs (caminho, tamanho e mtime)"""
+    digest = hashlib.sha256()
+    for entry in classpath:
+        try:
+            stat = os.stat(entry)
+        except OSError:
+            continue
+        digest.update(f"{entry}|{stat.st_size}|{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def index_path(mc_version):
+    """Arquivo do índice de uma versão do Minecraft"""
+    return SYMBOLS_DIR / f"{mc_version}.json.gz"
+
+
+def _read_index(mc_version):
+    try:
+        with gzip.open(index_path(mc_version), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_index(mc_version, data):
+    path = index_path(mc_version)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _extract_classes(classpath):
+    """Classes públicas de todos os JARs do classpath"""
+    classes = {}
+    for entry in classpath:
+        if not entry.endswith('.jar'):
+            continue
+        try:
+            with zipfile.ZipFile(entry) as archive:
+                for name in archive.namelist():
+                    if (not name.endswith('.class') or name.startswith('META-INF/')
+                            or name.endswith(('module-info.class', 'package-info.class'))):
+                        continue
+                    try:
+                        info = _parse_class(archive.read(name))
+                    except (struct.error, KeyError, IndexError):
+                        continue
+                    if info is not None:
+                        classes.setdefault(info.pop('name'), info)
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"⚠️ Não foi possível ler {entry}: {str(e)}")
+    return classes
+
+
+def build_index(mc_version, classpath=None, force=False):
+    """
+    Extrai o índice de símbolos de uma versão do Minecraft e grava em disco.
+
+    Args:
+        mc_version (str): Versão do Minecraft
+        classpath (list): JARs da spigot-api (padrão: classpath em cache)
+        force (bool): Extrai novamente mesmo se o índice atual for válido
+
+    Returns:
+        dict: Índice extraído, ou None se o classpath ainda não foi resolvido
+    """
+    classpath = classpath or get_api_classpath(mc_version)
+    if not classpath:
+        return None
+
+    fingerprint = _fingerprint(classpath)
+    SYMBOLS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(SYMBOLS_DIR / f"{mc_version}.lock", 'w') as lock:
+        # Outro worker pode estar extraindo a mesma versão
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            data = _read_index(mc_version)
+            if (not force and data and data.get('format') == INDEX_FORMAT
+                    and data.get('fingerprint') == fingerprint):
+                return data
+
+            start = time.monotonic()
+            classes = _extract_classes(classpath)
+            data = {
+                'format': INDEX_FORMAT,
+                'mc_version': mc_version,
+                'fingerprint': fingerprint,
+                'created_at': datetime.now(UTC).isoformat(),
+                'classes': classes,
+            }
+            try:
+                _write_index(mc_version, data)
+            except OSError as e:
+                print(f"⚠️ Não foi possível salvar o índice de símbolos: {str(e)}")
+            elapsed_ms = int((time.monotonic() - start) * 1000)
+            print(f"🔎 Índice de símbolos da spigot-api {mc_version}: {len(classes)} classes em {elapsed_ms} ms")
+            return data
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class SymbolIndex:
+    """Índice em memória de uma versão do Minecraft"""
+
+    def __init__(self, mc_version, fingerprint, classes):
+        self.mc_version = mc_version
+        self.fingerprint = fingerprint
+        self.classes = classes
+        self.packages = {}
+        self.simple_names = {}
+        for name in classes:
+            package, _, simple = name.rpartition('.')
+            self.packages.setdefault(package, set()).add(simple)
+            if '$' not in simple:
+                self.simple_names.setdefault(simple, []).append(name)
+        # org.bukkit, net.md_5, com.google...: raízes cobertas pelo classpath
+        self.roots = {self._root(package) for package in self.packages}
+
+    @staticmethod
+    def _root(name):
+        return '.'.join(name.split('.')[:2])
+
+    def covers(self, qualified_name):
+        """True se o nome pertence a uma raiz de pacotes do classpath"""
+        return self._root(qualified_name) in self.roots
+
+    def resolve(self, qualified_name):
+        """Nome binário da classe (Outer$Inner) para um nome qualificado, ou None"""
+        parts = qualified_name.split('.')
+        for i in range(len(parts) - 1, 0, -1):
+            package = '.'.join(parts[:i])
+            if package in self.packages:
+                name = f"{package}.{'$'.join(parts[i:])}"
+                return name if name in self.classes else None
+        return None
+
+    def missing_class_message(self, qualified_name):
+        """Mensagem para uma classe ou pacote inexistente, com sugestão"""
+        parts = qualified_name.split('.')
+        for i in range(len(parts) - 1, 0, -1):
+            package = '.'.join(parts[:i])
+            if package in self.packages:
+                missing = '.'.join(parts[i:])
+                candidates = [name.replace('$', '.') for name in self.packages[package]]
+                message = f"A classe '{missing}' não existe no pacote '{package}' da spigot-api {self.mc_version}"
+                return message + _suggestion(missing, candidates)
+
+        return self.missing_package_message('.'.join(parts[:-1]) or qualified_name)
+
+    def missing_package_message(self, package):
+        """Mensagem para um pacote inexistente, com sugestão"""
+        root = self._root(package)
+        candidates = [name for name in self.packages if name.startswith(root)]
+        message = f"O pacote '{package}' não existe na spigot-api {self.mc_version}"
+        return message + _suggestion(package, candidates)
+
+    def has_member(self, class_name, member, kind):
+        """
+        Procura um campo ou método na classe e nas superclasses.
+
+        Args:
+            class_name (str): Nome binário da classe
+            member (str): Nome do membro
+            kind (str): 'fields' ou 'methods'
+
+        Returns:
+            bool: Se o membro existe; None se a hierarquia sai do índice
+        """
+        pending = [class_name]
+        seen = set()
+        while pending:
+            name = pending.pop()
+            if name is None or name in seen:
+                continue
+            seen.add(name)
+
+            info = self.classes.get(name)
+            if info is None:
+                if name not in _JDK_CLASSES:
+                    return None
+                super_name, methods = _JDK_CLASSES[name]
+                if kind == 'methods' and member in methods:
+                    return True
+                pending.append(super_name)
+                continue
+
+            if member in info[kind]:
+                return True
+            pending.append(info['super'])
+            # Campos estáticos de interfaces são herdados; métodos estáticos não
+            if kind == 'fields':
+                pending.extend(info['interfaces'])
+        return False
+
+    def member_message(self, class_name, member, kind):
+        """Mensagem para um membro inexistente, com sugestão"""
+        info = self.classes[class_name]
+        display_name = class_name.rpartition('.')[2].replace('$', '.')
+        what = 'o método' if kind == 'methods' else 'o campo'
+        message = f"A classe '{display_name}' não tem {what} '{member}' na spigot-api {self.mc_version}"
+        return message + _suggestion(member, info[kind])
+
+
+def _suggestion(name, candidates):
+    matches = difflib.get_close_matches(name, list(candidates), n=1, cutoff=0.75)
+    return f" (você quis dizer '{matches[0]}'?)" if matches else ''
+
+
+def get_index(mc_version):
+    """
+    Índice da versão do Minecraft, carregado sob demanda e mantido em memória.
+
+    Returns:
+        SymbolIndex: Índice, ou None se desativado ou sem classpath em cache
+    """
+    if not SYMBOL_INDEX_ENABLED:
+        return None
+
+    classpath = get_api_classpath(mc_version)
+    if not classpath:
+        return None
+    fingerprint = _fingerprint(classpath)
+
+    with _indexes_lock:
+        index = _indexes.get(mc_version)
+    if index is not None and index.fingerprint == fingerprint:
+        return index
+
+    data = _read_index(mc_version)
+    if not data or data.get('format') != INDEX_FORMAT or data.get('fingerprint') != fingerprint:
+        data = build_index(mc_version, classpath)
+    if not data:
+        return None
+
+    index = SymbolIndex(mc_version, data['fingerprint'], data['classes'])
+    with _indexes_lock:
+        _indexes[mc_version] = index
+    return index
+
+
+def _blank(match):
+    return re.sub(r'[^\n]', ' ', match.group())
+
+
+def _position(source, offset):
+    """(linha, coluna) de um deslocamento no fonte, começando em 1"""
+    line = source.count('\n', 0, offset) + 1
+    column = offset - (source.rfind('\n', 0, offset) + 1) + 1
+    return line, column
+
+
+def _compact(name):
+    return re.sub(r'\s+', '', name)
+
+
+def _check_source(index, path, source, project_packages, project_types):
+    """Diagnósticos de um arquivo .java"""
+    code = _NOISE_PATTERN.sub(_blank, source)
+    diagnostics = []
+
+    def error(offset, message):
+        line, column = _position(code, offset)
+        diagnostics.append({
+            'severity': 'ERROR',
+            'file': str(path),
+            'line': line,
+            'column': column,
+            'message': message,
+        })
+
+    def covered(name):
+        return index.covers(name) and not any(
+            name == package or name.startswith(package + '.') for package in project_packages
+        )
+
+    def check_member(class_name, member, is_call, offset):
+        if member in _KEYWORDS:
+            return
+        if is_call:
+            kinds = ('methods',)
+        elif _CONSTANT_NAME.match(member) or member[0].isupper():
+            kinds = ('fields', 'classes')
+        else:
+            return
+        for kind in kinds:
+            if kind == 'classes':
+                if f"{class_name}${member}" in index.classes:
+                    return
+            elif index.has_member(class_name, member, kind) is not False:
+                return
+        error(offset, index.member_message(class_name, member, kinds[0]))
+
+    imported = {}
+    wildcard_packages = []
+    unknown_wildcard = False
+
+    for match in _IMPORT_PATTERN.finditer(code):
+        name = _compact(match.group('name'))
+        offset = match.start('name')
+        if not covered(name):
+            unknown_wildcard = unknown_wildcard or bool(match.group('wildcard'))
+            continue
+
+        if match.group('static'):
+            class_part = name if match.group('wildcard') else name.rpartition('.')[0]
+            class_name = index.resolve(class_part)
+            if class_name is None:
+                error(offset, index.missing_class_message(class_part))
+            elif not match.group('wildcard'):
+                member = name.rpartition('.')[2]
+                if (index.has_member(class_name, member, 'fields') is False
+                        and index.has_member(class_name, member, 'methods') is False
+                        and f"{class_name}${member}" not in index.classes):
+                    error(match.end('name') - len(member), index.member_message(class_name, member, 'fields'))
+        elif match.group('wildcard'):
+            if name in index.packages:
+                wildcard_packages.append(name)
+            elif index.resolve(name) is None:
+                error(offset, index.missing_package_message(name))
+        else:
+            class_name = index.resolve(name)
+            if class_name is None:
+                error(offset, index.missing_class_message(name))
+            else:
+                imported[name.rpartition('.')[2]] = class_name
+
+    # Referências analisadas fora das declarações de pacote/import
+    body = _IMPORT_PATTERN.sub(_blank, _PACKAGE_PATTERN.sub(_blank, code))
+
+    for match in _QUALIFIED_PATTERN.finditer(body):
+        name = _compact(match.group(1))
+        if not covered(name):
+            continue
+        class_name = index.resolve(name)
+        if class_name is None:
+            error(match.start(1), index.missing_class_message(name))
+            continue
+        member = _NEXT_MEMBER_PATTERN.match(body, match.end(1))
+        if member:
+            check_member(class_name, member.group(1), bool(member.group(2)), member.start(1))
+
+    def resolve_simple(name):
+        if name in project_types:
+            return None
+        if name in imported:
+            return imported[name]
+        if name in _JAVA_LANG_TYPES:
+            return None
+        for package in wildcard_packages:
+            if name in index.packages[package]:
+                return f"{package}.{name}"
+        return None
+
+    for match in _MEMBER_PATTERN.finditer(body):
+        class_name = resolve_simple(match.group(1))
+        if class_name is not None:
+            check_member(class_name, match.group(2), bool(match.group(3)), match.start(2))
+
+    for match in _EVENT_HANDLER_PATTERN.finditer(body):
+        event_type = match.group('type')
+        if event_type in project_types or event_type in imported or unknown_wildcard:
+            continue
+        if any(event_type in index.packages[package] for package in wildcard_packages):
+            continue
+        candidates = index.simple_names.get(event_type)
+        if candidates:
+            message = f"O evento '{event_type}' não foi importado (import {candidates[0]};)"
+        else:
+            events = [name for name in index.simple_names if name.endswith('Event')]
+            message = f"O evento '{event_type}' não existe na spigot-api {index.mc_version}" + _suggestion(event_type, events)
+        error(match.start('type'), message)
+
+    return sorted(diagnostics, key=lambda diag: (diag['line'], diag['column']))
+
+
+def check_project(project_dir, mc_version):
+    """
+    Confere os fontes do projeto contra o índice de símbolos antes do build.
+
+    Args:
+        project_dir (Path): Diretório do projeto Maven
+        mc_version (str): Versão do Minecraft
+
+    Returns:
+        list: Diagnósticos de erro; vazia se está tudo certo ou não há índice
+    """
+    source_dir = Path(project_dir) / "src" / "main" / "java"
+    if not source_dir.is_dir():
+        return []
+
+    try:
+        index = get_index(mc_version)
+        if index is None:
+            return []
+
+        sources = {}
+        project_packages = set()
+        project_types = set()
+        for path in source_dir.rglob('*.java'):
+            source = path.read_text(encoding='utf-8', errors='replace')
+            code = _NOISE_PATTERN.sub(_blank, source)
+            sources[path] = source
+            package = _PACKAGE_PATTERN.search(code)
+            if package:
+                project_packages.add(_compact(package.group(1)))
+            project_types.update(_TYPE_DECLARATION_PATTERN.findall(code))
+
+        diagnostics = []
+        for path, source in sorted(sources.items()):
+            diagnostics.extend(_check_source(index, path, source, project_packages, project_types))
+        return diagnostics
+    except Exception as e:
+        # A verificação nunca impede um build: na dúvida, o compilador decide
+        print(f"⚠️ Verificação de símbolos ignorada: {str(e)}")
+        return []
+
+
+def status():
+    """Versões com índice em disco e carregadas neste processo"""
+    return {
+        'enabled': SYMBOL_INDEX_ENABLED,
+        'indexed_versions': sorted(path.name[:-len('.json.gz')] for path in SYMBOLS_DIR.glob('*.json.gz')),
+        'loaded_versions': sorted(_indexes),
+    }
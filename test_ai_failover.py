@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# ========================================
+# TESTE DE HEDGE E FAILOVER DA API DE IA
+# ========================================
+# Sobe um servidor local que simula backends lentos, com erro e com
+# respostas inválidas, e verifica o hedge e o failover do ai_client.
+# Não acessa a internet.
+# Execute: python test_ai_failover.py
+# ========================================
+
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Métricas e limitador em um diretório temporário (não afetam o servidor real)
+os.environ['PLUGINFORGE_CACHE_DIR'] = tempfile.mkdtemp(prefix='pluginforge-test-')
+os.environ.setdefault('AI_WARMUP', 'false')
+# O limitador de requisições é testado à parte; aqui só atrasaria os casos
+os.environ['AI_LIMITER_ENABLED'] = 'false'
+
+import ai_client
+
+STUB_PORT = 8799
+STUB_URL = f"http://127.0.0.1:{STUB_PORT}"
+SLOW_SECONDS = 3
+
+
+class StubBackend(BaseHTTPRequestHandler):
+    """
+    Backends simulados pelo caminho da URL:
+    /fast (JSON válido), /slow (demora), /fail (500), /gone (400), /bad (texto em vez de JSON)
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, content=None):
+        data = b''
+        if content is not None:
+            data = json.dumps({'choices': [{'message': {'content': content}}]}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        answer = json.dumps({'backend': self.path.strip('/'), 'model': body.get('model')})
+        if self.path == '/slow':
+            time.sleep(SLOW_SECONDS)
+            return self.reply(200, answer)
+        if self.path == '/fail':
+            return self.reply(500)
+        if self.path == '/gone':
+            return self.reply(400)
+        if self.path == '/bad':
+            return self.reply(200, 'Claro! Aqui está o seu plugin...')
+        return self.reply(200, answer)
+
+
+def is_json_reply(result):
+    """Mesma validação do app: a resposta é um objeto JSON"""
+    try:
+        return isinstance(json.loads(result['choices'][0]['message']['content']), dict)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return False
+
+
+def run_case(name, primary, fallbacks, expected_backend, max_seconds, hedge_delay=30):
+    """
+    Executa uma chamada contra o stub e confere quem respondeu e em quanto tempo.
+    """
+    ai_client.API_ENDPOINT = f"{STUB_URL}{primary}"
+    ai_client.AI_FALLBACK_MODELS = ','.join(f"{model}@{STUB_URL}{path}" for model, path in fallbacks)
+    ai_client.AI_HEDGE_DELAY = hedge_delay
+
+    start = time.monotonic()
+    result = ai_client.post_chat({'messages': [{'role': 'user', 'content': 'teste'}]}, validate=is_json_reply)
+    elapsed = time.monotonic() - start
+
+    backend = json.loads(result['choices'][0]['message']['content'])['backend'] if result else None
+    passed = backend == expected_backend and elapsed <= max_seconds
+    print(f"{'✅' if passed else '❌'} {name}: backend={backend} em {elapsed:.2f}s")
+    return passed
+
+
+def main():
+    """
+    Função principal
+    """
+    print("=" * 60)
+    print("🧪 TESTE DE HEDGE E FAILOVER DA API DE IA (offline)")
+    print("=" * 60)
+
+    server = ThreadingHTTPServer(('127.0.0.1', STUB_PORT), StubBackend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Sem histórico de latência suficiente: o hedge usa AI_HEDGE_DELAY
+    ai_client.AI_HEDGE_ENABLED = True
+    ai_client.AI_HEDGE_MIN_SAMPLES = 10 ** 6
+    ai_client.AI_MAX_RETRIES = 1
+    ai_client.AI_BACKOFF_BASE = 0.1
+
+    results = [
+        run_case("Backend lento recebe hedge para o alternativo", '/slow', [('alt', '/fast')],
+                 'fast', max_seconds=1.5, hedge_delay=0.5),
+        run_case("Backend com erro 500 passa para o alternativo", '/fail', [('alt', '/fast')],
+                 'fast', max_seconds=1.5),
+        run_case("Resposta que não é JSON passa para o alternativo", '/bad', [('alt', '/fast')],
+                 'fast', max_seconds=1.5),
+        run_case("Cadeia 400 -> inválido -> válido", '/gone', [('m2', '/bad'), ('m3', '/fast')],
+                 'fast', max_seconds=1.5),
+        run_case("Todos os backends falhando", '/gone', [('m2', '/fail')],
+                 None, max_seconds=3),
+    ]
+    # Sem alternativos não há hedge (repetir o mesmo modelo só dobraria o custo)
+    hedges = ai_client.get_stats()['hedges']
+    results.append(run_case("Sem alternativos: sem hedge", '/slow', [],
+                            'slow', max_seconds=SLOW_SECONDS + 1, hedge_delay=0.5)
+                   and ai_client.get_stats()['hedges'] == hedges)
+    server.shutdown()
+
+    stats = ai_client.get_stats()
+    print(f"📊 Hedges: {stats['hedges']} (vencidos pelo hedge: {stats['hedge_wins']}), "
+          f"failovers: {stats['failovers']}, vitórias por modelo: {stats['model_wins']}")
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print("🎉 TESTE PASSOU! Hedge e failover funcionando.")
+    else:
+        print("❌ TESTE FALHOU! Verifique os casos acima.")
+    print("=" * 60)
+    return all(results)
+
+
+if __name__ == "__main__":
+    main()
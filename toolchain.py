@@ -0,0 +1,329 @@
+"""
+Toolchain Java/Maven do PluginForge Studio
+Localiza Maven, Docker e Java uma única vez por processo (com cache em disco
+compartilhado entre workers) e mantém em cache o classpath da spigot-api por
+versão do Minecraft.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+
+from storage import CACHE_DIR
+
+# Classpath resolvido pelo Maven, um arquivo por versão do Minecraft
+CLASSPATH_DIR = CACHE_DIR / "classpath"
+
+# Ferramentas encontradas (compartilhado entre workers)
+TOOLCHAIN_STATE_FILE = CACHE_DIR / "toolchain.json"
+
+# Quando nada foi encontrado, procura de novo após este intervalo (segundos)
+NEGATIVE_CACHE_TTL = int(os.getenv('TOOLCHAIN_NEGATIVE_TTL', '300'))
+
+_MC_VERSION_PATTERN = re.compile(r'^[0-9A-Za-z._-]+$')
+
+_toolchain = {}
+_toolchain_lock = threading.RLock()
+
+
+def _fingerprint(command):
+    """Identifica o executável pelo caminho real, mtime e tamanho"""
+    path = shutil.which(command) or (command if Path(command).is_file() else None)
+    if not path:
+        return None
+    real_path = os.path.realpath(path)
+    try:
+        stat = os.stat(real_path)
+    except OSError:
+        return None
+    return {'path': real_path, 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+
+def _load_state():
+    """Lê o cache de ferramentas persistido em disco"""
+    try:
+        return json.loads(TOOLCHAIN_STATE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_entry(key, entry):
+    """Grava uma ferramenta no cache em memória e em disco"""
+    _toolchain[key] = entry
+    state = _load_state()
+    state[key] = entry
+    try:
+        TOOLCHAIN_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = TOOLCHAIN_STATE_FILE.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_file.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        os.replace(tmp_file, TOOLCHAIN_STATE_FILE)
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar o cache de ferramentas: {str(e)}")
+
+
+def _cached_entry(key):
+    """
+    Retorna a ferramenta em cache se ainda for válida.
+
+    A revalidação é barata: compara caminho, mtime e tamanho do executável
+    em vez de executá-lo novamente.
+    """
+    entry = _toolchain.get(key) or _load_state().get(key)
+    if not entry:
+        return None
+
+    if entry.get('command') is None:
+        # Cache negativo: expira para detectar instalações novas
+        if time.time() - entry.get('checked_at', 0) < NEGATIVE_CACHE_TTL:
+            _toolchain[key] = entry
+            return entry
+        return None
+
+    if _fingerprint(entry['command']) != entry.get('fingerprint'):
+        return None
+    _toolchain[key] = entry
+    return entry
+
+
+def _remember(key, command, version=None):
+    """Registra o resultado de uma busca no cache"""
+    entry = {
+        'command': command,
+        'version': version,
+        'fingerprint': _fingerprint(command) if command else None,
+        'checked_at': time.time(),
+        'checked_at_iso': datetime.now(UTC).isoformat(),
+    }
+    _save_entry(key, entry)
+    return entry
+
+
+def invalidate(key=None):
+    """Descarta o cache de uma ferramenta (ou de todas)"""
+    with _toolchain_lock:
+        if key is None:
+            _toolchain.clear()
+            TOOLCHAIN_STATE_FILE.unlink(missing_ok=True)
+            return
+        _toolchain.pop(key, None)
+        state = _load_state()
+        if state.pop(key, None) is not None:
+            try:
+                TOOLCHAIN_STATE_FILE.write_text(json.dumps(state, indent=2), encoding='utf-8')
+            except OSError:
+                pass
+
+
+def probe_maven_executable(commands):
+    """
+    Procura pelo executável Maven em várias localizações.
+    
+    Args:
+        commands (list): Lista de comandos Maven para testar
+        
+    Returns:
+        tuple: (comando encontrado ou None, versão)
+    """
+    print(f"🔍 Testando {len(commands)} comandos Maven...")
+    
+    for i, cmd in enumerate(commands, 1):
+        try:
+            print(f"   [{i}/{len(commands)}] Testando: {cmd}")
+            # Testa se o comando existe e funciona
+            result = subprocess.run(
+                [cmd, '--version'],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            if result.returncode == 0:
+                version_info = result.stdout.strip() if result.stdout else "Unknown version"
+                print(f"✅ Maven encontrado: {cmd}")
+                print(f"   📦 Versão: {version_info}")
+                return cmd, version_info.splitlines()[0]
+            else:
+                print(f"   ❌ Comando falhou (código: {result.returncode})")
+        except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError) as e:
+            print(f"   ❌ Erro ao testar {cmd}: {str(e)}")
+        except Exception as e:
+            print(f"   ❌ Erro inesperado com {cmd}: {str(e)}")
+    
+    print("❌ Nenhum executável Maven foi encontrado!")
+    return None, None
+
+
+def find_maven_executable(commands):
+    """
+    Retorna o executável Maven, procurando apenas na primeira chamada.
+
+    Args:
+        commands (list): Lista de comandos Maven para testar
+
+    Returns:
+        str: Caminho do Maven encontrado ou None
+    """
+    with _toolchain_lock:
+        entry = _cached_entry('maven')
+        if entry:
+            return entry['command']
+        command, version = probe_maven_executable(commands)
+        return _remember('maven', command, version)['command']
+
+
+def docker_available():
+    """
+    Verifica (com cache) se o Docker pode ser usado como fallback do Maven.
+
+    Returns:
+        bool: True se o daemon do Docker respondeu
+    """
+    with _toolchain_lock:
+        entry = _cached_entry('docker')
+        if entry:
+            return entry['command'] is not None
+
+        command, version = None, None
+        docker = shutil.which('docker')
+        if docker:
+            try:
+                result = subprocess.run(
+                    [docker, 'version', '--format', '{{.Server.Version}}'],
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
+                if result.returncode == 0:
+                    command, version = docker, result.stdout.strip()
+            except (subprocess.TimeoutExpired, OSError):
+                pass
+
+        print(f"🐳 Docker {'disponível: ' + version if command else 'indisponível'}")
+        return _remember('docker', command, version)['command'] is not None
+
+
+def describe_toolchain():
+    """Resumo das ferramentas ativas (usado pelo endpoint de administração)"""
+    with _toolchain_lock:
+        maven = _cached_entry('maven')
+        docker = _cached_entry('docker')
+
+    classpaths = sorted(path.stem for path in CLASSPATH_DIR.glob('*.txt')) if CLASSPATH_DIR.exists() else []
+    return {
+        'maven': maven,
+        'docker': docker,
+        'java': find_java_executable(),
+        'javac': find_javac_executable(),
+        'cached_classpaths': classpaths,
+    }
+
+
+def _find_jdk_tool(name):
+    """Procura uma ferramenta do JDK (JAVA_HOME tem prioridade sobre o PATH)"""
+    java_home = os.getenv('JAVA_HOME')
+    if java_home:
+        for candidate_name in (name, f'{name}.exe'):
+            candidate = Path(java_home) / 'bin' / candidate_name
+            if candidate.exists():
+                return str(candidate)
+    return shutil.which(name)
+
+
+def find_java_executable():
+    """
+    Procura o executável java.
+
+    Returns:
+        str: Caminho do java encontrado ou None
+    """
+    return _find_jdk_tool('java')
+
+
+def find_javac_executable():
+    """
+    Procura o compilador javac.
+
+    Returns:
+        str: Caminho do javac encontrado ou None
+    """
+    return _find_jdk_tool('javac')
+
+
+def _classpath_file(mc_version):
+    """Arquivo de cache do classpath para uma versão do Minecraft"""
+    if not mc_version or not _MC_VERSION_PATTERN.match(mc_version):
+        return None
+    return CLASSPATH_DIR / f"{mc_version}.txt"
+
+
+def get_api_classpath(mc_version):
+    """
+    Retorna o classpath em cache da spigot-api para a versão informada.
+
+    Args:
+        mc_version (str): Versão do Minecraft (ex: 1.20.1)
+
+    Returns:
+        list: Lista de JARs do classpath, ou None se ainda não foi resolvido
+    """
+    cache_file = _classpath_file(mc_version)
+    if cache_file is None or not cache_file.exists():
+        return None
+
+    entries = [entry for entry in cache_file.read_text(encoding='utf-8').strip().split(os.pathsep) if entry]
+    if not entries or not all(Path(entry).exists() for entry in entries):
+        # Repositório local foi limpo: o cache não é mais válido
+        cache_file.unlink(missing_ok=True)
+        return None
+    return entries
+
+
+def resolve_api_classpath(maven_cmd, project_dir, mc_version, extra_args=None):
+    """
+    Resolve o classpath da spigot-api com o Maven e guarda em cache.
+
+    Executado uma única vez por versão do Minecraft; os builds seguintes
+    reutilizam o arquivo gerado sem iniciar o Maven.
+
+    Args:
+        maven_cmd (str): Comando Maven
+        project_dir (Path): Projeto com o pom.xml renderizado para a versão
+        mc_version (str): Versão do Minecraft
+        extra_args (list): Argumentos adicionais para o Maven
+
+    Returns:
+        list: Lista de JARs do classpath, ou None em caso de falha
+    """
+    cache_file = _classpath_file(mc_version)
+    if cache_file is None:
+        return None
+
+    CLASSPATH_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+
+    try:
+        print(f"📚 Resolvendo classpath da spigot-api {mc_version}...")
+        result = subprocess.run(
+            [maven_cmd, '-q', *(extra_args or []), 'dependency:build-classpath', f'-Dmdep.outputFile={tmp_file}'],
+            cwd=project_dir,
+            capture_output=True,
+            text=True,
+            timeout=300
+        )
+        if result.returncode != 0 or not tmp_file.exists():
+            print(f"❌ Falha ao resolver classpath (código: {result.returncode})")
+            return None
+
+        os.replace(tmp_file, cache_file)
+        print(f"✅ Classpath da spigot-api {mc_version} em cache: {cache_file}")
+        return get_api_classpath(mc_version)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        print(f"❌ Erro ao resolver classpath: {str(e)}")
+        return None
+    finally:
+        tmp_file.unlink(missing_ok=True)
@@ -0,0 +1,360 @@
+"""
+Workspaces persistentes do PluginForge Studio
+Cada plugin tem um projeto Maven estável: os arquivos são atualizados no lugar
+somente quando o conteúdo muda, e o build roda sem `clean`, reaproveitando o
+que já está em target/. Com SCRATCH_BUILDS o build roda em um diretório
+temporário (tmpfs) e só o JAR e o log comprimido chegam ao disco.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from storage import BASE_DIR, MATRIX_DIR_NAME, WORKSPACE_DIR, iter_workspace_trees, plugin_workspace_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+POM_TEMPLATE = BASE_DIR / "pom.xml"
+
+# Builds em diretório temporário (tmpfs): no disco ficam só o JAR e o log comprimido
+SCRATCH_BUILDS = os.getenv('SCRATCH_BUILDS', 'false').lower() == 'true'
+SCRATCH_DIR = Path(os.getenv('SCRATCH_DIR') or (
+    '/dev/shm/pluginforge' if os.path.isdir('/dev/shm') else Path(tempfile.gettempdir()) / 'pluginforge-scratch'
+))
+# Abaixo deste espaço livre no SCRATCH_DIR o build usa o workspace em disco
+SCRATCH_MIN_FREE_MB = int(os.getenv('SCRATCH_MIN_FREE_MB', '256'))
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _locked_project(key, project_dir):
+    """
+    Lock exclusivo de um diretório de projeto (entre threads e entre workers).
+
+    Abrir o .lock atualiza o mtime dele, que o coletor de workspaces usa
+    como horário do último uso.
+    """
+    with _local_locks_guard:
+        local_lock = _local_locks.setdefault(key, threading.Lock())
+
+    with local_lock:
+        while True:
+            project_dir.mkdir(parents=True, exist_ok=True)
+            lock = open(project_dir / ".lock", 'w')
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if _is_current_lock(lock, project_dir):
+                break
+            # O coletor apagou o diretório enquanto esperávamos: recria
+            lock.close()
+
+        try:
+            yield project_dir
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+
+
+def _is_current_lock(lock, project_dir):
+    """Confere se o arquivo de lock aberto ainda é o .lock do diretório"""
+    try:
+        return os.fstat(lock.fileno()).st_ino == os.stat(project_dir / ".lock").st_ino
+    except OSError:
+        return False
+
+
+@contextmanager
+def _idle_project(key, project_dir):
+    """
+    Lock exclusivo sem espera: entrega True se nenhum build estiver usando o diretório.
+
+    Modo 'a' não altera o mtime do .lock (horário do último uso).
+    """
+    with _local_locks_guard:
+        local_lock = _local_locks.setdefault(key, threading.Lock())
+    if not local_lock.acquire(blocking=False):
+        yield False
+        return
+
+    try:
+        lock_file = project_dir / ".lock"
+        if not (fcntl and lock_file.exists()):
+            yield True
+            return
+        with open(lock_file, 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+    finally:
+        local_lock.release()
+
+
+def try_remove_project(key, project_dir):
+    """
+    Apaga um diretório de projeto se nenhum build estiver usando.
+
+    Args:
+        key: Chave do lock (plugin_id, ou (plugin_id, versão) na matriz)
+        project_dir (Path): Diretório do projeto
+
+    Returns:
+        bool: True se o diretório foi apagado, False se estava em uso
+    """
+    with _idle_project(key, project_dir) as idle:
+        if idle:
+            shutil.rmtree(project_dir, ignore_errors=True)
+        return idle
+
+
+def _move_project(key, source, target):
+    """Move um projeto ocioso para o novo caminho (False se em uso ou se o destino já existe)"""
+    if target.exists():
+        return False
+    with _idle_project(key, source) as idle:
+        if not idle:
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.rename(source, target)
+        return True
+
+
+def migrate_layout(plugin_ids):
+    """
+    Move os workspaces do layout plano (workspace/{id}, workspace/{nome}_{id},
+    workspace/matrix/{id}/{versão}) para o layout com shards.
+
+    Diretórios em uso, de plugins apagados ou de plugins que já têm um
+    workspace no novo layout ficam onde estão (o coletor os remove depois).
+
+    Args:
+        plugin_ids (set): IDs dos plugins existentes
+
+    Returns:
+        dict: {'moved': árvores movidas, 'skipped': árvores mantidas}
+    """
+    moved, skipped = 0, 0
+    for kind, plugin_id, _mc_version, path in list(iter_workspace_trees()):
+        if kind != 'legacy':
+            continue
+        if plugin_id not in plugin_ids:
+            skipped += 1
+            continue
+
+        if path.parent == WORKSPACE_DIR / MATRIX_DIR_NAME:
+            for version_dir in sorted(p for p in path.iterdir() if p.is_dir()):
+                target = plugin_workspace_dir(plugin_id, version_dir.name)
+                if _move_project((plugin_id, version_dir.name), version_dir, target):
+                    moved += 1
+                else:
+                    skipped += 1
+            try:
+                path.rmdir()
+            except OSError:
+                pass
+        elif _move_project(plugin_id, path, plugin_workspace_dir(plugin_id)):
+            moved += 1
+        else:
+            skipped += 1
+
+    print(f"🗂️ Workspaces migrados para o layout com shards: {moved} ({skipped} mantidos)")
+    return {'moved': moved, 'skipped': skipped}
+
+
+def _create_scratch_dir():
+    """Diretório temporário para um build (None se o SCRATCH_DIR não tiver espaço)"""
+    try:
+        SCRATCH_DIR.mkdir(parents=True, exist_ok=True)
+        if shutil.disk_usage(SCRATCH_DIR).free < SCRATCH_MIN_FREE_MB * 1024 * 1024:
+            print(f"⚠️ Pouco espaço em {SCRATCH_DIR}, build no workspace em disco")
+            return None
+        return Path(tempfile.mkdtemp(prefix='build-', dir=SCRATCH_DIR))
+    except OSError as e:
+        print(f"⚠️ Diretório temporário de build indisponível ({str(e)}), build no workspace em disco")
+        return None
+
+
+def _promote_jars(scratch_dir, project_dir):
+    """Substitui os JARs de target/ do projeto em disco pelos do build temporário"""
+    target_dir = project_dir / "target"
+    for old_jar in target_dir.glob('*.jar'):
+        old_jar.unlink(missing_ok=True)
+    for jar_path in (scratch_dir / "target").glob('*.jar'):
+        target_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = target_dir / f".{jar_path.name}.{os.getpid()}.tmp"
+        shutil.copyfile(jar_path, tmp_path)
+        os.replace(tmp_path, target_dir / jar_path.name)
+
+
+@contextmanager
+def _build_tree(key, project_dir, keep_jars=False):
+    """
+    Diretório onde o projeto é montado e compilado, com o lock do projeto.
+
+    Com SCRATCH_BUILDS o projeto é montado do zero em um diretório do
+    SCRATCH_DIR (tmpfs), apagado ao final; quem chama guarda o JAR no
+    repositório de artefatos antes de sair, e o log comprimido vai para
+    build_logs. keep_jars copia os JARs finais para o target/ do projeto em
+    disco (matriz de compatibilidade, servida direto de lá).
+    """
+    with _locked_project(key, project_dir) as durable_dir:
+        scratch_dir = _create_scratch_dir() if SCRATCH_BUILDS else None
+        if scratch_dir is None:
+            yield durable_dir
+            return
+
+        try:
+            yield scratch_dir
+            if keep_jars:
+                _promote_jars(scratch_dir, durable_dir)
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+@contextmanager
+def workspace_lock(plugin_id):
+    """
+    Acesso exclusivo ao workspace de um plugin durante a atualização e o build.
+
+    Vale entre threads (jobs) e entre os workers do gunicorn. Com
+    SCRATCH_BUILDS o diretório entregue é temporário (veja _build_tree).
+    """
+    with _build_tree(plugin_id, plugin_workspace_dir(plugin_id)) as project_dir:
+        yield project_dir
+
+
+@contextmanager
+def matrix_workspace_lock(plugin_id, mc_version):
+    """Acesso exclusivo ao projeto de um plugin para uma versão da matriz"""
+    key = (plugin_id, mc_version)
+    with _build_tree(key, plugin_workspace_dir(plugin_id, mc_version), keep_jars=True) as project_dir:
+        yield project_dir
+
+
+def write_if_changed(path, content):
+    """
+    Grava o arquivo apenas se o conteúdo for diferente do atual.
+
+    Returns:
+        bool: True se o arquivo foi criado ou alterado
+    """
+    path = Path(path)
+    try:
+        if path.read_text(encoding='utf-8') == content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def render_pom(plugin_name, plugin_version, mc_version):
+    """pom.xml do template com os placeholders substituídos (None se não houver template)"""
+    if not POM_TEMPLATE.exists():
+        print("❌ pom.xml template não encontrado")
+        return None
+
+    pom_content = POM_TEMPLATE.read_text(encoding='utf-8')
+    pom_content = pom_content.replace('{PLUGIN_NAME}', plugin_name)
+    pom_content = pom_content.replace('{PLUGIN_VERSION}', plugin_version)
+    pom_content = pom_content.replace('{MC_VERSION}', mc_version)
+    return pom_content
+
+
+def _remove_empty_dirs(root):
+    """Remove diretórios de pacote que ficaram vazios"""
+    for directory in sorted(root.rglob('*'), key=lambda p: len(p.parts), reverse=True):
+        if directory.is_dir() and not any(directory.iterdir()):
+            directory.rmdir()
+
+
+def sync_project(project_dir, plugin_name, plugin_version, mc_version, package_name,
+                 main_code, plugin_yml=None, config_yml=None):
+    """
+    Atualiza o projeto do plugin no lugar.
+
+    Args:
+        project_dir (Path): Workspace do plugin
+        plugin_name (str): Nome do plugin (e da classe principal)
+        plugin_version (str): Versão do plugin
+        mc_version (str): Versão do Minecraft
+        package_name (str): Pacote da classe principal
+        main_code (str): Código da classe principal
+        plugin_yml (str): Conteúdo do plugin.yml (None mantém o arquivo atual)
+        config_yml (str): Conteúdo do config.yml (None mantém o arquivo atual)
+
+    Returns:
+        list: Arquivos alterados (caminhos relativos ao projeto)
+    """
+    project_dir = Path(project_dir)
+    src_dir = project_dir / "src" / "main" / "java"
+    resources_dir = project_dir / "src" / "main" / "resources"
+    main_class_file = src_dir / package_name.replace('.', '/') / f"{plugin_name}.java"
+
+    changed = []
+
+    def write(path, content):
+        if write_if_changed(path, content):
+            changed.append(path.relative_to(project_dir).as_posix())
+
+    write(main_class_file, main_code)
+
+    # Fontes de versões anteriores (ex: plugin ou pacote renomeado) saem do projeto
+    removed_sources = False
+    if src_dir.exists():
+        for source in src_dir.rglob('*.java'):
+            if source != main_class_file:
+                source.unlink()
+                changed.append(source.relative_to(project_dir).as_posix())
+                removed_sources = True
+        _remove_empty_dirs(src_dir)
+
+    if plugin_yml is not None:
+        write(resources_dir / "plugin.yml", plugin_yml)
+    if config_yml is not None:
+        write(resources_dir / "config.yml", config_yml)
+
+    pom_content = render_pom(plugin_name, plugin_version, mc_version)
+    pom_changed = pom_content is not None and write_if_changed(project_dir / "pom.xml", pom_content)
+    if pom_changed:
+        changed.append("pom.xml")
+
+    target_dir = project_dir / "target"
+    if removed_sources:
+        # Classes de fontes removidos não podem ir para o JAR
+        shutil.rmtree(target_dir / "classes", ignore_errors=True)
+    if pom_changed and target_dir.exists():
+        # Nome ou versão mudou: o JAR antigo deixa de ser o artefato do plugin
+        current_jar = f"{plugin_name}-{plugin_version}.jar"
+        for old_jar in target_dir.glob('*.jar'):
+            if old_jar.name != current_jar:
+                old_jar.unlink()
+
+    if changed:
+        print(f"📝 Workspace atualizado ({len(changed)} arquivos): {', '.join(changed)}")
+    else:
+        print("📝 Workspace sem alterações")
+    return changed
+
+
+def read_config(project_dir):
+    """config.yml atual do workspace (None se não existir)"""
+    config_file = Path(project_dir) / "src" / "main" / "resources" / "config.yml"
+    try:
+        return config_file.read_text(encoding='utf-8')
+    except OSError:
+        return None
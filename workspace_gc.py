@@ -0,0 +1,287 @@
+"""
+Coletor de workspaces do PluginForge Studio
+Mantém o disco usado pelos projetos de build dentro das cotas (global e por
+usuário), apagando primeiro os workspaces usados há mais tempo (LRU). O JAR
+atual de cada plugin fica no repositório de artefatos, então apagar um
+workspace custa apenas um build completo na próxima modificação.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, UTC
+from pathlib import Path
+
+import artifact_store
+import workspace
+from models import db, Plugin
+from storage import CACHE_DIR, iter_workspace_trees
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Configurações (0 desativa a cota)
+WORKSPACE_QUOTA_MB = int(os.getenv('WORKSPACE_QUOTA_MB', '2048'))
+WORKSPACE_USER_QUOTA_MB = int(os.getenv('WORKSPACE_USER_QUOTA_MB', '256'))
+# Intervalo do coletor em segundo plano (segundos, 0 desativa)
+WORKSPACE_GC_INTERVAL = int(os.getenv('WORKSPACE_GC_INTERVAL', '900'))
+# Workspaces usados há menos tempo que isso nunca são apagados (segundos)
+WORKSPACE_GC_MIN_IDLE = int(os.getenv('WORKSPACE_GC_MIN_IDLE', '600'))
+
+STATS_FILE = CACHE_DIR / "workspace_gc.json"
+LOCK_FILE = CACHE_DIR / "workspace_gc.lock"
+
+_collector_thread = None
+
+
+def _tree_size(path):
+    """Bytes ocupados pelos arquivos de um diretório"""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _last_used(path):
+    """Último uso: mtime do .lock (atualizado a cada build) ou do próprio diretório"""
+    for candidate in (path / ".lock", path):
+        try:
+            return candidate.stat().st_mtime
+        except OSError:
+            continue
+    return 0
+
+
+def _tree(key, path, plugin_id, kind, owners):
+    return {
+        'key': key,
+        'path': path,
+        'kind': kind,
+        'plugin_id': plugin_id,
+        'user_id': owners.get(plugin_id),
+        'size': _tree_size(path),
+        'last_used': _last_used(path),
+    }
+
+
+def scan_trees():
+    """
+    Lista os workspaces com dono, tamanho e horário do último uso.
+
+    Returns:
+        list: Um dict por árvore de build (workspace do plugin, projeto da
+              matriz ou diretório do layout antigo)
+    """
+    owners = dict(db.session.query(Plugin.id, Plugin.user_id).all())
+    trees = []
+    for kind, plugin_id, mc_version, path in iter_workspace_trees():
+        if kind == 'plugin':
+            key = plugin_id
+        elif kind == 'matrix':
+            key = (plugin_id, mc_version)
+        else:
+            # Layout plano anterior aos shards
+            key = str(path)
+        trees.append(_tree(key, path, plugin_id if plugin_id in owners else None, kind, owners))
+    return trees
+
+
+def _preserve_artifacts(tree):
+    """Move para o repositório de artefatos os JARs atuais que ainda apontam para a árvore"""
+    if tree['plugin_id'] is None or tree['kind'] == 'matrix':
+        return
+    plugin = db.session.get(Plugin, tree['plugin_id'])
+    if plugin is None or plugin.artifact_sha256 or not plugin.compiled_file:
+        return
+    jar_path = Path(plugin.compiled_file)
+    if not jar_path.is_absolute() or tree['path'] not in jar_path.parents:
+        return
+    if artifact_store.adopt_jar(plugin, jar_path):
+        db.session.commit()
+
+
+def collect(global_quota_mb=None, user_quota_mb=None, min_idle=None, dry_run=False):
+    """
+    Apaga workspaces (LRU) até o uso ficar dentro das cotas.
+
+    Primeiro aplica a cota de cada usuário, depois a global. Workspaces em
+    uso por um build ou usados há menos de min_idle segundos são mantidos.
+
+    Args:
+        global_quota_mb (int): Cota total (padrão: WORKSPACE_QUOTA_MB)
+        user_quota_mb (int): Cota por usuário (padrão: WORKSPACE_USER_QUOTA_MB)
+        min_idle (int): Tempo mínimo sem uso para apagar (padrão: WORKSPACE_GC_MIN_IDLE)
+        dry_run (bool): Só calcula o que seria apagado
+
+    Returns:
+        dict: Uso antes/depois, árvores apagadas e bytes recuperados
+    """
+    global_quota = (WORKSPACE_QUOTA_MB if global_quota_mb is None else global_quota_mb) * 1024 * 1024
+    user_quota = (WORKSPACE_USER_QUOTA_MB if user_quota_mb is None else user_quota_mb) * 1024 * 1024
+    min_idle = WORKSPACE_GC_MIN_IDLE if min_idle is None else min_idle
+
+    start = time.monotonic()
+    trees = scan_trees()
+    usage_before = sum(tree['size'] for tree in trees)
+    now = time.time()
+    candidates = sorted(
+        (tree for tree in trees if now - tree['last_used'] >= min_idle),
+        key=lambda tree: tree['last_used']
+    )
+    evicted = []
+
+    def evict(tree):
+        if not dry_run:
+            _preserve_artifacts(tree)
+            if not workspace.try_remove_project(tree['key'], tree['path']):
+                print(f"⏭️ Workspace em uso, mantido: {tree['path']}")
+                return False
+        tree['evicted'] = True
+        evicted.append(tree)
+        return True
+
+    if user_quota:
+        user_usage = defaultdict(int)
+        for tree in trees:
+            user_usage[tree['user_id']] += tree['size']
+        for tree in candidates:
+            user_id = tree['user_id']
+            if user_id is not None and user_usage[user_id] > user_quota and evict(tree):
+                user_usage[user_id] -= tree['size']
+
+    usage = usage_before - sum(tree['size'] for tree in evicted)
+    if global_quota:
+        for tree in candidates:
+            if usage <= global_quota:
+                break
+            if not tree.get('evicted') and evict(tree):
+                usage -= tree['size']
+
+    artifacts = {'artifacts': 0, 'bytes': 0} if dry_run else artifact_store.collect()
+    result = {
+        'dry_run': dry_run,
+        'trees': len(trees),
+        'usage_bytes_before': usage_before,
+        'usage_bytes_after': usage,
+        'evicted': [
+            {
+                'path': str(tree['path']),
+                'kind': tree['kind'],
+                'plugin_id': tree['plugin_id'],
+                'user_id': tree['user_id'],
+                'size_bytes': tree['size'],
+                'last_used': datetime.fromtimestamp(tree['last_used'], UTC).isoformat(),
+            }
+            for tree in evicted
+        ],
+        'reclaimed_bytes': sum(tree['size'] for tree in evicted),
+        'artifacts': artifacts,
+        'duration_ms': int((time.monotonic() - start) * 1000),
+    }
+    if not dry_run:
+        _record(result)
+        print(f"🧹 Workspaces: {len(evicted)} apagados, {result['reclaimed_bytes']} bytes recuperados")
+    return result
+
+
+def _load_stats():
+    try:
+        return json.loads(STATS_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _record(result):
+    """Soma a coleta às métricas acumuladas (compartilhadas entre workers)"""
+    stats = _load_stats()
+    stats['runs'] = stats.get('runs', 0) + 1
+    stats['evicted_trees'] = stats.get('evicted_trees', 0) + len(result['evicted'])
+    stats['reclaimed_bytes'] = stats.get('reclaimed_bytes', 0) + result['reclaimed_bytes']
+    stats['artifact_reclaimed_bytes'] = stats.get('artifact_reclaimed_bytes', 0) + result['artifacts']['bytes']
+    stats['last_run'] = {
+        'at': datetime.now(UTC).isoformat(),
+        'timestamp': time.time(),
+        'evicted_trees': len(result['evicted']),
+        'reclaimed_bytes': result['reclaimed_bytes'],
+        'usage_bytes': result['usage_bytes_after'],
+        'duration_ms': result['duration_ms'],
+    }
+    try:
+        STATS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = STATS_FILE.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_file.write_text(json.dumps(stats, indent=2), encoding='utf-8')
+        os.replace(tmp_file, STATS_FILE)
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar as métricas do coletor: {str(e)}")
+
+
+def get_stats():
+    """Métricas acumuladas do coletor e configuração atual"""
+    stats = _load_stats()
+    last_run = stats.get('last_run')
+    if last_run:
+        last_run = {key: value for key, value in last_run.items() if key != 'timestamp'}
+    return {
+        'quota_mb': WORKSPACE_QUOTA_MB,
+        'user_quota_mb': WORKSPACE_USER_QUOTA_MB,
+        'interval_seconds': WORKSPACE_GC_INTERVAL,
+        'min_idle_seconds': WORKSPACE_GC_MIN_IDLE,
+        'runs': stats.get('runs', 0),
+        'evicted_trees': stats.get('evicted_trees', 0),
+        'reclaimed_bytes': stats.get('reclaimed_bytes', 0),
+        'artifact_reclaimed_bytes': stats.get('artifact_reclaimed_bytes', 0),
+        'last_run': last_run,
+    }
+
+
+def collect_if_due(app, interval=None):
+    """
+    Executa a coleta se a última (de qualquer worker) foi há mais de interval.
+
+    Returns:
+        dict: Resultado da coleta, ou None se não era hora ou outro worker está coletando
+    """
+    interval = WORKSPACE_GC_INTERVAL if interval is None else interval
+    LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_FILE, 'w') as lock:
+        if fcntl:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+        try:
+            last_run = _load_stats().get('last_run') or {}
+            if time.time() - last_run.get('timestamp', 0) < interval:
+                return None
+            with app.app_context():
+                return collect()
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def start_background_collector(app):
+    """Inicia a thread do coletor (uma por worker; só um worker coleta por intervalo)"""
+    global _collector_thread
+    if WORKSPACE_GC_INTERVAL <= 0 or (_collector_thread is not None and _collector_thread.is_alive()):
+        return None
+
+    def run():
+        while True:
+            time.sleep(WORKSPACE_GC_INTERVAL)
+            try:
+                collect_if_due(app)
+            except Exception as e:
+                print(f"❌ Erro no coletor de workspaces: {str(e)}")
+
+    _collector_thread = threading.Thread(target=run, daemon=True, name='workspace-gc')
+    _collector_thread.start()
+    return _collector_thread